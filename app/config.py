@@ -29,12 +29,27 @@ def _int_from_env(name: str, default: int) -> int:
 
 def import_max_file_mb() -> int:
     """Return the maximum allowed import file size in megabytes (<=0 disables the check)."""
-    return _int_from_env("IMPORT_MAX_FILE_MB", 2)
+    return _int_from_env("IMPORT_MAX_FILE_MB", 0)
+
+
+def import_max_buffered_mb() -> int:
+    """Return the size cap in megabytes for uploads read whole into memory, e.g. YAML (<=0 disables the check)."""
+    return _int_from_env("IMPORT_MAX_BUFFERED_MB", 2)
 
 
 def import_max_items() -> int:
     """Return the maximum number of items accepted in a single import (<=0 disables the check)."""
-    return _int_from_env("IMPORT_MAX_ITEMS", 25)
+    return _int_from_env("IMPORT_MAX_ITEMS", 5000)
+
+
+def import_batch_size() -> int:
+    """Return how many validated import items are written per executemany call."""
+    return max(1, _int_from_env("IMPORT_BATCH_SIZE", 500))
+
+
+def import_response_max_items() -> int:
+    """Return how many created records an import response echoes back (``count`` is always the total)."""
+    return max(0, _int_from_env("IMPORT_RESPONSE_MAX_ITEMS", 1000))
 
 
 def prompt_max_bytes() -> int:
@@ -42,11 +57,235 @@ def prompt_max_bytes() -> int:
     return _int_from_env("PROMPT_MAX_BYTES", 8192)
 
 
+def db_pool_size() -> int:
+    """Return the maximum number of pooled SQLite connections kept per process."""
+    return max(1, _int_from_env("DB_POOL_SIZE", 8))
+
+
+def db_pool_timeout_sec() -> int:
+    """Return how long (seconds) a request waits for a free pooled connection."""
+    return max(1, _int_from_env("DB_POOL_TIMEOUT_SEC", 30))
+
+
+def db_busy_timeout_ms() -> int:
+    """Return the SQLite busy_timeout (ms) applied to every pooled connection."""
+    return max(0, _int_from_env("DB_BUSY_TIMEOUT_MS", 5000))
+
+
+def db_cache_size_kb() -> int:
+    """Return the SQLite page cache size (KiB) applied to every pooled connection."""
+    return max(0, _int_from_env("DB_CACHE_SIZE_KB", 8192))
+
+
+def orchestration_max_concurrency() -> int:
+    """Return how many independent flow nodes may run at the same time (1 runs them one by one)."""
+    return max(1, _int_from_env("ORCHESTRATION_MAX_CONCURRENCY", 4))
+
+
+def langchain_context_depth() -> int:
+    """Return how many edge hops of upstream outputs a LangChain node receives (0 = every ancestor)."""
+    return max(0, _int_from_env("LANGCHAIN_CONTEXT_DEPTH", 1))
+
+
+def langchain_context_max_bytes() -> int:
+    """Return the UTF-8 byte budget for upstream outputs in one LangChain prompt (0 = unlimited)."""
+    return max(0, _int_from_env("LANGCHAIN_CONTEXT_MAX_BYTES", 16384))
+
+
+def crewai_http_max_connections() -> int:
+    """Return the connection cap of the shared CrewAI HTTP pool."""
+    return max(1, _int_from_env("CREWAI_HTTP_MAX_CONNECTIONS", 100))
+
+
+def crewai_http_max_keepalive() -> int:
+    """Return how many idle keep-alive connections the shared CrewAI HTTP pool retains."""
+    return max(0, _int_from_env("CREWAI_HTTP_MAX_KEEPALIVE", 20))
+
+
+def crewai_http_keepalive_expiry_sec() -> int:
+    """Return how long (seconds) an idle pooled CrewAI connection is kept open."""
+    return max(0, _int_from_env("CREWAI_HTTP_KEEPALIVE_EXPIRY_SEC", 30))
+
+
+def crewai_http2_enabled() -> bool:
+    """Return whether the shared CrewAI HTTP pool negotiates HTTP/2 (requires the 'h2' package)."""
+    return _int_from_env("CREWAI_HTTP2", 1) > 0
+
+
+def orchestration_batch_concurrency() -> int:
+    """Return the default and maximum number of rows ``POST /orchestrate/batch`` runs at the same time."""
+    return max(1, _int_from_env("ORCHESTRATION_BATCH_CONCURRENCY", 4))
+
+
+def orchestration_batch_max_items() -> int:
+    """Return the maximum number of input rows accepted by ``POST /orchestrate/batch``."""
+    return max(1, _int_from_env("ORCHESTRATION_BATCH_MAX_ITEMS", 1000))
+
+
+def provider_rate_limit_per_sec() -> int:
+    """Return the request rate allowed per provider endpoint, shared by all runs (0 = no rate limit)."""
+    return max(0, _int_from_env("PROVIDER_RATE_LIMIT_PER_SEC", 0))
+
+
+def provider_burst() -> int:
+    """Return how many requests may be sent back to back before the rate limit applies."""
+    return max(1, _int_from_env("PROVIDER_BURST", 10))
+
+
+def provider_max_concurrency() -> int:
+    """Return the ceiling of the adaptive concurrent-call window per provider endpoint."""
+    return max(1, _int_from_env("PROVIDER_MAX_CONCURRENCY", 16))
+
+
+def provider_backoff_max_sec() -> int:
+    """Return the cap (seconds) of the jittered exponential retry backoff."""
+    return max(0, _int_from_env("PROVIDER_BACKOFF_MAX_SEC", 30))
+
+
+def provider_throttle_retries() -> int:
+    """Return how many times a LangChain call rejected as rate limited is retried."""
+    return max(0, _int_from_env("PROVIDER_THROTTLE_RETRIES", 2))
+
+
+def circuit_breaker_enabled() -> bool:
+    """Return whether provider calls go through per-endpoint circuit breakers."""
+    return _int_from_env("CIRCUIT_BREAKER_ENABLED", 1) > 0
+
+
+def circuit_failure_rate_pct() -> int:
+    """Return the failure rate (percent of the recent calls) that opens a breaker."""
+    return min(100, max(1, _int_from_env("CIRCUIT_FAILURE_RATE_PCT", 50)))
+
+
+def circuit_min_calls() -> int:
+    """Return how many recent calls a breaker needs before it may open."""
+    return max(1, _int_from_env("CIRCUIT_MIN_CALLS", 5))
+
+
+def circuit_window_calls() -> int:
+    """Return how many recent calls per endpoint the failure rate is computed over."""
+    return max(1, _int_from_env("CIRCUIT_WINDOW_CALLS", 20))
+
+
+def circuit_open_sec() -> int:
+    """Return how long (seconds) an open breaker fails fast before letting a probe through."""
+    return max(1, _int_from_env("CIRCUIT_OPEN_SEC", 30))
+
+
+def circuit_slow_call_sec() -> int:
+    """Return the latency (seconds) above which a call counts as failed (0 = latency is ignored)."""
+    return max(0, _int_from_env("CIRCUIT_SLOW_CALL_SEC", 0))
+
+
+def orchestration_job_workers() -> int:
+    """Return the size of the background orchestration job worker pool."""
+    return max(1, _int_from_env("ORCHESTRATION_JOB_WORKERS", 4))
+
+
+def orchestration_job_shutdown_grace_sec() -> int:
+    """Return how long shutdown waits for running orchestration jobs before marking them failed."""
+    return max(0, _int_from_env("ORCHESTRATION_JOB_SHUTDOWN_GRACE_SEC", 30))
+
+
+def orchestration_job_executor() -> str:
+    """Return the job worker kind: ``thread`` (default) or ``process``."""
+    value = os.getenv("ORCHESTRATION_JOB_EXECUTOR", "thread").lower()
+    return value if value in ("thread", "process") else "thread"
+
+
+def export_batch_size() -> int:
+    """Return how many rows a streaming export fetches from SQLite per round-trip."""
+    return max(1, _int_from_env("EXPORT_BATCH_SIZE", 500))
+
+
+def agent_cache_ttl_sec() -> int:
+    """Return how long (seconds) batch-loaded agents are reused before re-reading SQLite (<=0 disables)."""
+    return _int_from_env("AGENT_CACHE_TTL_SEC", 5)
+
+
+def llm_cache_enabled() -> bool:
+    """Return whether LangChain responses are cached (deterministic calls only unless forced)."""
+    return _int_from_env("LLM_CACHE_ENABLED", 1) > 0
+
+
+def llm_cache_force() -> bool:
+    """Return whether responses are cached even when the model temperature is above zero."""
+    return _int_from_env("LLM_CACHE_FORCE", 0) > 0
+
+
+def llm_cache_max_entries() -> int:
+    """Return the capacity of the in-memory LRU tier of the LLM response cache."""
+    return max(1, _int_from_env("LLM_CACHE_MAX_ENTRIES", 512))
+
+
+def llm_cache_ttl_sec() -> int:
+    """Return how long (seconds) a cached LLM response stays valid (<=0 disables expiry)."""
+    return _int_from_env("LLM_CACHE_TTL_SEC", 3600)
+
+
+def llm_cache_disk_enabled() -> bool:
+    """Return whether the LLM response cache also persists entries to SQLite under data/."""
+    return _int_from_env("LLM_CACHE_DISK", 0) > 0
+
+
+def llm_cache_disk_max_entries() -> int:
+    """Return the maximum number of rows kept by the on-disk LLM response cache."""
+    return max(1, _int_from_env("LLM_CACHE_DISK_MAX_ENTRIES", 10000))
+
+
+def metrics_enabled() -> bool:
+    """Return whether /metrics is served and HTTP requests and SQLite statements are timed."""
+    return _int_from_env("METRICS_ENABLED", 1) > 0
+
+
+def log_async_enabled() -> bool:
+    """Return whether log records are written to stdout by a background thread (0 writes inline)."""
+    return _int_from_env("LOG_ASYNC", 1) > 0
+
+
+def log_queue_size() -> int:
+    """Return the capacity of the async log queue (<=0 makes it unbounded)."""
+    return _int_from_env("LOG_QUEUE_SIZE", 10000)
+
+
+def log_queue_policy() -> str:
+    """Return what happens when the async log queue is full: ``drop`` the record or ``block`` the caller."""
+    policy = os.getenv("LOG_QUEUE_POLICY", "drop").strip().lower()
+    return policy if policy in ("drop", "block") else "drop"
+
+
+def log_batch_size() -> int:
+    """Return the maximum number of queued log records written with a single stream write."""
+    return max(1, _int_from_env("LOG_BATCH_SIZE", 256))
+
+
+def run_history_enabled() -> bool:
+    """Return whether finished orchestration runs are persisted for ``GET /runs``."""
+    return _int_from_env("RUN_HISTORY_ENABLED", 1) > 0
+
+
+def run_compress_min_bytes() -> int:
+    """Return the size (bytes) from which stored run outputs and logs are compressed."""
+    return max(0, _int_from_env("RUN_COMPRESS_MIN_BYTES", 512))
+
+
+def run_compression() -> str:
+    """Return the codec for stored run blobs: ``zlib`` (default) or ``zstd`` (needs the 'zstandard' package)."""
+    codec = os.getenv("RUN_COMPRESSION", "zlib").strip().lower()
+    return codec if codec in ("zlib", "zstd") else "zlib"
+
+
 def import_max_file_bytes() -> int:
     limit_mb = import_max_file_mb()
     return 0 if limit_mb <= 0 else limit_mb * 1024 * 1024
 
 
+def import_max_buffered_bytes() -> int:
+    """Byte cap for uploads that are buffered whole: the tighter of the two limits (0 = none)."""
+    limits = [mb * 1024 * 1024 for mb in (import_max_file_mb(), import_max_buffered_mb()) if mb > 0]
+    return min(limits, default=0)
+
+
 @lru_cache(maxsize=1)
 def langchain_settings() -> dict:
     """Return consolidated settings for the LangChain engine."""
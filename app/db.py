@@ -1,48 +1,348 @@
-import sqlite3, pathlib
+import sqlite3, pathlib, queue, threading, time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from .config import db_busy_timeout_ms, db_cache_size_kb, db_pool_size, db_pool_timeout_sec, metrics_enabled
+from .metrics import observe_query
 
 DATA_DIR = pathlib.Path(__file__).resolve().parent.parent / "data"
 DATA_DIR.mkdir(parents=True, exist_ok=True)
 DB_PATH = DATA_DIR / "app.db"
 
-def get_conn():
-    conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-    conn.row_factory = sqlite3.Row
-    return conn
 
-def init_db():
+class TimedCursor(sqlite3.Cursor):
+    """Cursor recording each statement's execution time in ``db_query_duration_seconds``."""
+
+    def execute(self, sql, parameters=()):
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            observe_query(sql, time.perf_counter() - start)
+
+    def executemany(self, sql, seq_of_parameters):
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            observe_query(sql, time.perf_counter() - start)
+
+
+class PooledConnection(sqlite3.Connection):
+    """sqlite3 connection whose close() hands it back to the owning pool."""
+
+    _pool: Optional["ConnectionPool"] = None
+    _checked_out: bool = False
+    _cursor_factory: type = sqlite3.Cursor
+
+    def cursor(self, factory=None):
+        return super().cursor(factory or self._cursor_factory)
+
+    def close(self) -> None:
+        pool = self._pool
+        if pool is None:
+            super().close()
+            return
+        pool.release(self)
+
+    def close_physical(self) -> None:
+        self._pool = None
+        super().close()
+
+
+class ConnectionPool:
+    """Bounded pool of long-lived SQLite connections.
+
+    Connections are opened lazily up to ``size`` and reused (LIFO, so the
+    warmest page cache is handed out first). When every connection is checked
+    out, ``acquire`` waits up to ``timeout`` seconds before giving up.
+    """
+
+    def __init__(
+        self,
+        path: pathlib.Path | str,
+        size: int = 8,
+        timeout: float = 30.0,
+        busy_timeout_ms: int = 5000,
+        cache_size_kb: int = 8192,
+    ) -> None:
+        self.path = path
+        self.size = max(1, size)
+        self.timeout = timeout
+        self.busy_timeout_ms = busy_timeout_ms
+        self.cache_size_kb = cache_size_kb
+        self._idle: "queue.LifoQueue[PooledConnection]" = queue.LifoQueue(maxsize=self.size)
+        self._lock = threading.Lock()
+        self._created = 0
+        self._closed = False
+
+    def _connect(self) -> PooledConnection:
+        conn = sqlite3.connect(
+            self.path,
+            check_same_thread=False,
+            timeout=self.busy_timeout_ms / 1000,
+            factory=PooledConnection,
+        )
+        conn.row_factory = sqlite3.Row
+        if metrics_enabled():
+            conn._cursor_factory = TimedCursor
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        conn.execute(f"PRAGMA cache_size=-{int(self.cache_size_kb)}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn._pool = self
+        return conn
+
+    def acquire(self) -> PooledConnection:
+        if self._closed:
+            raise sqlite3.ProgrammingError("Connection pool is closed.")
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = None
+        if conn is None:
+            with self._lock:
+                can_create = self._created < self.size
+                if can_create:
+                    self._created += 1
+            if can_create:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            else:
+                try:
+                    conn = self._idle.get(timeout=self.timeout)
+                except queue.Empty:
+                    raise sqlite3.OperationalError(
+                        f"Timed out after {self.timeout}s waiting for a database connection."
+                    ) from None
+        conn._checked_out = True
+        return conn
+
+    def release(self, conn: PooledConnection) -> None:
+        if not conn._checked_out:
+            return
+        conn._checked_out = False
+        if self._closed:
+            conn.close_physical()
+            return
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            # A broken connection is dropped and its slot freed for a fresh one.
+            with self._lock:
+                self._created -= 1
+            conn.close_physical()
+            return
+        self._idle.put_nowait(conn)
+
+    def close(self) -> None:
+        self._closed = True
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close_physical()
+        with self._lock:
+            self._created = 0
+
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    """Return the process-wide pool, creating it on first use."""
+    global _pool
+    pool = _pool
+    if pool is None or pool._closed:
+        with _pool_lock:
+            if _pool is None or _pool._closed:
+                _pool = ConnectionPool(
+                    DB_PATH,
+                    size=db_pool_size(),
+                    timeout=db_pool_timeout_sec(),
+                    busy_timeout_ms=db_busy_timeout_ms(),
+                    cache_size_kb=db_cache_size_kb(),
+                )
+            pool = _pool
+    return pool
+
+
+def close_pool() -> None:
+    """Close every idle pooled connection (checked-out ones close on release)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+
+def get_conn() -> PooledConnection:
+    """Check out a pooled connection; ``conn.close()`` returns it to the pool."""
+    return get_pool().acquire()
+
+
+@contextmanager
+def connection() -> Iterator[PooledConnection]:
+    """Borrow a pooled connection for the duration of the block."""
     conn = get_conn()
-    cur = conn.cursor()
-    cur.execute("""
-    CREATE TABLE IF NOT EXISTS agents (
-        id TEXT PRIMARY KEY,
-        name TEXT NOT NULL,
-        role TEXT NOT NULL,
-        goal TEXT NOT NULL,
-        backstory TEXT NOT NULL,
-        tools TEXT,
-        input_artifacts TEXT,
-        output_artifacts TEXT,
-        created_at TEXT
-    );
-    """ )
-    cur.execute("""
-    CREATE TABLE IF NOT EXISTS flows (
-        id TEXT PRIMARY KEY,
-        name TEXT NOT NULL,
-        description TEXT,
-        graph_json TEXT,
-        created_at TEXT
-    );
-    """ )
-    cur.execute("""
-    CREATE TABLE IF NOT EXISTS evaluations (
-        id TEXT PRIMARY KEY,
-        agent_id TEXT NOT NULL,
-        score REAL NOT NULL,
-        comments TEXT,
-        created_at TEXT,
-        FOREIGN KEY(agent_id) REFERENCES agents(id)
-    );
-    """ )
-    conn.commit()
-    conn.close()
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+def init_db():
+    with connection() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS agents (
+            id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            role TEXT NOT NULL,
+            goal TEXT NOT NULL,
+            backstory TEXT NOT NULL,
+            tools TEXT,
+            input_artifacts TEXT,
+            output_artifacts TEXT,
+            created_at TEXT
+        );
+        """ )
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS flows (
+            id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            description TEXT,
+            graph_json TEXT,
+            created_at TEXT
+        );
+        """ )
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS evaluations (
+            id TEXT PRIMARY KEY,
+            agent_id TEXT NOT NULL,
+            score REAL NOT NULL,
+            comments TEXT,
+            created_at TEXT,
+            FOREIGN KEY(agent_id) REFERENCES agents(id)
+        );
+        """ )
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS orchestration_jobs (
+            id TEXT PRIMARY KEY,
+            flow_id TEXT NOT NULL,
+            engine TEXT,
+            inputs TEXT,
+            status TEXT NOT NULL,
+            result TEXT,
+            error TEXT,
+            idempotency_key TEXT UNIQUE,
+            created_at TEXT,
+            updated_at TEXT
+        );
+        """ )
+        cur.execute(
+            "CREATE INDEX IF NOT EXISTS idx_orchestration_jobs_status ON orchestration_jobs(status, created_at)"
+        )
+        # Per-agent score rollup kept in step with evaluations by evals_service.create_evaluation.
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS evaluation_stats (
+            agent_id TEXT PRIMARY KEY,
+            count INTEGER NOT NULL,
+            sum REAL NOT NULL,
+            sum_sq REAL NOT NULL,
+            min REAL NOT NULL,
+            max REAL NOT NULL,
+            last_at TEXT
+        );
+        """ )
+        # Backfill once from evaluations written before the rollup existed.
+        cur.execute("""
+        INSERT INTO evaluation_stats (agent_id, count, sum, sum_sq, min, max, last_at)
+        SELECT agent_id, COUNT(*), SUM(score), SUM(score * score), MIN(score), MAX(score), MAX(created_at)
+        FROM evaluations
+        WHERE NOT EXISTS (SELECT 1 FROM evaluation_stats)
+        GROUP BY agent_id
+        """)
+        # Finished orchestration runs (id = request_id); outputs and logs may be compressed (see runs_service).
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS runs (
+            id TEXT PRIMARY KEY,
+            flow_id TEXT NOT NULL,
+            engine TEXT NOT NULL,
+            duration_ms INTEGER,
+            routing TEXT,
+            executed_nodes TEXT,
+            usage TEXT,
+            logs BLOB,
+            logs_encoding TEXT NOT NULL DEFAULT 'identity',
+            created_at TEXT NOT NULL
+        );
+        """ )
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS run_artifacts (
+            run_id TEXT NOT NULL,
+            node_id TEXT NOT NULL,
+            status TEXT NOT NULL,
+            error TEXT,
+            usage TEXT,
+            output BLOB,
+            output_encoding TEXT NOT NULL DEFAULT 'identity',
+            PRIMARY KEY (run_id, node_id)
+        );
+        """ )
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_runs_created ON runs(created_at, id)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_runs_flow ON runs(flow_id, created_at, id)")
+        # Provider usage per UTC day, flow, agent and model; upserted by usage_service after each run.
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS usage_daily (
+            day TEXT NOT NULL,
+            flow_id TEXT NOT NULL,
+            agent_id TEXT NOT NULL DEFAULT '',
+            model TEXT NOT NULL DEFAULT '',
+            calls INTEGER NOT NULL,
+            prompt_tokens INTEGER NOT NULL,
+            completion_tokens INTEGER NOT NULL,
+            total_tokens INTEGER NOT NULL,
+            latency_ms INTEGER NOT NULL,
+            PRIMARY KEY (flow_id, day, agent_id, model)
+        );
+        """ )
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_usage_daily_agent ON usage_daily(agent_id, day)")
+        # One row per flow node; maintained by flows_service alongside graph_json.
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS flow_nodes (
+            flow_id TEXT NOT NULL,
+            node_id TEXT NOT NULL,
+            agent_id TEXT,
+            PRIMARY KEY (flow_id, node_id)
+        );
+        """ )
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_flow_nodes_agent ON flow_nodes(agent_id)")
+        # Backfill flows written before the side table existed (same extraction rules as flows_service.node_agent_id).
+        cur.execute("""
+        INSERT OR IGNORE INTO flow_nodes (flow_id, node_id, agent_id)
+        SELECT f.id, CAST(json_extract(n.value, '$.id') AS TEXT),
+               CAST(COALESCE(json_extract(n.value, '$.agentId'),
+                             CASE WHEN json_extract(n.value, '$.type') = 'agent'
+                                  THEN json_extract(n.value, '$.id') END) AS TEXT)
+        FROM flows f, json_each(f.graph_json, '$.nodes') n
+        WHERE json_valid(f.graph_json) AND json_type(f.graph_json, '$.nodes') = 'array'
+          AND n.type = 'object' AND json_extract(n.value, '$.id') IS NOT NULL
+          AND NOT EXISTS (SELECT 1 FROM flow_nodes fn WHERE fn.flow_id = f.id)
+        """)
+        # Keyset pagination (newest first) and list filters.
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_agents_created ON agents(created_at, id)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_agents_name ON agents(name)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_flows_created ON flows(created_at, id)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_flows_name ON flows(name)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_evaluations_created ON evaluations(created_at, id)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_evaluations_agent ON evaluations(agent_id, created_at, id)")
+        conn.commit()
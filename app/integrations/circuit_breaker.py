@@ -0,0 +1,202 @@
+"""Per-endpoint circuit breakers for provider calls.
+
+A breaker watches the outcome of the last ``CIRCUIT_WINDOW_CALLS`` calls to
+an endpoint. A call counts as failed when the endpoint looks unhealthy
+(connection errors, timeouts, 5xx) or, when ``CIRCUIT_SLOW_CALL_SEC`` is set,
+when it took longer than that. Throttling and client errors (4xx) mean the
+endpoint is up and count as successes.
+
+Once the failure rate reaches ``CIRCUIT_FAILURE_RATE_PCT`` over at least
+``CIRCUIT_MIN_CALLS`` calls the breaker opens and calls fail immediately
+with :class:`CircuitOpenError`. After ``CIRCUIT_OPEN_SEC`` one probe call is let
+through (half-open): its success closes the breaker and its failure reopens it.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Deque, Dict, Iterator, Optional
+
+from ..config import (
+    circuit_breaker_enabled,
+    circuit_failure_rate_pct,
+    circuit_min_calls,
+    circuit_open_sec,
+    circuit_slow_call_sec,
+    circuit_window_calls,
+)
+from ..metrics import CIRCUIT_REJECTED, CIRCUIT_STATE, CIRCUIT_TRANSITIONS
+from .rate_limit import throttle_info
+
+logger = logging.getLogger(__name__)
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+# Values of the circuit_breaker_state gauge.
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling an endpoint whose breaker is open."""
+
+    def __init__(self, endpoint: str, retry_in: float) -> None:
+        super().__init__(f"Provider endpoint '{endpoint}' is unavailable (circuit open); retry in {retry_in:.0f}s")
+        self.endpoint = endpoint
+        self.retry_in = retry_in
+
+
+def counts_as_failure(exc: BaseException) -> bool:
+    """Whether ``exc`` says the endpoint itself is unhealthy."""
+    if not isinstance(exc, Exception) or isinstance(exc, CircuitOpenError):
+        return False
+    if throttle_info(exc)[0]:
+        return False
+    status = getattr(exc, "status_code", None) or getattr(getattr(exc, "response", None), "status_code", None)
+    if isinstance(status, int):
+        return status >= 500
+    # Errors raised after reading a valid response (e.g. CrewAI status=error, bad JSON) are not outages.
+    return not isinstance(exc, ValueError)
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        endpoint: str,
+        failure_rate: float,
+        min_calls: int,
+        window: int,
+        open_sec: float,
+        slow_call_sec: float = 0.0,
+        enabled: bool = True,
+    ) -> None:
+        self.endpoint = endpoint
+        self.failure_rate = failure_rate
+        self.min_calls = max(1, min_calls)
+        self.open_sec = open_sec
+        self.slow_call_sec = slow_call_sec
+        self.enabled = enabled
+        self.state = CLOSED
+        self._outcomes: Deque[bool] = deque(maxlen=max(self.min_calls, window))
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_started: Optional[float] = None
+        self._lock = threading.Lock()
+        self._gauge = CIRCUIT_STATE.labels(endpoint)
+        # A breaker rebuilt for the same endpoint (reset_breakers) takes over the published value.
+        self._published = self._gauge.value()
+        self._publish()
+
+    def _publish(self) -> None:
+        value = _STATE_VALUES[self.state]
+        self._gauge.inc(value - self._published)
+        self._published = value
+
+    def _transition(self, state: str, now: float) -> None:
+        """Move to ``state``; caller holds the lock."""
+        previous, self.state = self.state, state
+        rate = self._failures / len(self._outcomes) if self._outcomes else 0.0
+        if state == OPEN:
+            self._opened_at = now
+        if state != HALF_OPEN:
+            self._probe_started = None
+        if state == CLOSED:
+            self._outcomes.clear()
+            self._failures = 0
+        self._publish()
+        CIRCUIT_TRANSITIONS.labels(self.endpoint, state).inc()
+        log = logger.warning if state == OPEN else logger.info
+        log(
+            "Circuit breaker %s -> %s",
+            previous,
+            state,
+            extra={"endpoint": self.endpoint, "state": state, "failure_rate": round(rate, 3)},
+        )
+
+    def before_call(self) -> None:
+        """Raise CircuitOpenError unless a call may go out now (in half-open, only the single probe may)."""
+        if not self.enabled:
+            return
+        with self._lock:
+            now = time.monotonic()
+            if self.state == OPEN:
+                remaining = self.open_sec - (now - self._opened_at)
+                if remaining > 0:
+                    CIRCUIT_REJECTED.labels(self.endpoint).inc()
+                    raise CircuitOpenError(self.endpoint, remaining)
+                self._transition(HALF_OPEN, now)
+            if self.state == HALF_OPEN:
+                # A probe that never reported back (e.g. a cancelled call) expires after open_sec.
+                if self._probe_started is not None and now - self._probe_started < self.open_sec:
+                    CIRCUIT_REJECTED.labels(self.endpoint).inc()
+                    raise CircuitOpenError(self.endpoint, self.open_sec - (now - self._probe_started))
+                self._probe_started = now
+
+    def record(self, seconds: float, exc: Optional[BaseException] = None) -> None:
+        """Report the outcome of a call let through by :meth:`before_call`.
+
+        Cancellation and other non-``Exception`` errors say nothing about the
+        endpoint and are ignored; a probe that ends that way expires in
+        :meth:`before_call` instead of closing the breaker.
+        """
+        if not self.enabled or (exc is not None and not isinstance(exc, Exception)):
+            return
+        slow = bool(self.slow_call_sec and seconds > self.slow_call_sec)
+        failed = (exc is not None and counts_as_failure(exc)) or slow
+        with self._lock:
+            now = time.monotonic()
+            if self.state == HALF_OPEN:
+                self._transition(OPEN if failed else CLOSED, now)
+                return
+            if self.state == OPEN:
+                # A call started before the breaker opened.
+                return
+            if len(self._outcomes) == self._outcomes.maxlen:
+                self._failures -= self._outcomes[0]
+            self._outcomes.append(failed)
+            self._failures += failed
+            if len(self._outcomes) >= self.min_calls and self._failures / len(self._outcomes) >= self.failure_rate:
+                self._transition(OPEN, now)
+
+    @contextmanager
+    def guard(self) -> Iterator[None]:
+        """Check the breaker, then time the block and record its outcome (usable around ``await`` too)."""
+        self.before_call()
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception as exc:
+            self.record(time.perf_counter() - start, exc)
+            raise
+        self.record(time.perf_counter() - start)
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(endpoint: str) -> CircuitBreaker:
+    """The process-wide breaker for ``endpoint``, built from the CIRCUIT_* settings."""
+    breaker = _breakers.get(endpoint)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.get(endpoint)
+            if breaker is None:
+                breaker = CircuitBreaker(
+                    endpoint,
+                    failure_rate=circuit_failure_rate_pct() / 100,
+                    min_calls=circuit_min_calls(),
+                    window=circuit_window_calls(),
+                    open_sec=circuit_open_sec(),
+                    slow_call_sec=circuit_slow_call_sec(),
+                    enabled=circuit_breaker_enabled(),
+                )
+                _breakers[endpoint] = breaker
+    return breaker
+
+
+def reset_breakers() -> None:
+    """Forget every breaker (tests, or after changing the CIRCUIT_* settings)."""
+    with _breakers_lock:
+        _breakers.clear()
@@ -1,10 +1,73 @@
 ﻿from __future__ import annotations
 
 from typing import Any, Dict, Optional
+import asyncio
+import importlib.util
+import threading
 import time
 import httpx
 import os
 
+from ..config import (
+    crewai_http2_enabled,
+    crewai_http_keepalive_expiry_sec,
+    crewai_http_max_connections,
+    crewai_http_max_keepalive,
+)
+from ..metrics import LLM_CALL_RETRIES, LLM_CALL_SECONDS
+from .circuit_breaker import CircuitOpenError, get_breaker
+from .rate_limit import backoff_delay, get_limiter, record_outcome
+
+
+_shared_client: Optional[httpx.Client] = None
+_shared_async_client: Optional[httpx.AsyncClient] = None
+_shared_async_loop: Optional[asyncio.AbstractEventLoop] = None
+_shared_lock = threading.Lock()
+
+
+def _pool_options() -> Dict[str, Any]:
+    limits = httpx.Limits(
+        max_connections=crewai_http_max_connections(),
+        max_keepalive_connections=crewai_http_max_keepalive(),
+        keepalive_expiry=crewai_http_keepalive_expiry_sec(),
+    )
+    # 'h2' ships with httpx[http2] (requirements.txt); an install without it falls back to keep-alive HTTP/1.1.
+    http2 = crewai_http2_enabled() and importlib.util.find_spec("h2") is not None
+    return {"limits": limits, "http2": http2}
+
+
+def get_shared_client() -> httpx.Client:
+    """Return the process-wide keep-alive client used for CrewAI calls."""
+    global _shared_client
+    with _shared_lock:
+        if _shared_client is None or _shared_client.is_closed:
+            _shared_client = httpx.Client(**_pool_options())
+        return _shared_client
+
+
+def get_shared_async_client() -> httpx.AsyncClient:
+    """Return the keep-alive async client bound to the running event loop."""
+    global _shared_async_client, _shared_async_loop
+    loop = asyncio.get_running_loop()
+    with _shared_lock:
+        if _shared_async_client is None or _shared_async_client.is_closed or _shared_async_loop is not loop:
+            # Pooled connections belong to the loop that opened them, so a new loop gets its own client.
+            _shared_async_client = httpx.AsyncClient(**_pool_options())
+            _shared_async_loop = loop
+        return _shared_async_client
+
+
+async def aclose_shared_clients() -> None:
+    """Close the shared clients; called from the FastAPI lifespan on shutdown."""
+    global _shared_client, _shared_async_client, _shared_async_loop
+    with _shared_lock:
+        client, async_client, async_loop = _shared_client, _shared_async_client, _shared_async_loop
+        _shared_client = _shared_async_client = _shared_async_loop = None
+    if client is not None:
+        client.close()
+    if async_client is not None and async_loop is asyncio.get_running_loop():
+        await async_client.aclose()
+
 
 class CrewAIClient:
     """
@@ -21,21 +84,22 @@ class CrewAIClient:
         timeout_sec: int = 30,
         max_retries: int = 2,
         backoff_sec: float = 0.5,
+        http_client: Optional[httpx.Client] = None,
+        async_http_client: Optional[httpx.AsyncClient] = None,
     ) -> None:
         self.api_key = api_key
         self.base_url = base_url
         self.timeout_sec = timeout_sec
         self.max_retries = max_retries
         self.backoff_sec = backoff_sec
+        # Transports default to the shared pools; injectable for tests
+        self._http_client = http_client
+        self._async_http_client = async_http_client
         # Allow runtime override of run path
         import os as _os
         self.run_path = _os.getenv("CREWAI_RUN_PATH", "/v1/run")
 
-    def run_node(self, prompt: str, context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-        """
-        Placeholder for a real HTTP call to CrewAI.
-        Intentionally not implemented in this checkpoint to avoid network dependency.
-        """
+    def _build_payload(self, prompt: str, context: Optional[Dict[str, Any]]) -> Dict[str, Any]:
         ctx = context or {}
         model = ctx.get("model") or os.getenv("CREWAI_MODEL", "crewai-large")
         system_prompt = ctx.get("system_prompt") or "You are a helpful assistant."
@@ -72,56 +136,134 @@ class CrewAIClient:
         }
         if trimmed_ctx:
             payload["context"] = trimmed_ctx
+        return payload
+
+    def _headers(self) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"}
+
+    @staticmethod
+    def _parse_response(resp: Any) -> Dict[str, Any]:
+        """Normalize a CrewAI/OpenAI-like HTTP response; raises to trigger a retry."""
+        if resp.status_code >= 500:
+            raise httpx.HTTPStatusError("server error", request=resp.request, response=resp)
+        resp.raise_for_status()
+        data = resp.json()
+        if not isinstance(data, dict):
+            return {"status": "error", "output": None, "error": "invalid_response_shape"}
+        status = data.get("status", "ok")
+        if status == "ok":
+            output = data.get("output")
+            if output is None and isinstance(data.get("results"), list):
+                first = data["results"][0] if data["results"] else {}
+                if isinstance(first, dict):
+                    output = first.get("content") or first.get("text")
+            if output is None and isinstance(data.get("choices"), list):
+                first = data["choices"][0] if data["choices"] else {}
+                if isinstance(first, dict):
+                    output = (
+                        (first.get("message") or {}).get("content")
+                        if isinstance(first.get("message"), dict)
+                        else None
+                    ) or first.get("text")
+            return {
+                "status": "ok",
+                "output": output,
+                "error": None,
+                "usage": data.get("usage"),
+            }
+        if status == "error":
+            err = data.get("error")
+            if isinstance(err, dict):
+                message = err.get("message") or err.get("type") or "crew_error"
+            else:
+                message = err or "crew_error"
+            raise ValueError(message)
+        return {"status": status, "output": data.get("output"), "error": data.get("error")}
+
+    def run_node(self, prompt: str, context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Run a single node through the CrewAI HTTP API.
+
+        Calls go through the endpoint's circuit breaker and shared limiter;
+        failures are retried with jittered exponential backoff that never
+        undercuts Retry-After. An open breaker raises CircuitOpenError at once.
+        """
+        payload = self._build_payload(prompt, context)
+        headers = self._headers()
+        url = f"{self.base_url}{self.run_path}"
+        limiter = get_limiter(self.base_url)
+        breaker = get_breaker(self.base_url)
+
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            for attempt in range(self.max_retries + 1):
+                retry_after = None
+                try:
+                    breaker.before_call()
+                    with limiter.slot() as call:
+                        call_start = time.perf_counter()
+                        try:
+                            client = self._http_client or get_shared_client()
+                            resp = client.post(url, json=payload, headers=headers, timeout=self.timeout_sec)
+                            result = self._parse_response(resp)
+                        except Exception as exc:
+                            breaker.record(time.perf_counter() - call_start, exc)
+                            retry_after = record_outcome(call, exc)
+                            raise
+                        breaker.record(time.perf_counter() - call_start)
+                    outcome = "ok"
+                    return result
+                except CircuitOpenError:
+                    raise
+                except Exception:
+                    delay = backoff_delay(attempt, self.backoff_sec, retry_after)
+                    if attempt < self.max_retries and delay is not None:
+                        LLM_CALL_RETRIES.labels("crewai").inc()
+                        time.sleep(delay)
+                        continue
+                    raise
+        finally:
+            LLM_CALL_SECONDS.labels("crewai", outcome).observe(time.perf_counter() - start)
+
+    async def arun_node(self, prompt: str, context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Async variant of :meth:`run_node`; backoff waits without blocking the event loop."""
+        payload = self._build_payload(prompt, context)
+        headers = self._headers()
+        url = f"{self.base_url}{self.run_path}"
+        limiter = get_limiter(self.base_url)
+        breaker = get_breaker(self.base_url)
 
-        headers = {"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"}
-
-        last_exc: Optional[Exception] = None
-        for attempt in range(self.max_retries + 1):
-            try:
-                with httpx.Client(timeout=self.timeout_sec) as client:
-                    url = f"{self.base_url}{self.run_path}"
-                    resp = client.post(url, json=payload, headers=headers)
-                    if resp.status_code >= 500:
-                        raise httpx.HTTPStatusError("server error", request=resp.request, response=resp)
-                    resp.raise_for_status()
-                    data = resp.json()
-                    if not isinstance(data, dict):
-                        return {"status": "error", "output": None, "error": "invalid_response_shape"}
-                    status = data.get("status", "ok")
-                    if status == "ok":
-                        output = data.get("output")
-                        if output is None and isinstance(data.get("results"), list):
-                            first = data["results"][0] if data["results"] else {}
-                            if isinstance(first, dict):
-                                output = first.get("content") or first.get("text")
-                        if output is None and isinstance(data.get("choices"), list):
-                            first = data["choices"][0] if data["choices"] else {}
-                            if isinstance(first, dict):
-                                output = (
-                                    (first.get("message") or {}).get("content")
-                                    if isinstance(first.get("message"), dict)
-                                    else None
-                                ) or first.get("text")
-                        return {
-                            "status": "ok",
-                            "output": output,
-                            "error": None,
-                            "usage": data.get("usage"),
-                        }
-                    if status == "error":
-                        err = data.get("error")
-                        if isinstance(err, dict):
-                            message = err.get("message") or err.get("type") or "crew_error"
-                        else:
-                            message = err or "crew_error"
-                        raise ValueError(message)
-                    return {"status": status, "output": data.get("output"), "error": data.get("error")}
-            except Exception as e:
-                last_exc = e
-                if attempt < self.max_retries:
-                    time.sleep(self.backoff_sec * (attempt + 1))
-                    continue
-                raise
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            for attempt in range(self.max_retries + 1):
+                retry_after = None
+                try:
+                    breaker.before_call()
+                    async with limiter.aslot() as call:
+                        call_start = time.perf_counter()
+                        try:
+                            client = self._async_http_client or get_shared_async_client()
+                            resp = await client.post(url, json=payload, headers=headers, timeout=self.timeout_sec)
+                            result = self._parse_response(resp)
+                        except Exception as exc:
+                            breaker.record(time.perf_counter() - call_start, exc)
+                            retry_after = record_outcome(call, exc)
+                            raise
+                        breaker.record(time.perf_counter() - call_start)
+                    outcome = "ok"
+                    return result
+                except CircuitOpenError:
+                    raise
+                except Exception:
+                    delay = backoff_delay(attempt, self.backoff_sec, retry_after)
+                    if attempt < self.max_retries and delay is not None:
+                        LLM_CALL_RETRIES.labels("crewai").inc()
+                        await asyncio.sleep(delay)
+                        continue
+                    raise
+        finally:
+            LLM_CALL_SECONDS.labels("crewai", outcome).observe(time.perf_counter() - start)
 
     def simulate(self, node_id: str, prompt_snippet: str) -> Dict[str, Any]:
         """Deterministic simulated response for CI/dev."""
@@ -132,11 +274,10 @@ class CrewAIClient:
             "output": f"crewai-real-{node_id}{('-' + prompt_snippet) if prompt_snippet else ''}",
         }
 
-
-
-
-
-
-
-
-
+    async def asimulate(self, node_id: str, prompt_snippet: str) -> Dict[str, Any]:
+        """Async variant of :meth:`simulate`."""
+        await asyncio.sleep(0.01)
+        return {
+            "status": "ok",
+            "output": f"crewai-real-{node_id}{('-' + prompt_snippet) if prompt_snippet else ''}",
+        }
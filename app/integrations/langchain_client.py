@@ -1,9 +1,13 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Any, Dict, Optional
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+import asyncio
 import os
+import threading
+import time
 
+from .circuit_breaker import CircuitBreaker, get_breaker
 from .langchain_messages import AIMessage
 
 
@@ -26,12 +30,15 @@ class StubChatModel:
         text = f"[{self.label} | temp={self.temperature}] {content[:64]}".strip()
         return AIMessage(content=text or f"[{self.label}] response")
 
+    async def ainvoke(self, messages: Any, **kwargs: Any) -> AIMessage:
+        return self.invoke(messages, **kwargs)
 
-@dataclass
+
+@dataclass(frozen=True)
 class LangChainProviderSettings:
     provider: str
     model: Optional[str] = None
-    api_key: Optional[str] = None
+    api_key: Optional[str] = field(default=None, repr=False)
     base_url: Optional[str] = None
     temperature: float = 0.0
 
@@ -99,9 +106,12 @@ PROVIDER_FACTORIES = {
 }
 
 
-def create_langchain_chat_model(settings: Dict[str, Any]):
-    """Create a LangChain chat model based on the provided settings dictionary."""
-    provider_settings = LangChainProviderSettings(
+_models: Dict[LangChainProviderSettings, Any] = {}
+_models_lock = threading.Lock()
+
+
+def provider_settings_from_dict(settings: Dict[str, Any]) -> LangChainProviderSettings:
+    return LangChainProviderSettings(
         provider=(settings.get("provider") or "stub").lower(),
         model=settings.get("model") or None,
         api_key=settings.get("api_key") or None,
@@ -109,6 +119,18 @@ def create_langchain_chat_model(settings: Dict[str, Any]):
         temperature=float(settings.get("temperature") or 0.0),
     )
 
+
+def endpoint_key(settings: Dict[str, Any]) -> str:
+    """Name of the provider endpoint ``settings`` talk to, e.g. ``langchain:openai`` or ``langchain:ollama@http://host:11434``."""
+    provider_settings = provider_settings_from_dict(settings)
+    key = f"langchain:{provider_settings.provider}"
+    return f"{key}@{provider_settings.base_url}" if provider_settings.base_url else key
+
+
+def create_langchain_chat_model(settings: Dict[str, Any]):
+    """Create a LangChain chat model based on the provided settings dictionary."""
+    provider_settings = provider_settings_from_dict(settings)
+
     factory = PROVIDER_FACTORIES.get(provider_settings.provider)
     if not factory:
         raise RuntimeError(
@@ -116,3 +138,74 @@ def create_langchain_chat_model(settings: Dict[str, Any]):
             f"Supported providers: {', '.join(PROVIDER_FACTORIES.keys())}"
         )
     return factory(provider_settings)
+
+
+class GuardedChatModel:
+    """Chat model wrapper whose calls go through the endpoint's circuit breaker; other attributes are delegated."""
+
+    def __init__(self, model: Any, breaker: CircuitBreaker) -> None:
+        self.model = model
+        self.breaker = breaker
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.model, name)
+
+    def invoke(self, messages: Any, **kwargs: Any) -> Any:
+        with self.breaker.guard():
+            return self.model.invoke(messages, **kwargs)
+
+    async def ainvoke(self, messages: Any, **kwargs: Any) -> Any:
+        with self.breaker.guard():
+            if hasattr(self.model, "ainvoke"):
+                return await self.model.ainvoke(messages, **kwargs)
+            return await asyncio.to_thread(self.model.invoke, messages, **kwargs)
+
+
+class GuardedBatchChatModel(GuardedChatModel):
+    """GuardedChatModel for models with a native ``abatch``: one breaker check, one outcome per input."""
+
+    async def abatch(
+        self, inputs: List[Any], config: Any = None, return_exceptions: bool = False, **kwargs: Any
+    ) -> List[Any]:
+        self.breaker.before_call()
+        start = time.perf_counter()
+        try:
+            results = await self.model.abatch(inputs, config=config, return_exceptions=return_exceptions, **kwargs)
+        except Exception as exc:
+            self.breaker.record(time.perf_counter() - start, exc)
+            raise
+        elapsed = time.perf_counter() - start
+        for result in results:
+            self.breaker.record(elapsed, result if isinstance(result, BaseException) else None)
+        return results
+
+
+def guard_chat_model(model: Any, breaker: CircuitBreaker) -> GuardedChatModel:
+    cls = GuardedBatchChatModel if hasattr(model, "abatch") else GuardedChatModel
+    return cls(model, breaker)
+
+
+def get_langchain_chat_model(settings: Dict[str, Any]):
+    """Return the shared chat model for ``settings``, building it on first use.
+
+    One instance is kept per distinct LangChainProviderSettings so provider
+    imports and HTTP clients are set up once per process, not per request.
+    The model is wrapped in the endpoint's circuit breaker. Failed builds
+    are not cached.
+    """
+    key = provider_settings_from_dict(settings)
+    model = _models.get(key)
+    if model is not None:
+        return model
+    with _models_lock:
+        model = _models.get(key)
+        if model is None:
+            model = guard_chat_model(create_langchain_chat_model(settings), get_breaker(endpoint_key(settings)))
+            _models[key] = model
+        return model
+
+
+def reset_langchain_models() -> None:
+    """Forget every shared chat model (tests, or after rotating provider credentials)."""
+    with _models_lock:
+        _models.clear()
@@ -0,0 +1,251 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import pathlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from ..config import (
+    llm_cache_disk_enabled,
+    llm_cache_disk_max_entries,
+    llm_cache_enabled,
+    llm_cache_force,
+    llm_cache_max_entries,
+    llm_cache_ttl_sec,
+)
+from ..db import DATA_DIR
+
+CACHE_DB_PATH = DATA_DIR / "llm_cache.db"
+# Upper bound on writes between disk-tier eviction passes.
+_EVICT_EVERY = 64
+
+
+def _message_repr(message: Any) -> Dict[str, Any]:
+    content = getattr(message, "content", message)
+    if not isinstance(content, (str, int, float, bool, type(None), list, dict)):
+        content = str(content)
+    return {"type": type(message).__name__, "content": content}
+
+
+def fingerprint(provider: str, model: Optional[str], temperature: float, messages: Any) -> str:
+    """Return a stable SHA-256 key for a chat call's provider, model, temperature and messages."""
+    payload = {
+        "provider": provider,
+        "model": model or "",
+        "temperature": float(temperature or 0.0),
+        "messages": [_message_repr(m) for m in (messages if isinstance(messages, list) else [messages])],
+    }
+    raw = json.dumps(payload, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class _DiskTier:
+    """SQLite-backed second tier; rows past ``max_entries`` are evicted least-recently-used first.
+
+    Reads never write: hits are remembered and their recency is flushed with
+    the next write. Expired and surplus rows are evicted every few writes
+    (at most ``_EVICT_EVERY``), so the table may briefly exceed ``max_entries``.
+    """
+
+    def __init__(self, path: pathlib.Path | str, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._evict_every = max(1, min(_EVICT_EVERY, max_entries // 10))
+        self._writes = 0
+        self._touched: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "expires_at REAL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_accessed ON llm_cache(accessed_at)")
+        self._conn.commit()
+
+    def get(self, key: str, now: float) -> Optional[Tuple[str, Optional[float]]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM llm_cache WHERE key=? AND (expires_at IS NULL OR expires_at > ?)",
+                (key, now),
+            ).fetchone()
+            if row is None:
+                return None
+            self._touched[key] = now
+            return row[0], row[1]
+
+    def _flush_touched(self) -> None:
+        """Write the recency of keys read since the last write; caller holds the lock."""
+        if self._touched:
+            touched, self._touched = self._touched, {}
+            self._conn.executemany(
+                "UPDATE llm_cache SET accessed_at=? WHERE key=?", [(at, key) for key, at in touched.items()]
+            )
+
+    def _evict(self, now: float) -> None:
+        """Drop expired rows, then the least recently used past ``max_entries``; caller holds the lock."""
+        self._writes = 0
+        self._conn.execute("DELETE FROM llm_cache WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,))
+        self._conn.execute(
+            "DELETE FROM llm_cache WHERE key IN (SELECT key FROM llm_cache ORDER BY accessed_at DESC "
+            "LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+
+    def set(self, key: str, value: str, expires_at: Optional[float], now: float) -> None:
+        with self._lock:
+            self._flush_touched()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, expires_at, accessed_at) VALUES (?,?,?,?)",
+                (key, value, expires_at, now),
+            )
+            self._writes += 1
+            if self._writes >= self._evict_every:
+                self._evict(now)
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush_touched()
+            if self._writes:
+                self._evict(time.time())
+            self._conn.commit()
+            self._conn.close()
+
+
+class LLMResponseCache:
+    """Two-tier (in-memory LRU + optional SQLite) cache of chat model response texts.
+
+    Entries expire ``ttl_sec`` seconds after being stored (``<= 0`` keeps them
+    until evicted). A disk hit is promoted back into the memory tier.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 512,
+        ttl_sec: float = 3600,
+        disk_path: pathlib.Path | str | None = None,
+        disk_max_entries: int = 10000,
+    ) -> None:
+        self.max_entries = max(1, max_entries)
+        self.ttl_sec = ttl_sec
+        self._memory: "OrderedDict[str, Tuple[str, Optional[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk = _DiskTier(disk_path, disk_max_entries) if disk_path is not None else None
+
+    def _put_memory(self, key: str, value: str, expires_at: Optional[float]) -> None:
+        with self._lock:
+            self._memory[key] = (value, expires_at)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _get_memory(self, key: str, now: float) -> Optional[str]:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is None or expires_at > now:
+                self._memory.move_to_end(key)
+                return value
+            del self._memory[key]
+            return None
+
+    def _expires_at(self, now: float) -> Optional[float]:
+        return now + self.ttl_sec if self.ttl_sec and self.ttl_sec > 0 else None
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        value = self._get_memory(key, now)
+        if value is not None or self._disk is None:
+            return value
+        stored = self._disk.get(key, now)
+        if stored is None:
+            return None
+        self._put_memory(key, *stored)
+        return stored[0]
+
+    def set(self, key: str, value: str) -> None:
+        now = time.time()
+        expires_at = self._expires_at(now)
+        self._put_memory(key, value, expires_at)
+        if self._disk is not None:
+            self._disk.set(key, value, expires_at, now)
+
+    async def aget(self, key: str) -> Optional[str]:
+        """Like :meth:`get`, but a disk lookup runs in a worker thread instead of on the event loop."""
+        now = time.time()
+        value = self._get_memory(key, now)
+        if value is not None or self._disk is None:
+            return value
+        stored = await asyncio.to_thread(self._disk.get, key, now)
+        if stored is None:
+            return None
+        self._put_memory(key, *stored)
+        return stored[0]
+
+    async def aset(self, key: str, value: str) -> None:
+        """Like :meth:`set`, but the disk write runs in a worker thread."""
+        now = time.time()
+        expires_at = self._expires_at(now)
+        self._put_memory(key, value, expires_at)
+        if self._disk is not None:
+            await asyncio.to_thread(self._disk.set, key, value, expires_at, now)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+        if self._disk is not None:
+            self._disk.clear()
+
+    def close(self) -> None:
+        if self._disk is not None:
+            self._disk.close()
+            self._disk = None
+
+
+def should_cache(temperature: float, force: Optional[bool] = None) -> bool:
+    """Sampling (temperature > 0) makes responses non-deterministic, so those skip the cache unless forced."""
+    if not llm_cache_enabled():
+        return False
+    if force is None:
+        force = llm_cache_force()
+    return force or float(temperature or 0.0) <= 0.0
+
+
+_cache: Optional[LLMResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> LLMResponseCache:
+    """Return the process-wide response cache, creating it from config on first use."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = LLMResponseCache(
+                max_entries=llm_cache_max_entries(),
+                ttl_sec=llm_cache_ttl_sec(),
+                disk_path=CACHE_DB_PATH if llm_cache_disk_enabled() else None,
+                disk_max_entries=llm_cache_disk_max_entries(),
+            )
+        return _cache
+
+
+def reset_llm_cache() -> None:
+    """Drop the process-wide cache (its disk file is kept); the next call rebuilds it from config."""
+    global _cache
+    with _cache_lock:
+        cache, _cache = _cache, None
+    if cache is not None:
+        cache.close()
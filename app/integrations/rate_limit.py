@@ -0,0 +1,301 @@
+"""Client-side rate limiting shared by every call to the same provider endpoint.
+
+Each endpoint gets one :class:`AdaptiveLimiter`: a token bucket caps the
+request rate and an AIMD window caps concurrent calls. The window grows by
+roughly one slot per window of successful calls and halves whenever the
+provider throttles (429, or 503 with Retry-After). A Retry-After value pauses
+every caller of that endpoint, not just the one that was told to wait.
+"""
+from __future__ import annotations
+
+import asyncio
+import datetime
+import random
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from email.utils import parsedate_to_datetime
+from typing import AsyncIterator, Deque, Dict, Iterator, Optional, Tuple
+
+from ..config import (
+    provider_backoff_max_sec,
+    provider_burst,
+    provider_max_concurrency,
+    provider_rate_limit_per_sec,
+)
+from ..metrics import LLM_CONCURRENCY_LIMIT, LLM_THROTTLED
+
+
+def _resolve(waiter: "asyncio.Future[None]") -> None:
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class CallSlot:
+    """Outcome of one limited call, reported back to the limiter when the slot is released."""
+
+    __slots__ = ("outcome", "retry_after")
+
+    def __init__(self) -> None:
+        self.outcome = "ok"
+        self.retry_after: Optional[float] = None
+
+    def throttled(self, retry_after: Optional[float] = None) -> None:
+        self.outcome = "throttled"
+        self.retry_after = retry_after
+
+    def failed(self) -> None:
+        self.outcome = "error"
+
+
+class AdaptiveLimiter:
+    """Token bucket (``rate`` per second, ``burst`` deep; rate 0 disables it) plus an AIMD concurrency window."""
+
+    def __init__(
+        self, name: str, rate: float, burst: int, max_concurrency: int, min_concurrency: int = 1
+    ) -> None:
+        self.name = name
+        self.rate = max(0.0, float(rate))
+        self.capacity = float(max(1, burst))
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_concurrency = max(1, min(min_concurrency, self.max_concurrency))
+        self._tokens = self.capacity
+        self._refilled = time.monotonic()
+        self._limit = float(self.max_concurrency)
+        self._in_flight = 0
+        self._paused_until = 0.0
+        self._cond = threading.Condition()
+        # Coroutines waiting for a free slot, oldest first, each with the loop that owns its future.
+        self._async_waiters: Deque[Tuple[asyncio.AbstractEventLoop, "asyncio.Future[None]"]] = deque()
+        self._gauge = LLM_CONCURRENCY_LIMIT.labels(name)
+        # A limiter rebuilt for the same endpoint (reset_limiters) takes over the published value.
+        self._published = self._gauge.value()
+        self._publish()
+
+    def concurrency(self) -> int:
+        """Current size of the concurrency window."""
+        return max(self.min_concurrency, int(self._limit))
+
+    def _publish(self) -> None:
+        current = self.concurrency()
+        self._gauge.inc(current - self._published)
+        self._published = current
+
+    def _try_acquire(self, now: float) -> Optional[float]:
+        """0 when a slot was taken, else seconds to wait (None: wait for a release). Caller holds the lock."""
+        if now < self._paused_until:
+            return self._paused_until - now
+        if self._in_flight >= self.concurrency():
+            return None
+        if self.rate:
+            self._tokens = min(self.capacity, self._tokens + (now - self._refilled) * self.rate)
+            self._refilled = now
+            if self._tokens < 1:
+                return (1 - self._tokens) / self.rate
+            self._tokens -= 1
+        self._in_flight += 1
+        return 0
+
+    def acquire(self) -> None:
+        with self._cond:
+            while True:
+                wait = self._try_acquire(time.monotonic())
+                if wait == 0:
+                    return
+                self._cond.wait(wait)
+
+    def _notify(self) -> None:
+        """Wake sync waiters, and one async waiter per free slot. Caller holds the lock."""
+        self._cond.notify_all()
+        free = self.concurrency() - self._in_flight
+        while free > 0 and self._async_waiters:
+            loop, waiter = self._async_waiters.popleft()
+            if waiter.done():
+                continue
+            loop.call_soon_threadsafe(_resolve, waiter)
+            free -= 1
+
+    async def aacquire(self) -> None:
+        """Take a slot; a full window parks the coroutine until a release wakes it (no polling)."""
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._cond:
+                wait = self._try_acquire(time.monotonic())
+                if wait == 0:
+                    return
+                waiter: Optional["asyncio.Future[None]"] = None
+                if wait is None:
+                    waiter = loop.create_future()
+                    self._async_waiters.append((loop, waiter))
+            if waiter is None:
+                await asyncio.sleep(wait)
+                continue
+            try:
+                await waiter
+            except BaseException:
+                with self._cond:
+                    try:
+                        self._async_waiters.remove((loop, waiter))
+                    except ValueError:
+                        # Already woken: hand the free slot on to the next waiter.
+                        self._notify()
+                raise
+
+    async def areserve(self, count: int) -> None:
+        """Wait out any Retry-After pause, then take ``count`` tokens for calls the provider client fans out itself.
+
+        The bucket may go negative, which delays the next callers instead of this batch.
+        """
+        while True:
+            with self._cond:
+                now = time.monotonic()
+                if now >= self._paused_until:
+                    if self.rate:
+                        self._tokens = min(self.capacity, self._tokens + (now - self._refilled) * self.rate)
+                        self._refilled = now
+                        self._tokens -= count
+                    return
+                wait = self._paused_until - now
+            await asyncio.sleep(wait)
+
+    def _adjust(self, outcome: str, retry_after: Optional[float]) -> None:
+        if outcome == "ok":
+            self._limit = min(float(self.max_concurrency), self._limit + 1.0 / self._limit)
+        elif outcome == "throttled":
+            self._limit = max(float(self.min_concurrency), self._limit / 2)
+            if retry_after:
+                # A caller never waits longer than PROVIDER_BACKOFF_MAX_SEC, so neither does the pause.
+                pause = min(retry_after, provider_backoff_max_sec())
+                self._paused_until = max(self._paused_until, time.monotonic() + pause)
+        self._publish()
+
+    def record(self, outcome: str, retry_after: Optional[float] = None) -> None:
+        """Feed back the outcome of a call made without a slot (see :meth:`areserve`)."""
+        with self._cond:
+            self._adjust(outcome, retry_after)
+            self._notify()
+        if outcome == "throttled":
+            LLM_THROTTLED.labels(self.name).inc()
+
+    def release(self, outcome: str = "ok", retry_after: Optional[float] = None) -> None:
+        with self._cond:
+            self._in_flight -= 1
+            self._adjust(outcome, retry_after)
+            self._notify()
+        if outcome == "throttled":
+            LLM_THROTTLED.labels(self.name).inc()
+
+    @contextmanager
+    def slot(self) -> Iterator[CallSlot]:
+        """Hold one call slot for the block; an exception counts as an error unless marked throttled."""
+        self.acquire()
+        call = CallSlot()
+        try:
+            yield call
+        except BaseException:
+            if call.outcome == "ok":
+                call.failed()
+            raise
+        finally:
+            self.release(call.outcome, call.retry_after)
+
+    @asynccontextmanager
+    async def aslot(self) -> AsyncIterator[CallSlot]:
+        """Async counterpart of :meth:`slot`."""
+        await self.aacquire()
+        call = CallSlot()
+        try:
+            yield call
+        except BaseException:
+            if call.outcome == "ok":
+                call.failed()
+            raise
+        finally:
+            self.release(call.outcome, call.retry_after)
+
+
+_limiters: Dict[str, AdaptiveLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(endpoint: str) -> AdaptiveLimiter:
+    """The process-wide limiter for ``endpoint`` (e.g. a CrewAI base URL), built from the PROVIDER_* settings."""
+    limiter = _limiters.get(endpoint)
+    if limiter is None:
+        with _limiters_lock:
+            limiter = _limiters.get(endpoint)
+            if limiter is None:
+                limiter = AdaptiveLimiter(
+                    endpoint, provider_rate_limit_per_sec(), provider_burst(), provider_max_concurrency()
+                )
+                _limiters[endpoint] = limiter
+    return limiter
+
+
+def reset_limiters() -> None:
+    """Forget every limiter (tests, or after changing the PROVIDER_* settings)."""
+    with _limiters_lock:
+        _limiters.clear()
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date); None when absent or invalid."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=datetime.timezone.utc)
+    return max(0.0, (when - datetime.datetime.now(datetime.timezone.utc)).total_seconds())
+
+
+def throttle_info(exc: BaseException) -> Tuple[bool, Optional[float]]:
+    """``(throttled, retry_after)`` for a provider error.
+
+    Understands httpx status errors and the SDK errors LangChain surfaces
+    (``status_code``/``response`` attributes, ``RateLimitError``/``ResourceExhausted``).
+    """
+    response = getattr(exc, "response", None)
+    status = getattr(exc, "status_code", None) or getattr(response, "status_code", None)
+    headers = getattr(response, "headers", None) or {}
+    retry_after = parse_retry_after(headers.get("retry-after") or headers.get("Retry-After"))
+    throttled = (
+        status == 429
+        or (status == 503 and retry_after is not None)
+        or type(exc).__name__ in ("RateLimitError", "ResourceExhausted")
+    )
+    return throttled, retry_after if throttled else None
+
+
+def backoff_delay(attempt: int, base: float, retry_after: Optional[float] = None) -> Optional[float]:
+    """Full-jitter exponential backoff for retry ``attempt`` (0-based), capped by PROVIDER_BACKOFF_MAX_SEC.
+
+    A Retry-After from the provider is a floor: the wait is never shorter.
+    Returns None when that floor is past the cap; the caller should fail
+    the attempt rather than hold its worker that long.
+    """
+    cap = provider_backoff_max_sec()
+    if retry_after is not None and retry_after > cap:
+        return None
+    ceiling = min(cap, base * (2 ** attempt))
+    delay = random.uniform(0, ceiling) if ceiling > 0 else 0.0
+    return min(max(delay, retry_after or 0.0), cap)
+
+
+def record_outcome(call: CallSlot, exc: BaseException) -> Optional[float]:
+    """Mark ``call`` throttled or failed from ``exc``; returns the provider's Retry-After, if any."""
+    throttled, retry_after = throttle_info(exc)
+    if throttled:
+        call.throttled(retry_after)
+    else:
+        call.failed()
+    return retry_after
+
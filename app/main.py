@@ -1,17 +1,22 @@
 from fastapi import FastAPI, Request
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 import os
 from contextlib import asynccontextmanager
 from pathlib import Path
-from .db import init_db
-from .routers import agents, flows, orchestrate, evals, agents_io, flows_io, converters
+from .db import init_db, close_pool
+from .integrations.circuit_breaker import CircuitOpenError
+from .integrations.crewai_client import aclose_shared_clients
+from .orchestration import jobs
+from .routers import agents, flows, orchestrate, evals, runs, agents_io, flows_io, converters
 from .middleware.security import limiter, rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 from slowapi.middleware import SlowAPIMiddleware
-from .config import APP_ENV
+from .config import APP_ENV, metrics_enabled
+from .metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, HTTP_REQUEST_SECONDS, render_metrics
 from .utils.logging import setup_logging, request_id_ctx
+import time
 import uuid
 
 # Setup logging
@@ -23,8 +28,17 @@ async def lifespan(app: FastAPI):
     # Startup
     init_db()
     logger.info("Application startup", extra={"app_env": APP_ENV})
+    interrupted = jobs.recover_interrupted_jobs()
+    if interrupted:
+        logger.warning("Failed orchestration jobs interrupted by a previous shutdown", extra={"count": interrupted})
+    resumed = jobs.resume_queued_jobs()
+    if resumed:
+        logger.info("Resumed queued orchestration jobs", extra={"count": resumed})
     yield
-    # Shutdown (no-op for now)
+    # Shutdown
+    jobs.shutdown()
+    await aclose_shared_clients()
+    close_pool()
 
 
 app = FastAPI(
@@ -33,22 +47,43 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+_metrics_enabled = metrics_enabled()
+
+
 @app.middleware("http")
 async def request_id_middleware(request: Request, call_next):
     request_id = str(uuid.uuid4())
     token = request_id_ctx.set(request_id)
+    start = time.perf_counter()
+    status = 500
     try:
         response = await call_next(request)
+        status = response.status_code
         response.headers["X-Request-ID"] = request_id
         return response
     finally:
         request_id_ctx.reset(token)
+        if _metrics_enabled:
+            # Label by route template (not the raw path) to keep the series count bounded.
+            route = request.scope.get("route")
+            HTTP_REQUEST_SECONDS.labels(
+                request.method, getattr(route, "path", "unmatched"), status
+            ).observe(time.perf_counter() - start)
 
 # from .config import APP_ENV # This line is moved up with other imports
 
 # Security: Rate Limiting
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, rate_limit_exceeded_handler)
+
+
+def circuit_open_handler(request: Request, exc: CircuitOpenError) -> JSONResponse:
+    """A provider endpoint is failing fast: 503 with Retry-After until the breaker probes again."""
+    headers = {"Retry-After": str(max(1, round(exc.retry_in)))}
+    return JSONResponse({"detail": str(exc)}, status_code=503, headers=headers)
+
+
+app.add_exception_handler(CircuitOpenError, circuit_open_handler)
 app.add_middleware(SlowAPIMiddleware)
 
 origins = ["*"]
@@ -61,12 +96,20 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 @app.get("/health")
 def health(request: Request):
     return {"status": "ok"}
 
+
+@app.get("/metrics", include_in_schema=False)
+def metrics(request: Request):
+    if not _metrics_enabled:
+        return PlainTextResponse("Not Found", status_code=404)
+    return PlainTextResponse(render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
 # Register IO routes before dynamic ID routes to avoid collisions like /agents/export matching /agents/{id}
 app.include_router(agents_io.router)
 app.include_router(flows_io.router)
@@ -75,6 +118,7 @@ app.include_router(agents.router)
 app.include_router(flows.router)
 app.include_router(orchestrate.router)
 app.include_router(evals.router)
+app.include_router(runs.router)
 
 # Serve UI static: prefer built React app in ./public if present; otherwise fallback to legacy ./ui/public
 public_dir = "public"
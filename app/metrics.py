@@ -0,0 +1,323 @@
+"""In-process metrics rendered in the Prometheus text exposition format.
+
+Recording is lock-free on the hot path: every metric keeps one set of cells
+per thread, each written only by its own thread, and a scrape sums them. The
+lock is only taken to add a thread's cells or a new label set and to snapshot
+them for rendering.
+"""
+from __future__ import annotations
+
+import math
+import re
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LLM_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+DB_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+
+class _Cells:
+    """Per-thread float cells summed on read; a recycled thread id just continues its predecessor's cells."""
+
+    __slots__ = ("_size", "_by_thread", "_lock")
+
+    def __init__(self, size: int) -> None:
+        self._size = size
+        self._by_thread: Dict[int, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def local(self) -> List[float]:
+        ident = threading.get_ident()
+        cells = self._by_thread.get(ident)
+        if cells is None:
+            with self._lock:
+                cells = self._by_thread.setdefault(ident, [0.0] * self._size)
+        return cells
+
+    def totals(self) -> List[float]:
+        with self._lock:
+            shards = list(self._by_thread.values())
+        totals = [0.0] * self._size
+        for cells in shards:
+            for i, value in enumerate(cells):
+                totals[i] += value
+        return totals
+
+
+class CounterChild:
+    __slots__ = ("_cells",)
+
+    def __init__(self) -> None:
+        self._cells = _Cells(1)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._cells.local()[0] += amount
+
+    def value(self) -> float:
+        return self._cells.totals()[0]
+
+
+class GaugeChild(CounterChild):
+    __slots__ = ()
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._cells.local()[0] -= amount
+
+    @contextmanager
+    def track(self) -> Iterator[None]:
+        """Increment for the duration of the block."""
+        self.inc()
+        try:
+            yield
+        finally:
+            self.dec()
+
+
+class HistogramChild:
+    __slots__ = ("_buckets", "_cells")
+
+    def __init__(self, buckets: Sequence[float]) -> None:
+        self._buckets = tuple(buckets)
+        # One cell per bucket, one for +Inf, then the running sum.
+        self._cells = _Cells(len(self._buckets) + 2)
+
+    def observe(self, value: float) -> None:
+        cells = self._cells.local()
+        cells[bisect_left(self._buckets, value)] += 1
+        cells[-1] += value
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def snapshot(self) -> Tuple[List[float], float, float]:
+        """Return ``(cumulative bucket counts, sum, count)``."""
+        totals = self._cells.totals()
+        cumulative, running = [], 0.0
+        for count in totals[:-1]:
+            running += count
+            cumulative.append(running)
+        return cumulative, totals[-1], running
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: object):
+        key = tuple(map(str, values))
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {key}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _render_child(self, values: Tuple[str, ...], child) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            children = sorted(self._children.items())
+        for values, child in children:
+            lines.extend(self._render_child(values, child))
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self) -> CounterChild:
+        return CounterChild()
+
+    def _render_child(self, values, child) -> List[str]:
+        return [f"{self.name}{_label_text(self.labelnames, values)} {_format_value(child.value())}"]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def _new_child(self) -> GaugeChild:
+        return GaugeChild()
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> HistogramChild:
+        return HistogramChild(self.buckets)
+
+    def _render_child(self, values, child) -> List[str]:
+        cumulative, total, count = child.snapshot()
+        lines = []
+        for bound, value in zip((*self.buckets, math.inf), cumulative):
+            labels = _label_text(self.labelnames, values, f'le="{_format_value(bound)}"')
+            lines.append(f"{self.name}_bucket{labels} {_format_value(value)}")
+        labels = _label_text(self.labelnames, values)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {_format_value(count)}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"metric '{metric.name}' already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))  # type: ignore[return-value]
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))  # type: ignore[return-value]
+
+    def histogram(
+        self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))  # type: ignore[return-value]
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template, up to the start of the response.",
+    ("method", "route", "status"),
+)
+ORCHESTRATION_RUN_SECONDS = REGISTRY.histogram(
+    "orchestration_run_duration_seconds", "Orchestration run latency by engine.", ("engine", "outcome"), LLM_BUCKETS
+)
+ORCHESTRATION_RUNS_IN_FLIGHT = REGISTRY.gauge(
+    "orchestration_runs_in_flight", "Orchestration runs currently executing.", ("engine",)
+)
+ORCHESTRATION_NODE_SECONDS = REGISTRY.histogram(
+    "orchestration_node_duration_seconds", "Flow node execution latency by engine.", ("engine", "outcome"), LLM_BUCKETS
+)
+LLM_CALL_SECONDS = REGISTRY.histogram(
+    "llm_call_duration_seconds",
+    "Provider call latency including retries (CrewAI HTTP, LangChain chat models).",
+    ("client", "outcome"),
+    LLM_BUCKETS,
+)
+LLM_CALL_RETRIES = REGISTRY.counter(
+    "llm_call_retries_total", "Provider call attempts retried after an error.", ("client",)
+)
+LLM_CONCURRENCY_LIMIT = REGISTRY.gauge(
+    "llm_concurrency_limit", "Adaptive (AIMD) concurrent call window per provider endpoint.", ("endpoint",)
+)
+LLM_THROTTLED = REGISTRY.counter(
+    "llm_throttled_total", "Provider calls rejected with 429 (or 503 with Retry-After).", ("endpoint",)
+)
+CIRCUIT_STATE = REGISTRY.gauge(
+    "circuit_breaker_state", "Provider endpoint circuit breaker state (0 closed, 1 half-open, 2 open).", ("endpoint",)
+)
+CIRCUIT_TRANSITIONS = REGISTRY.counter(
+    "circuit_breaker_transitions_total", "Circuit breaker state changes by the state entered.", ("endpoint", "state")
+)
+CIRCUIT_REJECTED = REGISTRY.counter(
+    "circuit_breaker_rejected_total", "Provider calls failed fast because the breaker was open.", ("endpoint",)
+)
+DB_QUERY_SECONDS = REGISTRY.histogram(
+    "db_query_duration_seconds",
+    "SQLite statement execution latency by statement kind and table.",
+    ("op", "table"),
+    DB_BUCKETS,
+)
+
+# Leading keyword, then the first table: right after UPDATE, or after FROM / INTO / TABLE / ON.
+_STATEMENT = re.compile(
+    r"^\s*(\w+)(?:(?:(?<=update)\s+|.*?\b(?:FROM|INTO|TABLE(?:\s+IF\s+NOT\s+EXISTS)?|ON)\s+)[\"`]?(\w+))?",
+    re.I | re.S,
+)
+_statement_labels: Dict[str, Tuple[str, str]] = {}
+_STATEMENT_LABELS_MAX = 1024
+
+
+def statement_labels(sql: str) -> Tuple[str, str]:
+    """``(op, table)`` for a SQL statement, e.g. ``("select", "agents")``; memoized per distinct text."""
+    labels = _statement_labels.get(sql)
+    if labels is None:
+        match = _STATEMENT.match(sql)
+        op = match.group(1).lower() if match else "other"
+        table = (match.group(2) or "").lower() if match else ""
+        labels = (op, table)
+        # Statements with variable-length IN (...) lists are distinct texts; stop memoizing past the cap.
+        if len(_statement_labels) < _STATEMENT_LABELS_MAX:
+            _statement_labels[sql] = labels
+    return labels
+
+
+_statement_children: Dict[str, HistogramChild] = {}
+
+
+def observe_query(sql: str, seconds: float) -> None:
+    child = _statement_children.get(sql)
+    if child is None:
+        child = DB_QUERY_SECONDS.labels(*statement_labels(sql))
+        if len(_statement_children) < _STATEMENT_LABELS_MAX:
+            _statement_children[sql] = child
+    child.observe(seconds)
+
+
+def render_metrics(registry: Optional[MetricsRegistry] = None) -> str:
+    return (registry or REGISTRY).render()
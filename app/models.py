@@ -81,3 +81,25 @@ class EvaluationCreate(BaseModel):
 class Evaluation(EvaluationCreate):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     created_at: str = Field(default_factory=lambda: datetime.datetime.now(datetime.UTC).isoformat())
+
+class UsageRecord(BaseModel):
+    """Provider usage summed per UTC day, flow, agent and model (``calls`` = nodes that reported usage)."""
+    day: str
+    flow_id: str
+    agent_id: Optional[str] = None
+    model: Optional[str] = None
+    calls: int
+    prompt_tokens: int
+    completion_tokens: int
+    total_tokens: int
+    latency_ms: int
+
+class EvaluationStats(BaseModel):
+    """Per-agent score rollup; ``stddev`` is the population standard deviation."""
+    agent_id: str
+    count: int = 0
+    mean: Optional[float] = None
+    stddev: Optional[float] = None
+    min: Optional[float] = None
+    max: Optional[float] = None
+    last_at: Optional[str] = None
@@ -1,6 +1,82 @@
-from typing import Dict, Any, List, Optional, Literal
+import asyncio
+import datetime
+import json
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import (
+    AsyncIterator, Awaitable, Callable, Dict, Any, Iterator, List, Optional, Literal, Tuple, TypeVar, Union,
+)
 from pydantic import BaseModel, Field
 
+from .scheduler import FlowGraph, build_graph
+from ..metrics import ORCHESTRATION_NODE_SECONDS
+
+try:  # orjson is optional; it serializes log events several times faster than json.
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+T = TypeVar("T")
+
+# Key under which the runner passes bound log context (request_id, flow_id) to engines via their inputs.
+LOG_CONTEXT_KEY = "_log_context"
+
+
+def dumps_json(obj: Any) -> str:
+    """Compact JSON text (non-ASCII kept as is); orjson when installed, stdlib json otherwise."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=str).decode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+@dataclass(slots=True)
+class LogEvent:
+    """One structured log entry; ``line`` is its JSON form, produced once at emission."""
+
+    msg: str
+    level: str
+    ts: str
+    node: Optional[str] = None
+    fields: Dict[str, Any] = field(default_factory=dict)
+    line: str = ""
+
+    def to_dict(self) -> Dict[str, Any]:
+        entry: Dict[str, Any] = {"ts": self.ts, "level": self.level}
+        entry.update(self.fields)
+        entry["msg"] = self.msg
+        if self.node:
+            entry["node"] = self.node
+        return entry
+
+
+class LogEmitter:
+    """Creates LogEvents with context fields bound once (e.g. request_id, engine, flow_id).
+
+    Payload keys are merged after the context, so the event is serialized
+    exactly once and callers never re-parse the line to enrich it.
+    """
+
+    __slots__ = ("_context",)
+
+    def __init__(self, **context: Any) -> None:
+        self._context = {k: v for k, v in context.items() if v is not None}
+
+    def bind(self, **fields: Any) -> "LogEmitter":
+        return LogEmitter(**{**self._context, **fields})
+
+    def emit(
+        self, msg: str, node: Optional[str] = None, payload: Optional[Dict[str, Any]] = None, level: str = "info"
+    ) -> LogEvent:
+        fields = dict(self._context)
+        if payload:
+            fields.update(payload)
+        event = LogEvent(
+            msg=msg, level=level, ts=datetime.datetime.now(datetime.UTC).isoformat(), node=node, fields=fields
+        )
+        event.line = dumps_json(event.to_dict())
+        return event
+
 
 class OrchestrationRequest(BaseModel):
     engine: Optional[str] = None
@@ -8,10 +84,57 @@ class OrchestrationRequest(BaseModel):
     inputs: Dict[str, Any] = Field(default_factory=dict)
 
 
+class OrchestrationBatchRequest(BaseModel):
+    engine: Optional[str] = None
+    flow_id: str
+    inputs: List[Dict[str, Any]] = Field(min_length=1)
+    # Rows run at the same time; capped by ORCHESTRATION_BATCH_CONCURRENCY.
+    concurrency: Optional[int] = Field(default=None, ge=1)
+
+
+class OrchestrationUsage(BaseModel):
+    """Provider usage of one node; on a result, the sum over every node that reported usage."""
+
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    total_tokens: int = 0
+    latency_ms: int = 0
+    model: Optional[str] = None
+
+    @classmethod
+    def from_provider(cls, raw: Any, latency_ms: int, model: Optional[str] = None) -> "OrchestrationUsage":
+        """Normalize OpenAI-style (prompt/completion) or LangChain-style (input/output) token counts."""
+        raw = raw if isinstance(raw, dict) else {}
+        prompt = int(raw.get("prompt_tokens", raw.get("input_tokens")) or 0)
+        completion = int(raw.get("completion_tokens", raw.get("output_tokens")) or 0)
+        return cls(
+            prompt_tokens=prompt,
+            completion_tokens=completion,
+            total_tokens=int(raw.get("total_tokens") or prompt + completion),
+            latency_ms=latency_ms,
+            model=model,
+        )
+
+
+def sum_usage(usages: List["OrchestrationUsage"]) -> Optional[OrchestrationUsage]:
+    """Add token counts and latencies; ``model`` is kept only when every node used the same one."""
+    if not usages:
+        return None
+    models = {u.model for u in usages}
+    return OrchestrationUsage(
+        prompt_tokens=sum(u.prompt_tokens for u in usages),
+        completion_tokens=sum(u.completion_tokens for u in usages),
+        total_tokens=sum(u.total_tokens for u in usages),
+        latency_ms=sum(u.latency_ms for u in usages),
+        model=models.pop() if len(models) == 1 else None,
+    )
+
+
 class OrchestrationArtifact(BaseModel):
     status: Literal["ok", "error"]
     output: Optional[str] = None
     error: Optional[str] = None
+    usage: Optional[OrchestrationUsage] = None
 
 
 class OrchestrationPlan(BaseModel):
@@ -27,8 +150,211 @@ class OrchestrationResult(BaseModel):
     logs: List[str]
     duration_ms: Optional[int] = None
     request_id: Optional[str] = None
+    usage: Optional[OrchestrationUsage] = None
+
+
+class OrchestrationJob(BaseModel):
+    id: str
+    flow_id: str
+    engine: Optional[str] = None
+    status: Literal["queued", "running", "succeeded", "failed"]
+    result: Optional[OrchestrationResult] = None
+    error: Optional[str] = None
+    created_at: str
+    updated_at: str
+
+
+class OrchestrationRunSummary(BaseModel):
+    """A persisted run as listed by ``GET /runs`` (``id`` is the run's request_id)."""
+
+    id: str
+    flow_id: str
+    engine: str
+    duration_ms: Optional[int] = None
+    node_count: int
+    usage: Optional[OrchestrationUsage] = None
+    created_at: str
+
+
+class OrchestrationRun(OrchestrationRunSummary):
+    """A persisted run with its plan (artifacts included) and logs."""
+
+    plan: OrchestrationPlan
+    logs: List[str]
+
+
+class OrchestrationEvent(BaseModel):
+    """Incremental engine output: a log line, a finished node, or the final result."""
+
+    type: Literal["log", "node", "result"]
+    node: Optional[str] = None
+    log: Optional[str] = None
+    artifact: Optional[OrchestrationArtifact] = None
+    result: Optional[OrchestrationResult] = None
+
+
+class EngineRun:
+    """Per-run engine state: logs, artifacts and the events not yet handed to the caller.
+
+    Log lines carry ``engine`` plus whatever context the runner bound under
+    ``inputs[LOG_CONTEXT_KEY]`` (request_id, flow_id).
+    """
+
+    def __init__(self, engine: str, flow: Dict[str, Any], inputs: Optional[Dict[str, Any]] = None) -> None:
+        self.engine = engine
+        self.graph: FlowGraph = build_graph(flow)
+        self.start = time.perf_counter()
+        self.logs: List[str] = []
+        self.artifacts: Dict[str, OrchestrationArtifact] = {}
+        context = (inputs or {}).get(LOG_CONTEXT_KEY) or {}
+        self.emitter = LogEmitter(request_id=context.get("request_id"), engine=engine, flow_id=context.get("flow_id"))
+        self._pending: List[OrchestrationEvent] = []
+
+    def log(self, msg: str, node: Optional[str] = None, payload: Optional[Dict[str, Any]] = None) -> None:
+        line = self.emitter.emit(msg, node=node, payload=payload).line
+        self.logs.append(line)
+        # Internal, already-typed values: skip pydantic validation on the per-line hot path.
+        self._pending.append(OrchestrationEvent.model_construct(type="log", node=node, log=line))
+
+    def timed(self, execute: Callable[[Dict[str, Any]], T]) -> Callable[[Dict[str, Any]], T]:
+        """Wrap a node executor so every call lands in ``orchestration_node_duration_seconds``."""
+
+        def run(node: Dict[str, Any]) -> T:
+            start = time.perf_counter()
+            outcome = "error"
+            try:
+                result = execute(node)
+                outcome = "ok"
+                return result
+            finally:
+                ORCHESTRATION_NODE_SECONDS.labels(self.engine, outcome).observe(time.perf_counter() - start)
+
+        return run
+
+    def atimed(self, execute: Callable[[Dict[str, Any]], Awaitable[T]]) -> Callable[[Dict[str, Any]], Awaitable[T]]:
+        """Async counterpart of :meth:`timed`."""
+
+        async def run(node: Dict[str, Any]) -> T:
+            start = time.perf_counter()
+            outcome = "error"
+            try:
+                result = await execute(node)
+                outcome = "ok"
+                return result
+            finally:
+                ORCHESTRATION_NODE_SECONDS.labels(self.engine, outcome).observe(time.perf_counter() - start)
+
+        return run
+
+    def complete(self, node_id: str, artifact: OrchestrationArtifact) -> None:
+        self.artifacts[node_id] = artifact
+        self._pending.append(OrchestrationEvent.model_construct(type="node", node=node_id, artifact=artifact))
+
+    def drain(self) -> Iterator[OrchestrationEvent]:
+        pending, self._pending = self._pending, []
+        yield from pending
+
+    def finish(self) -> Iterator[OrchestrationEvent]:
+        """Yield the remaining events followed by the assembled result."""
+        executed = [nid for nid in self.graph.order if nid in self.artifacts]
+        plan = OrchestrationPlan(executed_nodes=executed, artifacts=self.artifacts, routing="dag-parallel")
+        duration_ms = int((time.perf_counter() - self.start) * 1000)
+        usage = sum_usage([a.usage for a in self.artifacts.values() if a.usage is not None])
+        result = OrchestrationResult(
+            engine=self.engine, flow_id="unknown", plan=plan, logs=self.logs, duration_ms=duration_ms, usage=usage
+        )
+        yield from self.drain()
+        yield OrchestrationEvent(type="result", result=result)
+
+
+# (row index, result or the exception that failed the row, seconds the row took) yielded by ``arun_many``.
+BatchRow = Tuple[int, Union[OrchestrationResult, Exception], float]
+
+
+def collect_result(events: Iterator[OrchestrationEvent]) -> OrchestrationResult:
+    result: Optional[OrchestrationResult] = None
+    for event in events:
+        if event.type == "result":
+            result = event.result
+    if result is None:
+        raise RuntimeError("engine stream ended without a result")
+    return result
 
 
 class OrchestratorEngine:
-    def run(self, flow: Dict[str, Any], inputs: Dict[str, Any]) -> OrchestrationResult:
+    """Engines implement ``stream`` (and optionally a native ``astream``); ``run``/``arun`` buffer those events."""
+
+    name: str = "unknown"
+
+    def stream(self, flow: Dict[str, Any], inputs: Dict[str, Any]) -> Iterator[OrchestrationEvent]:
         raise NotImplementedError
+
+    async def astream(self, flow: Dict[str, Any], inputs: Dict[str, Any]) -> AsyncIterator[OrchestrationEvent]:
+        """Drive the sync ``stream`` on one worker thread and forward its events to the event loop."""
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        stop = threading.Event()
+        done = object()
+
+        def pump() -> None:
+            try:
+                for event in self.stream(flow, inputs):
+                    if stop.is_set():
+                        break
+                    loop.call_soon_threadsafe(queue.put_nowait, event)
+            except BaseException as exc:  # re-raised on the event loop side
+                loop.call_soon_threadsafe(queue.put_nowait, exc)
+            finally:
+                loop.call_soon_threadsafe(queue.put_nowait, done)
+
+        worker = asyncio.ensure_future(asyncio.to_thread(pump))
+        try:
+            while True:
+                item = await queue.get()
+                if item is done:
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+            await worker
+        finally:
+            # A consumer that goes away (e.g. a closed SSE connection) stops the run early.
+            stop.set()
+
+    def run(self, flow: Dict[str, Any], inputs: Dict[str, Any]) -> OrchestrationResult:
+        return collect_result(self.stream(flow, inputs))
+
+    async def arun(self, flow: Dict[str, Any], inputs: Dict[str, Any]) -> OrchestrationResult:
+        result: Optional[OrchestrationResult] = None
+        async for event in self.astream(flow, inputs):
+            if event.type == "result":
+                result = event.result
+        if result is None:
+            raise RuntimeError("engine stream ended without a result")
+        return result
+
+    async def arun_many(
+        self, flow: Dict[str, Any], inputs_list: List[Dict[str, Any]], concurrency: int
+    ) -> AsyncIterator[BatchRow]:
+        """Run ``flow`` once per inputs dict, at most ``concurrency`` rows at a time, yielding rows as they finish.
+
+        A failing row is yielded with its exception instead of stopping the others.
+        """
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def one(index: int, inputs: Dict[str, Any]) -> BatchRow:
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    result: Union[OrchestrationResult, Exception] = await self.arun(flow, inputs)
+                except Exception as exc:
+                    result = exc
+                return index, result, time.perf_counter() - start
+
+        tasks = [asyncio.ensure_future(one(index, inputs)) for index, inputs in enumerate(inputs_list)]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                yield await finished
+        finally:
+            for task in tasks:
+                task.cancel()
@@ -1,84 +1,125 @@
-﻿from typing import Dict, Any
-import os, time, datetime, json
+from typing import Dict, Any, AsyncIterator, Iterator, Tuple
+import os, time
 from ..engine import (
+    EngineRun,
     OrchestratorEngine,
-    OrchestrationResult,
-    OrchestrationPlan,
     OrchestrationArtifact,
+    OrchestrationEvent,
+    OrchestrationUsage,
 )
+from ..scheduler import iter_dag, aiter_dag
 from ...integrations.crewai_client import CrewAIClient
+from ...config import orchestration_max_concurrency
 
 
-class RealCrewAIEngine(OrchestratorEngine):
-    def run(self, flow: Dict[str, Any], inputs: Dict[str, Any]) -> OrchestrationResult:
-        nodes = flow.get("nodes", [])
-        mode = os.getenv("CREWAI_HTTP_MODE", "dry-run").lower()
-        start = time.perf_counter()
-        logs: list[str] = []
+class _CrewAIRun(EngineRun):
+    """Per-run state shared by the sync and async execution paths."""
 
-        def log(msg: str, node: str | None = None) -> None:
-            entry = {"ts": datetime.datetime.now(datetime.UTC).isoformat(), "level": "info", "msg": msg}
-            if node:
-                entry["node"] = node
-            logs.append(json.dumps(entry, ensure_ascii=False))
-
-        log(f"CrewAI REAL: execucao iniciada ({mode})")
-        executed: list[str] = []
-        artifacts: dict[str, OrchestrationArtifact] = {}
-        safe_inputs = {k: v for k, v in (inputs or {}).items() if not k.startswith("_")}
-        prompt_snippet = (safe_inputs.get("prompt") or "")[:48]
-        flow_meta = inputs.get("_flow_meta") or {}
-        client = CrewAIClient(
+    def __init__(self, flow: Dict[str, Any], inputs: Dict[str, Any]) -> None:
+        super().__init__("crewai", flow, inputs)
+        self.flow = flow
+        self.node_count = len(self.graph.order)
+        self.mode = os.getenv("CREWAI_HTTP_MODE", "dry-run").lower()
+        self.safe_inputs = {k: v for k, v in (inputs or {}).items() if not k.startswith("_")}
+        self.prompt_snippet = (self.safe_inputs.get("prompt") or "")[:48]
+        self.flow_meta = inputs.get("_flow_meta") or {}
+        self.client = CrewAIClient(
             api_key=os.getenv("CREWAI_API_KEY", ""),
             base_url=os.getenv("CREWAI_BASE_URL", "https://api.crewai.example"),
             timeout_sec=int(os.getenv("CREWAI_TIMEOUT_SEC", "30")),
             max_retries=int(os.getenv("CREWAI_MAX_RETRIES", "2")),
             backoff_sec=float(os.getenv("CREWAI_BACKOFF_SEC", "0.5")),
         )
+        self.model = os.getenv("CREWAI_MODEL", "crewai-large")
+        self.log(f"CrewAI REAL: execucao iniciada ({self.mode})")
+
+    def build_prompt_for_node(self, nid: str) -> str:
+        base = self.safe_inputs.get("prompt") or ""
+        ctx = self.safe_inputs.get("context") or {}
+        return f"[model:{self.model}] node:{nid} {base} ctx:{list(ctx.keys())}"
+
+    def node_context(self, node: Dict[str, Any]) -> Dict[str, Any]:
+        node_id = node.get("id")
+        return {
+            "node": node_id,
+            "model": self.model,
+            "flow_nodes": self.node_count,
+            "edges": self.flow.get("edges", []),
+            "parameters": node.get("params") or {},
+            "inputs": self.safe_inputs,
+            "metadata": {
+                "node": node_id,
+                "flow": {
+                    "id": self.flow_meta.get("id"),
+                    "name": self.flow_meta.get("name"),
+                    "size": self.node_count,
+                },
+                "prompt_snippet": self.prompt_snippet,
+            },
+        }
+
+    @staticmethod
+    def check(resp: Dict[str, Any]) -> Dict[str, Any]:
+        status = resp.get("status", "ok")
+        if status != "ok":
+            raise ValueError(resp.get("error") or "crew_error")
+        return resp
+
+    def usage(self, resp: Dict[str, Any], start: float) -> OrchestrationUsage:
+        latency_ms = int((time.perf_counter() - start) * 1000)
+        return OrchestrationUsage.from_provider(resp.get("usage"), latency_ms, self.model)
+
+    def execute(self, node: Dict[str, Any]) -> Tuple[Dict[str, Any], OrchestrationUsage]:
+        node_id = node.get("id")
+        start = time.perf_counter()
+        if self.mode == "http":
+            resp = self.client.run_node(prompt=self.build_prompt_for_node(node_id), context=self.node_context(node))
+        else:
+            resp = self.client.simulate(node_id, self.prompt_snippet)
+        return self.check(resp), self.usage(resp, start)
+
+    async def aexecute(self, node: Dict[str, Any]) -> Tuple[Dict[str, Any], OrchestrationUsage]:
+        node_id = node.get("id")
+        start = time.perf_counter()
+        if self.mode == "http":
+            resp = await self.client.arun_node(
+                prompt=self.build_prompt_for_node(node_id), context=self.node_context(node)
+            )
+        else:
+            resp = await self.client.asimulate(node_id, self.prompt_snippet)
+        return self.check(resp), self.usage(resp, start)
+
+    def record(self, node_id: str, output: Tuple[Dict[str, Any], OrchestrationUsage]) -> None:
+        resp, usage = output
+        self.complete(
+            node_id, OrchestrationArtifact(status=resp.get("status", "ok"), output=resp.get("output"), usage=usage)
+        )
+        self.log(f"CrewAI REAL: node executado ({self.mode})", node=node_id, payload={"usage": usage.model_dump()})
+
+    def finish(self) -> Iterator[OrchestrationEvent]:
+        self.log(f"CrewAI REAL: concluida ({self.mode})")
+        return super().finish()
 
-        model = os.getenv("CREWAI_MODEL", "crewai-large")
 
-        def build_prompt_for_node(nid: str) -> str:
-            base = safe_inputs.get("prompt") or ""
-            ctx = safe_inputs.get("context") or {}
-            return f"[model:{model}] node:{nid} {base} ctx:{list(ctx.keys())}"
+class RealCrewAIEngine(OrchestratorEngine):
+    name = "crewai"
+
+    def stream(self, flow: Dict[str, Any], inputs: Dict[str, Any]) -> Iterator[OrchestrationEvent]:
+        state = _CrewAIRun(flow, inputs)
+        yield from state.drain()
+        for node_id, resp in iter_dag(state.graph, state.timed(state.execute), orchestration_max_concurrency()):
+            state.record(node_id, resp)
+            yield from state.drain()
+        yield from state.finish()
 
-        for node in nodes:
-            node_id = node.get("id")
-            executed.append(node_id)
-            if mode == "http":
-                node_params = node.get("params") or {}
-                resp = client.run_node(
-                    prompt=build_prompt_for_node(node_id),
-                    context={
-                        "node": node_id,
-                        "model": model,
-                        "flow_nodes": len(nodes),
-                        "edges": flow.get("edges", []),
-                        "parameters": node_params,
-                        "inputs": safe_inputs,
-                        "metadata": {
-                            "node": node_id,
-                            "flow": {
-                                "id": flow_meta.get("id"),
-                                "name": flow_meta.get("name"),
-                                "size": len(nodes),
-                            },
-                            "prompt_snippet": prompt_snippet,
-                        },
-                    },
-                )
-            else:
-                resp = client.simulate(node_id, prompt_snippet)
-            status = resp.get("status", "ok")
-            if status != "ok":
-                raise ValueError(resp.get("error") or "crew_error")
-            artifacts[node_id] = OrchestrationArtifact(status=status, output=resp.get("output"))
-            usage = resp.get("usage")
-            if usage:
-                log(json.dumps({"usage": usage}), node=node_id)
-            log(f"CrewAI REAL: node executado ({mode})", node=node_id)
-        log(f"CrewAI REAL: concluida ({mode})")
-        plan = OrchestrationPlan(executed_nodes=executed, artifacts=artifacts, routing="sequential")
-        duration_ms = int((time.perf_counter() - start) * 1000)
-        return OrchestrationResult(engine="crewai", flow_id="unknown", plan=plan, logs=logs, duration_ms=duration_ms)
+    async def astream(self, flow: Dict[str, Any], inputs: Dict[str, Any]) -> AsyncIterator[OrchestrationEvent]:
+        state = _CrewAIRun(flow, inputs)
+        for event in state.drain():
+            yield event
+        limit = orchestration_max_concurrency()
+        async for node_id, resp in aiter_dag(state.graph, state.atimed(state.aexecute), limit):
+            state.record(node_id, resp)
+            for event in state.drain():
+                yield event
+        for event in state.finish():
+            yield event
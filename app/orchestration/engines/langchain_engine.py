@@ -1,97 +1,400 @@
 from __future__ import annotations
 
-from typing import Dict, Any, List
+from typing import AsyncIterator, Dict, Any, Iterator, List, Optional, Tuple
+import asyncio
 import json
-import datetime
 import time
 
 from ...integrations.langchain_messages import SystemMessage, HumanMessage
 
 from ..engine import (
+    LOG_CONTEXT_KEY,
+    BatchRow,
+    EngineRun,
     OrchestratorEngine,
-    OrchestrationResult,
-    OrchestrationPlan,
     OrchestrationArtifact,
+    OrchestrationEvent,
+    OrchestrationUsage,
+    collect_result,
 )
+from ..scheduler import FlowGraph, build_graph, iter_dag, aiter_dag
 from ...services import agents_service
-from ...integrations.langchain_client import create_langchain_chat_model
-from ...config import langchain_settings
+from ...integrations.circuit_breaker import CircuitOpenError
+from ...integrations.langchain_client import endpoint_key, get_langchain_chat_model
+from ...integrations.rate_limit import backoff_delay, get_limiter, record_outcome, throttle_info
+from ...integrations.llm_cache import fingerprint, get_llm_cache, should_cache
+from ...config import (
+    langchain_context_depth,
+    langchain_context_max_bytes,
+    langchain_settings,
+    orchestration_max_concurrency,
+    provider_throttle_retries,
+)
+from ...metrics import LLM_CALL_RETRIES, LLM_CALL_SECONDS
+
+# Base of the jittered exponential backoff after the provider throttles a call.
+_THROTTLE_BACKOFF_SEC = 1.0
+
+
+class _LangChainRun(EngineRun):
+    """Per-run state shared by the sync and async execution paths."""
+
+    def __init__(self, flow: Dict[str, Any], inputs: Dict[str, Any]) -> None:
+        super().__init__("langchain", flow, inputs)
+        self.outputs: Dict[str, str] = {}
+        # Per-request log context must not leak into prompts (it would also defeat the response cache).
+        self.safe_inputs = {k: v for k, v in (inputs or {}).items() if k != LOG_CONTEXT_KEY}
+        self.agents: Dict[str, Any] = {}
+        self.context_depth = langchain_context_depth() or None
+        self.context_max_bytes = langchain_context_max_bytes()
+        self.log("LangChain engine: execução iniciada")
+
+    def agent_ids(self) -> List[str]:
+        return [n.get("agentId") for n in self.graph.nodes.values() if n.get("agentId")]
+
+    def build_messages(self, node: Dict[str, Any]) -> List[Any]:
+        node_id = node.get("id")
+        agent = self.agents.get(node.get("agentId")) if node.get("agentId") else None
+        if not agent:
+            raise ValueError(f"Agent '{node.get('agentId')}' not encontrado para o node '{node_id}'.")
+        # Upstream nodes always finish before their dependents are scheduled.
+        previous_outputs, omitted = _select_context(
+            self.graph, node_id, self.outputs, self.context_depth, self.context_max_bytes
+        )
+        return [
+            SystemMessage(
+                content=agent.role
+                or f"Você é o agente '{agent.name}' responsável por processar parte do fluxo."
+            ),
+            HumanMessage(
+                content=_build_prompt(agent.prompt, self.safe_inputs, previous_outputs, omitted),
+            ),
+        ]
+
+    def record(self, node_id: str, output: "_NodeOutput") -> None:
+        output_text, cache_status, usage = output
+        self.complete(node_id, OrchestrationArtifact(status="ok", output=output_text, usage=usage))
+        self.outputs[node_id] = output_text
+        self.log(
+            "LangChain engine: node executado",
+            node=node_id,
+            payload={
+                "output_preview": output_text[:128],
+                "cache": cache_status,
+                "usage": usage.model_dump() if usage else None,
+            },
+        )
+
+    def finish(self) -> Iterator[OrchestrationEvent]:
+        self.log("LangChain engine: concluída")
+        return super().finish()
+
+
+# (response text, cache status, usage) produced by each node call.
+_NodeOutput = Tuple[str, str, Optional[OrchestrationUsage]]
+
+
+def _response_text(response: Any) -> str:
+    return getattr(response, "content", None) or str(response)
+
+
+def _response_usage(response: Any) -> Any:
+    """Token counts from a LangChain message: ``usage_metadata`` or the provider's ``token_usage``."""
+    usage = getattr(response, "usage_metadata", None)
+    if usage:
+        return usage
+    metadata = getattr(response, "response_metadata", None) or {}
+    return metadata.get("token_usage") or metadata.get("usage")
 
 
 class LangChainEngine(OrchestratorEngine):
     """Engine that executes flows using LangChain chat models."""
 
+    name = "langchain"
+
     def __init__(self) -> None:
-        self._llm = create_langchain_chat_model(langchain_settings())
-
-    def run(self, flow: Dict[str, Any], inputs: Dict[str, Any]) -> OrchestrationResult:
-        start = time.perf_counter()
-        nodes = flow.get("nodes", []) or []
-        logs: List[str] = []
-
-        def log(msg: str, node: str | None = None, payload: Dict[str, Any] | None = None) -> None:
-            entry: Dict[str, Any] = {
-                "ts": datetime.datetime.now(datetime.UTC).isoformat(),
-                "level": "info",
-                "engine": "langchain",
-                "msg": msg,
-            }
-            if node:
-                entry["node"] = node
-            if payload:
-                entry.update(payload)
-            logs.append(json.dumps(entry, ensure_ascii=False))
-
-        log("LangChain engine: execução iniciada")
-
-        executed: List[str] = []
-        artifacts: Dict[str, OrchestrationArtifact] = {}
-        previous_outputs: Dict[str, str] = {}
-
-        safe_inputs = inputs or {}
-
-        for node in nodes:
-            node_id = node.get("id")
-            executed.append(node_id)
-            agent_id = node.get("agentId")
-            agent = agents_service.get_agent(agent_id) if agent_id else None
-
-            if not agent:
-                raise ValueError(f"Agent '{agent_id}' not encontrado para o node '{node_id}'.")
-
-            messages = [
-                SystemMessage(
-                    content=agent.role
-                    or f"Você é o agente '{agent.name}' responsável por processar parte do fluxo."
-                ),
-                HumanMessage(
-                    content=_build_prompt(agent.prompt, safe_inputs, previous_outputs),
-                ),
-            ]
+        self._settings = langchain_settings()
+        self._llm = get_langchain_chat_model(self._settings)
+        self._limiter = get_limiter(endpoint_key(self._settings))
+
+    def _usage(self, response: Any, start: float) -> OrchestrationUsage:
+        """Usage of one provider call (cache hits make no call and report no usage)."""
+        model = self._settings.get("model") or self._settings.get("provider") or "stub"
+        latency_ms = int((time.perf_counter() - start) * 1000)
+        return OrchestrationUsage.from_provider(_response_usage(response), latency_ms, model)
+
+    def _cache_key(self, messages: List[Any]) -> Optional[str]:
+        """Fingerprint for ``messages``, or None when the cache must be bypassed."""
+        temperature = float(self._settings.get("temperature") or 0.0)
+        if not should_cache(temperature):
+            return None
+        provider = (self._settings.get("provider") or "stub").lower()
+        return fingerprint(provider, self._settings.get("model"), temperature, messages)
+
+    def _prepare(self, state: _LangChainRun, node: Dict[str, Any]) -> Tuple[List[Any], Optional[str], Optional[str]]:
+        """``(messages, cache key, cached text)`` for ``node``; a cached text means no provider call is needed."""
+        messages = state.build_messages(node)
+        key = self._cache_key(messages)
+        cached = get_llm_cache().get(key) if key is not None else None
+        return messages, key, cached
+
+    async def _aprepare(
+        self, state: _LangChainRun, node: Dict[str, Any]
+    ) -> Tuple[List[Any], Optional[str], Optional[str]]:
+        """Async counterpart of :meth:`_prepare`; a disk cache lookup stays off the event loop."""
+        messages = state.build_messages(node)
+        key = self._cache_key(messages)
+        cached = await get_llm_cache().aget(key) if key is not None else None
+        return messages, key, cached
+
+    def _output(self, response: Any, key: Optional[str], start: float) -> _NodeOutput:
+        text = _response_text(response)
+        usage = self._usage(response, start)
+        if key is None:
+            return text, "bypass", usage
+        get_llm_cache().set(key, text)
+        return text, "miss", usage
+
+    async def _aoutput(self, response: Any, key: Optional[str], start: float) -> _NodeOutput:
+        """Async counterpart of :meth:`_output`."""
+        text = _response_text(response)
+        usage = self._usage(response, start)
+        if key is None:
+            return text, "bypass", usage
+        await get_llm_cache().aset(key, text)
+        return text, "miss", usage
+
+    def _invoke(self, messages: List[Any]) -> Any:
+        """Call the model through the endpoint's shared limiter, retrying calls the provider throttles."""
+        retries = provider_throttle_retries()
+        for attempt in range(retries + 1):
+            with self._limiter.slot() as call:
+                try:
+                    return self._llm.invoke(messages)
+                except Exception as exc:
+                    retry_after = record_outcome(call, exc)
+                    delay = backoff_delay(attempt, _THROTTLE_BACKOFF_SEC, retry_after)
+                    if call.outcome != "throttled" or attempt == retries or delay is None:
+                        raise
+            LLM_CALL_RETRIES.labels("langchain").inc()
+            time.sleep(delay)
+        raise AssertionError("unreachable")
 
+    async def _ainvoke(self, messages: List[Any]) -> Any:
+        """Async counterpart of :meth:`_invoke`."""
+        retries = provider_throttle_retries()
+        for attempt in range(retries + 1):
+            async with self._limiter.aslot() as call:
+                try:
+                    if hasattr(self._llm, "ainvoke"):
+                        return await self._llm.ainvoke(messages)
+                    return await asyncio.to_thread(self._llm.invoke, messages)
+                except Exception as exc:
+                    retry_after = record_outcome(call, exc)
+                    delay = backoff_delay(attempt, _THROTTLE_BACKOFF_SEC, retry_after)
+                    if call.outcome != "throttled" or attempt == retries or delay is None:
+                        raise
+            LLM_CALL_RETRIES.labels("langchain").inc()
+            await asyncio.sleep(delay)
+        raise AssertionError("unreachable")
+
+    async def _abatch(self, batch: List[List[Any]], concurrency: int) -> List[Any]:
+        """One response (or exception) per message list, via the model's ``abatch`` or bounded ``ainvoke`` calls.
+
+        A native batch takes its tokens up front, runs within the current
+        concurrency window and reports each outcome back to the limiter.
+        """
+        if hasattr(self._llm, "abatch"):
+            await self._limiter.areserve(len(batch))
+            config = {"max_concurrency": min(concurrency, self._limiter.concurrency())}
+            try:
+                responses = await self._llm.abatch(batch, config=config, return_exceptions=True)
+            except CircuitOpenError as exc:
+                return [exc] * len(batch)
+            for response in responses:
+                failed = isinstance(response, BaseException)
+                throttled, retry_after = throttle_info(response) if failed else (False, None)
+                if throttled:
+                    self._limiter.record("throttled", retry_after)
+                elif not isinstance(response, BaseException):
+                    self._limiter.record("ok")
+            return responses
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def call(messages: List[Any]) -> Any:
+            async with semaphore:
+                return await self._ainvoke(messages)
+
+        return await asyncio.gather(*(call(messages) for messages in batch), return_exceptions=True)
+
+    def stream(self, flow: Dict[str, Any], inputs: Dict[str, Any]) -> Iterator[OrchestrationEvent]:
+        state = _LangChainRun(flow, inputs)
+        state.agents = agents_service.get_agents_by_ids(state.agent_ids())
+        yield from state.drain()
+
+        def execute(node: Dict[str, Any]) -> _NodeOutput:
+            start = time.perf_counter()
+            messages, key, cached = self._prepare(state, node)
+            if cached is not None:
+                return cached, "hit", None
+            call_start = time.perf_counter()
+            try:
+                response = self._invoke(messages)
+            except CircuitOpenError:
+                LLM_CALL_SECONDS.labels("langchain", "error").observe(time.perf_counter() - call_start)
+                raise
+            except Exception as exc:  # pragma: no cover - redepend on provider errors
+                LLM_CALL_SECONDS.labels("langchain", "error").observe(time.perf_counter() - call_start)
+                raise _node_error(node, exc) from exc
+            LLM_CALL_SECONDS.labels("langchain", "ok").observe(time.perf_counter() - call_start)
+            return self._output(response, key, start)
+
+        for node_id, output in iter_dag(state.graph, state.timed(execute), orchestration_max_concurrency()):
+            state.record(node_id, output)
+            yield from state.drain()
+        yield from state.finish()
+
+    async def astream(self, flow: Dict[str, Any], inputs: Dict[str, Any]) -> AsyncIterator[OrchestrationEvent]:
+        state = _LangChainRun(flow, inputs)
+        state.agents = await asyncio.to_thread(agents_service.get_agents_by_ids, state.agent_ids())
+        for event in state.drain():
+            yield event
+
+        async def execute(node: Dict[str, Any]) -> _NodeOutput:
+            start = time.perf_counter()
+            messages, key, cached = await self._aprepare(state, node)
+            if cached is not None:
+                return cached, "hit", None
+            call_start = time.perf_counter()
             try:
-                response = self._llm.invoke(messages)
+                response = await self._ainvoke(messages)
+            except CircuitOpenError:
+                LLM_CALL_SECONDS.labels("langchain", "error").observe(time.perf_counter() - call_start)
+                raise
             except Exception as exc:  # pragma: no cover - redepend on provider errors
-                raise ValueError(f"Erro ao processar node '{node_id}' com LangChain: {exc}") from exc
+                LLM_CALL_SECONDS.labels("langchain", "error").observe(time.perf_counter() - call_start)
+                raise _node_error(node, exc) from exc
+            LLM_CALL_SECONDS.labels("langchain", "ok").observe(time.perf_counter() - call_start)
+            return await self._aoutput(response, key, start)
 
-            output_text = getattr(response, "content", None) or str(response)
-            artifacts[node_id] = OrchestrationArtifact(status="ok", output=output_text)
-            previous_outputs[node_id] = output_text
-            log(
-                "LangChain engine: node executado",
-                node=node_id,
-                payload={"output_preview": output_text[:128]},
-            )
+        async for node_id, output in aiter_dag(state.graph, state.atimed(execute), orchestration_max_concurrency()):
+            state.record(node_id, output)
+            for event in state.drain():
+                yield event
+        for event in state.finish():
+            yield event
 
-        log("LangChain engine: concluída")
+    async def arun_many(
+        self, flow: Dict[str, Any], inputs_list: List[Dict[str, Any]], concurrency: int
+    ) -> AsyncIterator[BatchRow]:
+        """Run rows ``concurrency`` at a time in lockstep: every graph level of a chunk is one ``abatch`` call.
 
-        plan = OrchestrationPlan(executed_nodes=executed, artifacts=artifacts, routing="sequential")
-        duration_ms = int((time.perf_counter() - start) * 1000)
-        return OrchestrationResult(engine="langchain", flow_id="unknown", plan=plan, logs=logs, duration_ms=duration_ms)
+        Agents are loaded once for the whole batch; each chunk's rows are
+        yielded when the chunk finishes.
+        """
+        concurrency = max(1, concurrency)
+        levels = build_graph(flow).levels()
+        agents: Optional[Dict[str, Any]] = None
+        for offset in range(0, len(inputs_list), concurrency):
+            chunk_start = time.perf_counter()
+            states: Dict[int, _LangChainRun] = {}
+            failed: Dict[int, Exception] = {}
+            for index, inputs in enumerate(inputs_list[offset : offset + concurrency], start=offset):
+                state = _LangChainRun(flow, inputs)
+                if agents is None:
+                    agents = await asyncio.to_thread(agents_service.get_agents_by_ids, state.agent_ids())
+                state.agents = agents
+                states[index] = state
 
+            for level in levels:
+                # (row, node, messages, cache key) still needing a provider call.
+                calls: List[Tuple[int, Dict[str, Any], List[Any], Optional[str]]] = []
+                for index, state in states.items():
+                    if index in failed:
+                        continue
+                    for node_id in level:
+                        node = state.graph.nodes[node_id]
+                        try:
+                            messages, key, cached = await self._aprepare(state, node)
+                        except ValueError as exc:
+                            failed[index] = exc
+                            break
+                        if cached is not None:
+                            state.record(node_id, (cached, "hit", None))
+                        else:
+                            calls.append((index, node, messages, key))
+                if not calls:
+                    continue
+                start = time.perf_counter()
+                responses = await self._abatch([messages for _, _, messages, _ in calls], concurrency)
+                elapsed = time.perf_counter() - start
+                for (index, node, _, key), response in zip(calls, responses):
+                    outcome = "error" if isinstance(response, BaseException) else "ok"
+                    LLM_CALL_SECONDS.labels("langchain", outcome).observe(elapsed)
+                    if index in failed:
+                        continue
+                    if isinstance(response, CircuitOpenError):
+                        failed[index] = response
+                    elif outcome == "error":
+                        failed[index] = _node_error(node, response)
+                    else:
+                        states[index].record(str(node["id"]), await self._aoutput(response, key, start))
 
-def _build_prompt(agent_prompt: str, inputs: Dict[str, Any], previous_outputs: Dict[str, str]) -> str:
-    """Combine stored agent prompt with runtime inputs and previous outputs."""
+            seconds = time.perf_counter() - chunk_start
+            for index, state in states.items():
+                if index in failed:
+                    yield index, failed[index], seconds
+                else:
+                    yield index, collect_result(state.finish()), seconds
+
+
+def _node_error(node: Dict[str, Any], exc: BaseException) -> ValueError:
+    return ValueError(f"Erro ao processar node '{node.get('id')}' com LangChain: {exc}")
+
+
+def _truncate_utf8(text: str, max_bytes: int) -> str:
+    return text.encode("utf-8")[:max_bytes].decode("utf-8", "ignore")
+
+
+def _select_context(
+    graph: FlowGraph, node_id: str, outputs: Dict[str, str], depth: Optional[int], max_bytes: int
+) -> Tuple[Dict[str, str], List[str]]:
+    """Upstream outputs for ``node_id``'s prompt: ``(outputs in topological order, omitted node ids)``.
+
+    Only nodes reachable through ``graph_json`` edges within ``depth`` hops are
+    considered. Nearer nodes claim the ``max_bytes`` budget first; the output
+    that crosses it is cut and anything further away is left out by id.
+    """
+    distances = graph.ancestor_distances(node_id, depth)
+    if not max_bytes:
+        return {nid: outputs[nid] for nid in sorted(distances, key=graph.rank.__getitem__)}, []
+    # Nearest first; among equally distant nodes, the later one in topological order.
+    nearest = sorted(distances, key=lambda nid: (distances[nid], -graph.rank[nid]))
+    kept: Dict[str, str] = {}
+    omitted: List[str] = []
+    remaining = max_bytes
+    for nid in nearest:
+        text = outputs[nid]
+        size = len(text.encode("utf-8"))
+        if size <= remaining:
+            kept[nid] = text
+            remaining -= size
+        elif remaining > 0:
+            kept[nid] = f"{_truncate_utf8(text, remaining)}\n[... {size - remaining} bytes omitidos]"
+            remaining = 0
+        else:
+            omitted.append(nid)
+    ordered = {nid: kept[nid] for nid in sorted(kept, key=graph.rank.__getitem__)}
+    return ordered, sorted(omitted, key=graph.rank.__getitem__)
+
+
+def _build_prompt(
+    agent_prompt: str,
+    inputs: Dict[str, Any],
+    previous_outputs: Dict[str, str],
+    omitted: Optional[List[str]] = None,
+) -> str:
+    """Combine stored agent prompt with runtime inputs and upstream outputs (one block per node)."""
     safe_prompt = agent_prompt or ""
     sections = [safe_prompt.strip(), ""]
     if inputs:
@@ -101,10 +404,9 @@ def _build_prompt(agent_prompt: str, inputs: Dict[str, Any], previous_outputs: D
             rendered_inputs = str(inputs)
         sections.append(f"Contexto do fluxo:\n{rendered_inputs}")
     if previous_outputs:
-        try:
-            rendered_outputs = json.dumps(previous_outputs, ensure_ascii=False, indent=2)
-        except TypeError:
-            rendered_outputs = str(previous_outputs)
+        rendered_outputs = "\n\n".join(f"[{nid}]\n{text}" for nid, text in previous_outputs.items())
         sections.append(f"Saídas anteriores:\n{rendered_outputs}")
+    if omitted:
+        sections.append(f"Saídas omitidas pelo limite de contexto: {', '.join(omitted)}")
     sections.append("Produza a melhor continuação baseada nas instruções e contexto acima.")
     return "\n\n".join(filter(None, sections))
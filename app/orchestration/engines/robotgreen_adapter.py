@@ -1,34 +1,29 @@
-﻿from typing import Dict, Any
-import time, datetime, json
+from typing import Dict, Any, Iterator
 from ..engine import (
+    EngineRun,
     OrchestratorEngine,
-    OrchestrationResult,
-    OrchestrationPlan,
     OrchestrationArtifact,
+    OrchestrationEvent,
 )
+from ..scheduler import iter_dag
+from ...config import orchestration_max_concurrency
 
 
 class RobotGreenEngine(OrchestratorEngine):
-    def run(self, flow: Dict[str, Any], inputs: Dict[str, Any]) -> OrchestrationResult:
-        start = time.perf_counter()
-        nodes = flow.get("nodes", [])
-        logs: list[str] = []
+    name = "robotgreen"
 
-        def log(msg: str, node: str | None = None):
-            entry = {"ts": datetime.datetime.now(datetime.UTC).isoformat(), "level": "info", "msg": msg}
-            if node:
-                entry["node"] = node
-            logs.append(json.dumps(entry, ensure_ascii=False))
+    def stream(self, flow: Dict[str, Any], inputs: Dict[str, Any]) -> Iterator[OrchestrationEvent]:
+        run = EngineRun(self.name, flow, inputs)
+        run.log("RobotGreen stub: execução iniciada")
+        yield from run.drain()
 
-        log("RobotGreen stub: execução iniciada")
-        executed: list[str] = []
-        artifacts: dict[str, OrchestrationArtifact] = {}
-        for n in nodes:
+        def execute(n: Dict[str, Any]) -> OrchestrationArtifact:
             nid = n.get("id")
-            executed.append(nid)
-            artifacts[nid] = OrchestrationArtifact(status="ok", output=f"rg-output-{nid}")
-            log("RobotGreen stub: node executado", node=nid)
-        log("RobotGreen stub: concluída")
-        plan = OrchestrationPlan(executed_nodes=executed, artifacts=artifacts, routing="sequential")
-        duration_ms = int((time.perf_counter() - start) * 1000)
-        return OrchestrationResult(engine="robotgreen", flow_id="unknown", plan=plan, logs=logs, duration_ms=duration_ms)
+            return OrchestrationArtifact(status="ok", output=f"rg-output-{nid}")
+
+        for nid, artifact in iter_dag(run.graph, run.timed(execute), orchestration_max_concurrency()):
+            run.complete(nid, artifact)
+            run.log("RobotGreen stub: node executado", node=nid)
+            yield from run.drain()
+        run.log("RobotGreen stub: concluída")
+        yield from run.finish()
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Dict, Optional
+
+from ..config import orchestration_job_executor, orchestration_job_shutdown_grace_sec, orchestration_job_workers
+from ..integrations.circuit_breaker import CircuitOpenError
+from ..services import flows_service, jobs_service
+from .runner import (
+    EngineUnavailableError,
+    build_engine,
+    engine_inputs,
+    finalize_result,
+    persist_run,
+    resolve_engine_key,
+    track_run,
+)
+
+logger = logging.getLogger(__name__)
+
+_executor: Optional[Executor] = None
+_executor_lock = threading.Lock()
+# Jobs submitted by this process and not finished yet, so shutdown can account for them.
+_inflight: Dict[Future, str] = {}
+
+INTERRUPTED_ERROR = "Interrupted: the server stopped while the job was running"
+
+
+def execute_job(job_id: str) -> None:
+    """Run a queued job to completion and persist its outcome.
+
+    Module-level so it can be pickled for the process executor; every worker
+    reloads the job from SQLite, which makes a duplicate submission harmless.
+    """
+    spec = jobs_service.claim_job(job_id)
+    if spec is None:
+        return
+    try:
+        flow = flows_service.get_flow(spec["flow_id"])
+        if not flow:
+            raise LookupError("Flow not found")
+        runner = build_engine(resolve_engine_key(spec["engine"]))
+        with track_run(runner.name):
+            result = runner.run(flow.graph_json, engine_inputs(flow, spec["inputs"], job_id))
+        result = finalize_result(result, flow, job_id)
+        jobs_service.complete_job(job_id, result)
+        persist_run(flow, result)
+    except ValueError as exc:
+        jobs_service.fail_job(job_id, f"Engine error: {exc}")
+    except (NotImplementedError, EngineUnavailableError, LookupError, CircuitOpenError) as exc:
+        jobs_service.fail_job(job_id, str(exc))
+    except Exception as exc:  # pragma: no cover - unexpected engine failures
+        logger.exception("Orchestration job failed", extra={"job_id": job_id})
+        jobs_service.fail_job(job_id, f"Unexpected error: {exc}")
+
+
+def _get_executor() -> Executor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            workers = orchestration_job_workers()
+            if orchestration_job_executor() == "process":
+                # spawn: forked children must not inherit the parent's pooled SQLite connections.
+                _executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            else:
+                _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="orchestration-job")
+        return _executor
+
+
+def submit(job_id: str) -> None:
+    future = _get_executor().submit(execute_job, job_id)
+    with _executor_lock:
+        _inflight[future] = job_id
+    future.add_done_callback(_forget)
+
+
+def _forget(future: Future) -> None:
+    with _executor_lock:
+        _inflight.pop(future, None)
+
+
+def recover_interrupted_jobs() -> int:
+    """Fail jobs a previous process left running (it crashed or was killed mid-run).
+
+    Call once at startup, before :func:`resume_queued_jobs`. Assumes one app
+    process owns the jobs table; nothing else can be running them yet.
+    """
+    return jobs_service.fail_running_jobs(INTERRUPTED_ERROR)
+
+
+def resume_queued_jobs() -> int:
+    """Resubmit jobs left queued by a previous process; claiming keeps this safe across workers."""
+    job_ids = jobs_service.list_queued_job_ids()
+    for job_id in job_ids:
+        submit(job_id)
+    return len(job_ids)
+
+
+def shutdown(grace_sec: Optional[float] = None) -> int:
+    """Stop the pool: queued jobs stay queued for the next start, running ones get ``grace_sec`` to finish.
+
+    Jobs still running after the grace period (ORCHESTRATION_JOB_SHUTDOWN_GRACE_SEC)
+    are marked failed. Returns how many were.
+    """
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+        inflight = dict(_inflight)
+    if executor is None:
+        return 0
+    # Cancelled futures never started; their jobs are still 'queued' in the database.
+    executor.shutdown(wait=False, cancel_futures=True)
+    grace = orchestration_job_shutdown_grace_sec() if grace_sec is None else grace_sec
+    _, pending = wait([f for f in inflight if not f.cancelled()], timeout=grace)
+    failed = sum(jobs_service.fail_job(inflight[f], INTERRUPTED_ERROR) for f in pending)
+    if failed:
+        logger.warning("Failed orchestration jobs still running at shutdown", extra={"count": failed})
+    return failed
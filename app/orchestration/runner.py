@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import logging
+import os
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple, Union
+
+from ..config import CREWAI_API_KEY, CREWAI_MODE, DEFAULT_ENGINE, run_history_enabled
+from ..metrics import ORCHESTRATION_RUN_SECONDS, ORCHESTRATION_RUNS_IN_FLIGHT
+from ..models import Flow
+from ..services import runs_service, usage_service
+from .engine import LOG_CONTEXT_KEY, LogEmitter, OrchestrationResult, OrchestratorEngine
+from .engines.crewai_adapter import CrewAIEngine
+from .engines.crewai_real import RealCrewAIEngine
+from .engines.fake_adapter import FakeEngine
+from .engines.langchain_engine import LangChainEngine
+from .engines.robotgreen_adapter import RobotGreenEngine
+
+logger = logging.getLogger(__name__)
+
+
+class EngineUnavailableError(RuntimeError):
+    """Raised when an engine exists but cannot run in the current configuration."""
+
+
+def resolve_engine_key(engine: str | None) -> str:
+    return (engine or DEFAULT_ENGINE).lower()
+
+
+def build_engine(engine_key: str) -> OrchestratorEngine:
+    """Instantiate the engine for ``engine_key``; raises ValueError for unknown keys."""
+    if engine_key in ("langchain", "langgraph", "lc"):
+        try:
+            return LangChainEngine()
+        except RuntimeError as exc:
+            raise EngineUnavailableError(str(exc)) from exc
+    if engine_key == "crewai":
+        crewai_mode = os.getenv("CREWAI_MODE", CREWAI_MODE).lower()
+        crewai_api_key = os.getenv("CREWAI_API_KEY", CREWAI_API_KEY)
+        if crewai_mode == "real":
+            if not crewai_api_key:
+                raise EngineUnavailableError("CrewAI real adapter disabled or CREWAI_API_KEY not set")
+            return RealCrewAIEngine()
+        return CrewAIEngine()
+    if engine_key == "robotgreen":
+        return RobotGreenEngine()
+    if engine_key == "fake":
+        return FakeEngine()
+    raise ValueError("Unsupported engine")
+
+
+def engine_inputs(flow: Flow, inputs: Dict[str, Any] | None, request_id: Optional[str] = None) -> Dict[str, Any]:
+    """Engine inputs plus flow metadata and the log context every engine log line is bound to."""
+    merged = dict(inputs or {})
+    merged.setdefault("_flow_meta", {"id": flow.id, "name": flow.name, "description": flow.description})
+    merged[LOG_CONTEXT_KEY] = {"request_id": request_id, "flow_id": flow.id}
+    return merged
+
+
+async def run_batch(
+    runner: OrchestratorEngine, flow: Flow, rows: List[Dict[str, Any]], concurrency: int
+) -> AsyncIterator[Tuple[int, str, Union[OrchestrationResult, Exception]]]:
+    """Run ``flow`` once per row and yield ``(index, request_id, finalized result or exception)`` as rows finish.
+
+    Every row gets its own request_id and lands in the run metrics like a
+    single /orchestrate/run.
+    """
+    request_ids = [str(uuid.uuid4()) for _ in rows]
+    inputs_list = [engine_inputs(flow, row, request_id) for row, request_id in zip(rows, request_ids)]
+    async for index, outcome, seconds in runner.arun_many(flow.graph_json, inputs_list, concurrency):
+        failed = isinstance(outcome, Exception)
+        ORCHESTRATION_RUN_SECONDS.labels(runner.name, "error" if failed else "ok").observe(seconds)
+        if not failed:
+            outcome = finalize_result(outcome, flow, request_ids[index])
+        yield index, request_ids[index], outcome
+
+
+@contextmanager
+def track_run(engine: str) -> Iterator[None]:
+    """Count the block as an in-flight run of ``engine`` and record its latency and outcome."""
+    start = time.perf_counter()
+    outcome = "error"
+    with ORCHESTRATION_RUNS_IN_FLIGHT.labels(engine).track():
+        try:
+            yield
+            outcome = "ok"
+        finally:
+            ORCHESTRATION_RUN_SECONDS.labels(engine, outcome).observe(time.perf_counter() - start)
+
+
+def finalize_result(result: OrchestrationResult, flow: Flow, request_id: str) -> OrchestrationResult:
+    """Stamp flow/request ids on the result and append the summary event.
+
+    Engine log lines already carry request_id/engine/flow_id (bound through
+    ``engine_inputs``), so they are passed through untouched.
+    """
+    result.flow_id = flow.id  # type: ignore
+    result.request_id = request_id  # type: ignore
+    summary = LogEmitter(request_id=request_id, engine=result.engine, flow_id=flow.id).emit(
+        "orchestration_summary",
+        payload={
+            "duration_ms": result.duration_ms,
+            "executed_nodes": len(result.plan.executed_nodes),  # type: ignore
+            "artifacts": len(result.plan.artifacts),  # type: ignore
+        },
+    )
+    result.logs = [*(result.logs or []), summary.line]  # type: ignore
+    return result
+
+
+def record_usage(flow: Flow, result: OrchestrationResult) -> None:
+    """Persist the run's token usage rollup; a failure is logged instead of failing a finished run."""
+    if result.usage is None:
+        return
+    try:
+        usage_service.record_run_usage(flow, result)
+    except Exception:
+        logger.exception("Failed to record orchestration usage", extra={"flow_id": flow.id})
+
+
+def persist_run(flow: Flow, result: OrchestrationResult) -> None:
+    """Write everything a finished run leaves behind: the usage rollup and, if enabled, its run history.
+
+    Meant to run after the response has been sent; each write logs its own
+    failure so one cannot prevent the other.
+    """
+    record_usage(flow, result)
+    if not run_history_enabled():
+        return
+    try:
+        runs_service.save_run(result)
+    except Exception:
+        logger.exception("Failed to store orchestration run", extra={"flow_id": flow.id, "run_id": result.request_id})
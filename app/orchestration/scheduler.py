@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import heapq
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+@dataclass
+class FlowGraph:
+    """Validated view of ``graph_json`` with adjacency and a deterministic topological order."""
+
+    nodes: Dict[str, Dict[str, Any]]
+    index: Dict[str, int]
+    predecessors: Dict[str, List[str]]
+    successors: Dict[str, List[str]]
+    order: List[str]
+    # Position of each node in ``order``.
+    rank: Dict[str, int]
+
+    def levels(self) -> List[List[str]]:
+        """Group nodes into waves: each node sits one level after its deepest predecessor."""
+        depth: Dict[str, int] = {}
+        waves: List[List[str]] = []
+        for nid in self.order:
+            level = 1 + max((depth[p] for p in self.predecessors[nid]), default=-1)
+            depth[nid] = level
+            if level == len(waves):
+                waves.append([])
+            waves[level].append(nid)
+        return waves
+
+    def ancestor_distances(self, node_id: str, depth: Optional[int] = None) -> Dict[str, int]:
+        """Map each predecessor of ``node_id`` to its shortest edge distance (1 = direct).
+
+        ``depth`` stops the walk after that many hops; None follows every path.
+        """
+        distances: Dict[str, int] = {}
+        frontier = list(self.predecessors.get(node_id, []))
+        hops = 1
+        while frontier and (depth is None or hops <= depth):
+            next_frontier = []
+            for current in frontier:
+                if current in distances:
+                    continue
+                distances[current] = hops
+                next_frontier.extend(self.predecessors.get(current, []))
+            frontier = next_frontier
+            hops += 1
+        return distances
+
+    def ancestors(self, node_id: str, depth: Optional[int] = None) -> List[str]:
+        """Return the predecessors of ``node_id`` within ``depth`` hops (all when None) in topological order."""
+        return sorted(self.ancestor_distances(node_id, depth), key=self.rank.__getitem__)
+
+
+def _edge_endpoints(edge: Any) -> Tuple[Any, Any]:
+    if not isinstance(edge, dict):
+        raise ValueError("invalid_flow: edges must be objects")
+    return edge.get("from", edge.get("source")), edge.get("to", edge.get("target"))
+
+
+def build_graph(flow: Dict[str, Any]) -> FlowGraph:
+    """Build a :class:`FlowGraph` from ``graph_json``.
+
+    Edges use ``{"from": ..., "to": ...}``; edges pointing at unknown nodes are
+    ignored. Ties in the topological order are broken by declaration order. A
+    flow without edges (what the UI saves) is chained in declaration order, so
+    its nodes run one after another and each sees the previous node's output.
+    """
+    raw_nodes = flow.get("nodes", []) or []
+    if not isinstance(raw_nodes, list):
+        raise ValueError("invalid_flow: nodes must be a list")
+    raw_edges = flow.get("edges", []) or []
+    if not isinstance(raw_edges, list):
+        raise ValueError("invalid_flow: edges must be a list")
+
+    nodes: Dict[str, Dict[str, Any]] = {}
+    for node in raw_nodes:
+        if not isinstance(node, dict) or not node.get("id"):
+            raise ValueError("invalid_flow: every node needs an id")
+        node_id = str(node["id"])
+        if node_id in nodes:
+            raise ValueError(f"invalid_flow: duplicate node id '{node_id}'")
+        nodes[node_id] = node
+    index = {nid: pos for pos, nid in enumerate(nodes)}
+    if not raw_edges:
+        ids = list(nodes)
+        raw_edges = [{"from": src, "to": dst} for src, dst in zip(ids, ids[1:])]
+
+    predecessors: Dict[str, List[str]] = {nid: [] for nid in nodes}
+    successors: Dict[str, List[str]] = {nid: [] for nid in nodes}
+    for edge in raw_edges:
+        src, dst = _edge_endpoints(edge)
+        src, dst = str(src), str(dst)
+        if src not in nodes or dst not in nodes:
+            continue
+        if src == dst:
+            raise ValueError(f"invalid_flow: node '{src}' depends on itself")
+        if src in predecessors[dst]:
+            continue
+        predecessors[dst].append(src)
+        successors[src].append(dst)
+
+    indegree = {nid: len(preds) for nid, preds in predecessors.items()}
+    ready = [index[nid] for nid, deg in indegree.items() if deg == 0]
+    heapq.heapify(ready)
+    ids = list(nodes)
+    order: List[str] = []
+    while ready:
+        nid = ids[heapq.heappop(ready)]
+        order.append(nid)
+        for succ in successors[nid]:
+            indegree[succ] -= 1
+            if indegree[succ] == 0:
+                heapq.heappush(ready, index[succ])
+    if len(order) != len(nodes):
+        cyclic = [nid for nid in ids if indegree[nid] > 0]
+        raise ValueError(f"invalid_flow: cycle detected between nodes {cyclic}")
+
+    rank = {nid: pos for pos, nid in enumerate(order)}
+    return FlowGraph(
+        nodes=nodes, index=index, predecessors=predecessors, successors=successors, order=order, rank=rank
+    )
+
+
+def iter_dag(
+    graph: FlowGraph,
+    execute: Callable[[Dict[str, Any]], T],
+    max_concurrency: int = 1,
+) -> Iterator[Tuple[str, T]]:
+    """Run ``execute(node)`` for every node, respecting edges, and yield ``(node_id, result)``.
+
+    Nodes whose predecessors have all finished run concurrently on a thread pool
+    capped at ``max_concurrency``. Results are yielded as nodes finish; a node's
+    successors are only scheduled after the caller has consumed its result, so
+    state recorded by the caller is visible to downstream nodes. The first error
+    cancels queued work and is re-raised.
+    """
+    if max_concurrency <= 1 or len(graph.order) <= 1:
+        for nid in graph.order:
+            yield nid, execute(graph.nodes[nid])
+        return
+
+    indegree = {nid: len(preds) for nid, preds in graph.predecessors.items()}
+    ids = list(graph.nodes)
+    ready = [graph.index[nid] for nid in graph.order if indegree[nid] == 0]
+    heapq.heapify(ready)
+    running: Dict[Future, str] = {}
+    pool = ThreadPoolExecutor(max_workers=min(max_concurrency, len(ids)), thread_name_prefix="flow-node")
+    try:
+        while ready or running:
+            while ready and len(running) < max_concurrency:
+                nid = ids[heapq.heappop(ready)]
+                # Each task runs in a copy of the caller's context so request-scoped vars propagate.
+                ctx = contextvars.copy_context()
+                running[pool.submit(ctx.run, execute, graph.nodes[nid])] = nid
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in sorted(done, key=lambda f: graph.index[running[f]]):
+                nid = running.pop(fut)
+                result = fut.result()
+                yield nid, result
+                for succ in graph.successors[nid]:
+                    indegree[succ] -= 1
+                    if indegree[succ] == 0:
+                        heapq.heappush(ready, graph.index[succ])
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+async def aiter_dag(
+    graph: FlowGraph,
+    execute: Callable[[Dict[str, Any]], Awaitable[T]],
+    max_concurrency: int = 1,
+) -> AsyncIterator[Tuple[str, T]]:
+    """Async counterpart of :func:`iter_dag` running ``await execute(node)`` as event-loop tasks."""
+    if max_concurrency <= 1 or len(graph.order) <= 1:
+        for nid in graph.order:
+            yield nid, await execute(graph.nodes[nid])
+        return
+
+    indegree = {nid: len(preds) for nid, preds in graph.predecessors.items()}
+    ids = list(graph.nodes)
+    ready = [graph.index[nid] for nid in graph.order if indegree[nid] == 0]
+    heapq.heapify(ready)
+    running: Dict[asyncio.Task, str] = {}
+    try:
+        while ready or running:
+            while ready and len(running) < max_concurrency:
+                nid = ids[heapq.heappop(ready)]
+                running[asyncio.ensure_future(execute(graph.nodes[nid]))] = nid
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in sorted(done, key=lambda t: graph.index[running[t]]):
+                nid = running.pop(task)
+                result = task.result()
+                yield nid, result
+                for succ in graph.successors[nid]:
+                    indegree[succ] -= 1
+                    if indegree[succ] == 0:
+                        heapq.heappush(ready, graph.index[succ])
+    finally:
+        for task in running:
+            task.cancel()
+        if running:
+            await asyncio.gather(*running, return_exceptions=True)
@@ -1,7 +1,9 @@
-from fastapi import APIRouter, HTTPException
-from typing import List
-from ..models import Agent, AgentCreate
+from fastapi import APIRouter, HTTPException, Query, Response
+from fastapi.responses import JSONResponse
+from typing import List, Optional
+from ..models import Agent, AgentCreate, EvaluationStats, Flow
 from ..services import agents_service as svc
+from ..services import evals_service, flows_service
 
 router = APIRouter(prefix="/agents", tags=["agents"])
 
@@ -10,8 +12,31 @@ def create_agent(agent: AgentCreate):
     return svc.create_agent(agent)
 
 @router.get("", response_model=List[Agent])
-def list_agents():
-    return svc.list_agents()
+def list_agents(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    name_prefix: Optional[str] = None,
+    fields: Optional[str] = None,
+    view: Optional[str] = None,
+):
+    """Newest first. Without ``limit``/``cursor`` every row is returned (what the UI expects); with either,
+    pages hold ``limit`` rows (default 100) and ``X-Next-Cursor`` carries the cursor for the next page.
+
+    ``fields=a,b`` or ``view=summary`` return only those columns (plus id and created_at).
+    """
+    try:
+        agents, next_cursor = svc.list_agents_page(
+            limit, cursor=cursor, name_prefix=name_prefix, fields=fields, view=view
+        )
+    except ValueError as exc:
+        raise HTTPException(400, str(exc))
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+    if fields or view == "summary":
+        # Sparse rows are plain dicts; returning a Response skips response_model validation.
+        return JSONResponse(agents, headers=headers)
+    response.headers.update(headers)
+    return agents
 
 @router.get("/{agent_id}", response_model=Agent)
 def get_agent(agent_id: str):
@@ -20,6 +45,20 @@ def get_agent(agent_id: str):
         raise HTTPException(404, "Agent not found")
     return a
 
+@router.get("/{agent_id}/flows", response_model=List[Flow])
+def list_agent_flows(agent_id: str):
+    """Flows with at least one node that references this agent."""
+    if not svc.get_agent(agent_id):
+        raise HTTPException(404, "Agent not found")
+    return flows_service.list_flows_for_agent(agent_id)
+
+@router.get("/{agent_id}/stats", response_model=EvaluationStats)
+def get_agent_stats(agent_id: str):
+    """Evaluation rollup for this agent (``count=0`` when it has not been evaluated yet)."""
+    if not svc.get_agent(agent_id):
+        raise HTTPException(404, "Agent not found")
+    return evals_service.get_evaluation_stats(agent_id)
+
 @router.put("/{agent_id}", response_model=Agent)
 def update_agent(agent_id: str, data: dict):
     a = svc.update_agent(agent_id, data)
@@ -1,4 +1,5 @@
 from fastapi import APIRouter, HTTPException, Body, UploadFile, File, Form, status, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import PlainTextResponse, JSONResponse
 from typing import Any, List
 import yaml
@@ -11,12 +12,19 @@ from .io_support import (
     normalize_single,
     validation_errors_to_messages,
     build_error_detail,
+    streaming_export,
+    STREAM_EXPORT_FORMATS,
+    validated_upload_batches,
 )
+from ..config import import_batch_size, import_response_max_items
 
 router = APIRouter(prefix="/agents", tags=["agents-io"])
 
 @router.get("/export")
 def export_agents(format: str = "json"):
+    fmt = format.lower()
+    if fmt in STREAM_EXPORT_FORMATS:
+        return streaming_export((a.model_dump() for a in svc.iter_agents()), fmt, filename="agents")
     agents = [a.model_dump() for a in svc.list_agents()]
     if format.lower() == "yaml":
         text = yaml.safe_dump(agents, sort_keys=False, allow_unicode=True)
@@ -82,9 +90,22 @@ async def import_agents(
     file: UploadFile | None = File(default=None),
     file_format: str | None = Form(default=None),
 ):
+    if file is not None:
+        # Uploads are validated in a first pass, then re-read and written in batches (bounded memory).
+        batches = await run_in_threadpool(
+            validated_upload_batches,
+            file,
+            file_format or format,
+            AgentCreate,
+            context="agent",
+            label="Agent",
+            size=import_batch_size(),
+        )
+        agents, count = await run_in_threadpool(svc.create_agents_batched, batches, import_response_max_items())
+        return {"created": [agent.model_dump() for agent in agents], "count": count}
     base_payload = await _ensure_payload_from_request(request, payload, file)
     agents = _parse_agents_payload(base_payload, format, file, file_format)
-    created = [svc.create_agent(agent).model_dump() for agent in agents]
+    created = [agent.model_dump() for agent in await run_in_threadpool(svc.create_agents_bulk, agents)]
     return {"created": created, "count": len(created)}
 
 
@@ -1,6 +1,7 @@
-from fastapi import APIRouter
-from typing import List
-from ..models import Evaluation, EvaluationCreate
+from fastapi import APIRouter, HTTPException, Query, Response
+from fastapi.responses import JSONResponse
+from typing import List, Optional
+from ..models import Evaluation, EvaluationCreate, EvaluationStats
 from ..services import evals_service as svc
 
 router = APIRouter(prefix="/evaluations", tags=["evaluations"])
@@ -9,6 +10,39 @@ router = APIRouter(prefix="/evaluations", tags=["evaluations"])
 def create_evaluation(ev: EvaluationCreate):
     return svc.create_evaluation(ev)
 
+@router.get("/stats", response_model=List[EvaluationStats])
+def list_evaluation_stats(agent_id: Optional[List[str]] = Query(None)):
+    """Per-agent count/mean/stddev/min/max/last_at read from the incrementally maintained rollup.
+
+    Repeat ``agent_id`` to restrict the result; agents without evaluations are omitted.
+    """
+    return svc.list_evaluation_stats(agent_id)
+
 @router.get("", response_model=List[Evaluation])
-def list_evaluations():
-    return svc.list_evaluations()
+def list_evaluations(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    agent_id: Optional[str] = None,
+    min_score: Optional[float] = None,
+    max_score: Optional[float] = None,
+    fields: Optional[str] = None,
+    view: Optional[str] = None,
+):
+    """Newest first. Without ``limit``/``cursor`` every row is returned (what the UI expects); with either,
+    pages hold ``limit`` rows (default 100) and ``X-Next-Cursor`` carries the cursor for the next page.
+
+    ``fields=a,b`` or ``view=summary`` return only those columns (plus id and created_at).
+    """
+    try:
+        evaluations, next_cursor = svc.list_evaluations_page(
+            limit, cursor=cursor, agent_id=agent_id, min_score=min_score, max_score=max_score, fields=fields, view=view
+        )
+    except ValueError as exc:
+        raise HTTPException(400, str(exc))
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+    if fields or view == "summary":
+        # Sparse rows are plain dicts; returning a Response skips response_model validation.
+        return JSONResponse(evaluations, headers=headers)
+    response.headers.update(headers)
+    return evaluations
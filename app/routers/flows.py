@@ -1,7 +1,9 @@
-from fastapi import APIRouter, HTTPException
-from typing import List
-from ..models import Flow, FlowCreate
+from fastapi import APIRouter, HTTPException, Query, Response
+from fastapi.responses import JSONResponse
+from typing import List, Optional
+from ..models import Flow, FlowCreate, UsageRecord
 from ..services import flows_service as svc
+from ..services import usage_service
 
 router = APIRouter(prefix="/flows", tags=["flows"])
 
@@ -10,8 +12,31 @@ def create_flow(flow: FlowCreate):
     return svc.create_flow(flow)
 
 @router.get("", response_model=List[Flow])
-def list_flows():
-    return svc.list_flows()
+def list_flows(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    name_prefix: Optional[str] = None,
+    fields: Optional[str] = None,
+    view: Optional[str] = None,
+):
+    """Newest first. Without ``limit``/``cursor`` every row is returned (what the UI expects); with either,
+    pages hold ``limit`` rows (default 100) and ``X-Next-Cursor`` carries the cursor for the next page.
+
+    ``fields=a,b`` or ``view=summary`` return only those columns (plus id and created_at).
+    """
+    try:
+        flows, next_cursor = svc.list_flows_page(
+            limit, cursor=cursor, name_prefix=name_prefix, fields=fields, view=view
+        )
+    except ValueError as exc:
+        raise HTTPException(400, str(exc))
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+    if fields or view == "summary":
+        # Sparse rows are plain dicts; returning a Response skips response_model validation.
+        return JSONResponse(flows, headers=headers)
+    response.headers.update(headers)
+    return flows
 
 @router.get("/{flow_id}", response_model=Flow)
 def get_flow(flow_id: str):
@@ -20,6 +45,18 @@ def get_flow(flow_id: str):
         raise HTTPException(404, "Flow not found")
     return f
 
+@router.get("/{flow_id}/usage", response_model=List[UsageRecord])
+def get_flow_usage(
+    flow_id: str,
+    agent_id: Optional[str] = None,
+    since: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}-\d{2}$"),
+    until: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}-\d{2}$"),
+):
+    """Token usage and provider latency per UTC day, agent and model (``since``/``until`` inclusive, YYYY-MM-DD)."""
+    if not svc.get_flow(flow_id):
+        raise HTTPException(404, "Flow not found")
+    return usage_service.list_usage(flow_id=flow_id, agent_id=agent_id, since=since, until=until)
+
 @router.put("/{flow_id}", response_model=Flow)
 def update_flow(flow_id: str, flow: FlowCreate):
     # We use FlowCreate schema but treat fields as optional in service if needed, 
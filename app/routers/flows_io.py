@@ -1,4 +1,5 @@
 from fastapi import APIRouter, HTTPException, Body, UploadFile, File, Form, status, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import PlainTextResponse, JSONResponse
 from typing import Any, List
 import yaml
@@ -11,12 +12,19 @@ from .io_support import (
     normalize_single,
     validation_errors_to_messages,
     build_error_detail,
+    streaming_export,
+    STREAM_EXPORT_FORMATS,
+    validated_upload_batches,
 )
+from ..config import import_batch_size, import_response_max_items
 
 router = APIRouter(prefix="/flows", tags=["flows-io"])
 
 @router.get("/export")
 def export_flows(format: str = "json"):
+    fmt = format.lower()
+    if fmt in STREAM_EXPORT_FORMATS:
+        return streaming_export((f.model_dump() for f in svc.iter_flows()), fmt, filename="flows")
     flows = [f.model_dump() for f in svc.list_flows()]
     if format.lower() == "yaml":
         text = yaml.safe_dump(flows, sort_keys=False, allow_unicode=True)
@@ -82,9 +90,22 @@ async def import_flows(
     file: UploadFile | None = File(default=None),
     file_format: str | None = Form(default=None),
 ):
+    if file is not None:
+        # Uploads are validated in a first pass, then re-read and written in batches (bounded memory).
+        batches = await run_in_threadpool(
+            validated_upload_batches,
+            file,
+            file_format or format,
+            FlowCreate,
+            context="flow",
+            label="Flow",
+            size=import_batch_size(),
+        )
+        flows, count = await run_in_threadpool(svc.create_flows_batched, batches, import_response_max_items())
+        return {"created": [flow.model_dump() for flow in flows], "count": count}
     base_payload = await _ensure_payload_from_request(request, payload, file)
     flows = _parse_flows_payload(base_payload, format, file, file_format)
-    created = [svc.create_flow(flow).model_dump() for flow in flows]
+    created = [flow.model_dump() for flow in await run_in_threadpool(svc.create_flows_bulk, flows)]
     return {"created": created, "count": len(created)}
 
 
@@ -1,11 +1,16 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, TypeVar
 from fastapi import HTTPException, UploadFile, status
+from fastapi.responses import StreamingResponse
+import codecs
+import itertools
 import json
+import re
 import yaml
+from pydantic import ValidationError
 
-from ..config import import_max_file_bytes, import_max_items
+from ..config import import_max_buffered_bytes, import_max_file_bytes, import_max_items
 
 
 def build_error_detail(message: str, *, errors: List[str] | None = None, **extra: Any) -> Dict[str, Any]:
@@ -14,6 +19,32 @@ def build_error_detail(message: str, *, errors: List[str] | None = None, **extra
     return detail
 
 
+STREAM_EXPORT_FORMATS = {"ndjson", "yaml-stream"}
+
+
+def _ndjson_lines(items: Iterable[Dict[str, Any]]) -> Iterator[bytes]:
+    for item in items:
+        yield (json.dumps(item, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def _yaml_documents(items: Iterable[Dict[str, Any]]) -> Iterator[bytes]:
+    for item in items:
+        yield yaml.safe_dump(item, sort_keys=False, allow_unicode=True, explicit_start=True).encode("utf-8")
+
+
+def streaming_export(items: Iterable[Dict[str, Any]], fmt: str, *, filename: str) -> StreamingResponse:
+    """Stream ``items`` one record per chunk: NDJSON (``ndjson``) or multi-document YAML (``yaml-stream``)."""
+    if fmt == "ndjson":
+        body, media_type, ext = _ndjson_lines(items), "application/x-ndjson", "ndjson"
+    else:
+        body, media_type, ext = _yaml_documents(items), "application/yaml", "yaml"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{ext}"'},
+    )
+
+
 def _load_serialized(text: str, fmt: str) -> Any:
     fmt_lower = (fmt or "json").lower()
     try:
@@ -41,8 +72,8 @@ def read_payload_source(
 ) -> Any:
     """Return the raw Python structure decoded from the request payload."""
     if file is not None:
-        raw = file.file.read()
-        max_bytes = import_max_file_bytes()
+        max_bytes = import_max_buffered_bytes()
+        raw = file.file.read(max_bytes + 1) if max_bytes > 0 else file.file.read()
         if max_bytes > 0 and len(raw) > max_bytes:
             raise HTTPException(
                 status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
@@ -75,6 +106,303 @@ def read_payload_source(
     return payload
 
 
+UPLOAD_CHUNK_BYTES = 64 * 1024
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+_STRUCTURAL = re.compile(r'[\[\]{}"]')
+_STRING_STOP = re.compile(r'["\\]')
+
+T = TypeVar("T")
+
+
+def _iter_upload_text(file: UploadFile, max_bytes: int) -> Iterator[str]:
+    """Decode the spooled upload chunk by chunk, enforcing ``max_bytes`` (0 = no limit) as data is read."""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    total = 0
+    while True:
+        raw = file.file.read(UPLOAD_CHUNK_BYTES)
+        total += len(raw)
+        if max_bytes > 0 and total > max_bytes:
+            raise HTTPException(
+                status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=build_error_detail(
+                    "Uploaded file exceeds the configured limit.",
+                    limit_bytes=max_bytes,
+                ),
+            )
+        try:
+            text = decoder.decode(raw, final=not raw)
+        except UnicodeDecodeError as exc:
+            raise HTTPException(
+                status.HTTP_400_BAD_REQUEST,
+                detail=build_error_detail("Uploaded file must be UTF-8 encoded."),
+            ) from exc
+        if text:
+            yield text
+        if not raw:
+            return
+
+
+class _ValueScanner:
+    """Finds where a JSON object, array or string ends, one chunk at a time, without decoding it."""
+
+    def __init__(self) -> None:
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+
+    def feed(self, text: str, pos: int) -> Optional[int]:
+        """Scan ``text`` from ``pos``; return the index just past the value, or None if it continues."""
+        while True:
+            if self.escaped:
+                if pos >= len(text):
+                    return None
+                pos += 1
+                self.escaped = False
+            if self.in_string:
+                match = _STRING_STOP.search(text, pos)
+                if match is None:
+                    return None
+                pos = match.end()
+                if match.group() == "\\":
+                    self.escaped = True
+                    continue
+                self.in_string = False
+                if self.depth == 0:
+                    return pos
+                continue
+            match = _STRUCTURAL.search(text, pos)
+            if match is None:
+                return None
+            pos = match.end()
+            char = match.group()
+            if char == '"':
+                self.in_string = True
+            elif char in "[{":
+                self.depth += 1
+            else:
+                self.depth -= 1
+                if self.depth <= 0:
+                    return pos
+
+
+class _JsonStream:
+    """Pull parser over text chunks: decodes one JSON value at a time from a sliding buffer."""
+
+    def __init__(self, chunks: Iterator[str]) -> None:
+        self._chunks = chunks
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self) -> bool:
+        if self._eof:
+            return False
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            self._eof = True
+            return False
+        # Drop consumed text so the buffer never holds more than the current item plus a chunk.
+        self._buf = self._buf[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character, or "" at end of input."""
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return ""
+
+    def take(self) -> str:
+        char = self.peek()
+        self._pos += 1
+        return char
+
+    def _read_container(self) -> None:
+        """Buffer chunks until the object/array/string at the cursor is complete (or input ends).
+
+        Only new chunks are scanned and they are joined once, so a large item costs linear time.
+        """
+        scanner = _ValueScanner()
+        if scanner.feed(self._buf, self._pos) is not None:
+            return
+        parts = [self._buf[self._pos:]]
+        while not self._eof:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                self._eof = True
+                break
+            parts.append(chunk)
+            if scanner.feed(chunk, 0) is not None:
+                break
+        self._buf = "".join(parts)
+        self._pos = 0
+
+    def value(self) -> Any:
+        if self.peek() in ("{", "[", '"'):
+            self._read_container()
+            try:
+                obj, self._pos = _decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError as exc:
+                raise HTTPException(
+                    status.HTTP_400_BAD_REQUEST,
+                    detail=build_error_detail("Invalid json payload.", errors=[str(exc)]),
+                ) from exc
+            return obj
+        # Scalars are short: retry with one more chunk until the token is complete.
+        while True:
+            try:
+                obj, end = _decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError as exc:
+                if self._fill():
+                    continue
+                raise HTTPException(
+                    status.HTTP_400_BAD_REQUEST,
+                    detail=build_error_detail("Invalid json payload.", errors=[str(exc)]),
+                ) from exc
+            # A number could continue in the next chunk; make sure the token really ended.
+            if end == len(self._buf) and not isinstance(obj, (dict, list, str)) and self._fill():
+                continue
+            self._pos = end
+            return obj
+
+
+def _iter_json_items(chunks: Iterator[str]) -> Iterator[Any]:
+    """Yield items of a top-level array, of NDJSON / concatenated values, or of a ``{"items": [...]}`` object."""
+    stream = _JsonStream(chunks)
+    first = stream.peek()
+    if first == "":
+        return
+    if first == "[":
+        stream.take()
+        if stream.peek() == "]":
+            stream.take()
+        else:
+            while True:
+                yield stream.value()
+                sep = stream.take()
+                if sep == "]":
+                    break
+                if sep != ",":
+                    raise HTTPException(
+                        status.HTTP_400_BAD_REQUEST,
+                        detail=build_error_detail("Invalid json payload.", errors=["Expected ',' or ']' in array."]),
+                    )
+        if stream.peek() != "":
+            raise HTTPException(
+                status.HTTP_400_BAD_REQUEST,
+                detail=build_error_detail("Invalid json payload.", errors=["Extra data after top-level array."]),
+            )
+        return
+    head = stream.value()
+    if stream.peek() == "":
+        # A single document keeps the non-streaming semantics (bare object or {"items": [...]}).
+        if isinstance(head, dict) and isinstance(head.get("items"), list):
+            yield from head["items"]
+        else:
+            yield head
+        return
+    yield head
+    while stream.peek() != "":
+        yield stream.value()
+
+
+def iter_upload_items(
+    file: UploadFile, fmt: str, *, context: str, buffered: bool = False
+) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Yield ``(index, item)`` from an uploaded file without materialising the whole document.
+
+    JSON uploads (top-level array, NDJSON or ``{"items": [...]}``) are parsed
+    incrementally and capped by IMPORT_MAX_FILE_MB. YAML is still decoded as one
+    document, so it is also held to IMPORT_MAX_BUFFERED_MB; pass ``buffered=True``
+    when the caller keeps every item in memory too.
+    """
+    fmt_lower = (fmt or "json").lower()
+    streamed_limit = import_max_buffered_bytes() if buffered else import_max_file_bytes()
+    if fmt_lower in {"yaml", "yml"}:
+        text = "".join(_iter_upload_text(file, import_max_buffered_bytes()))
+        items: Iterable[Any] = normalize_items(_load_serialized(text, "yaml"), context=context)
+    elif fmt_lower in {"json", "ndjson", "jsonl"}:
+        items = _iter_json_items(_iter_upload_text(file, streamed_limit))
+    else:
+        raise HTTPException(
+            status.HTTP_400_BAD_REQUEST,
+            detail=build_error_detail(f"Unsupported format '{fmt}'."),
+        )
+
+    limit = import_max_items()
+    count = 0
+    for idx, item in enumerate(items):
+        if not isinstance(item, dict):
+            raise HTTPException(
+                status.HTTP_400_BAD_REQUEST,
+                detail=build_error_detail(
+                    f"Invalid {context} entry.",
+                    errors=[f"Item at index {idx} must be an object."],
+                ),
+            )
+        count = idx + 1
+        if limit > 0 and count > limit:
+            raise HTTPException(
+                status.HTTP_400_BAD_REQUEST,
+                detail=build_error_detail(
+                    f"{context.title()} import exceeds the limit of {limit} items.",
+                    count=count,
+                    limit=limit,
+                ),
+            )
+        yield idx, item
+    if count == 0:
+        raise HTTPException(
+            status.HTTP_400_BAD_REQUEST,
+            detail=build_error_detail(f"{context} import payload is empty."),
+        )
+
+
+def batched(items: Iterable[T], size: int) -> Iterator[List[T]]:
+    iterator = iter(items)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+def validate_items(
+    items: Iterable[Tuple[int, Dict[str, Any]]], model: Callable[..., T], *, label: str
+) -> Iterator[T]:
+    """Validate items lazily; the first invalid one aborts with the same 422 detail as the buffered path."""
+    for idx, data in items:
+        try:
+            yield model(**data)
+        except ValidationError as exc:
+            raise HTTPException(
+                status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=build_error_detail(
+                    f"{label} at index {idx} failed validation.",
+                    errors=validation_errors_to_messages(exc.errors()),
+                    index=idx,
+                ),
+            ) from exc
+
+
+def validated_upload_batches(
+    file: UploadFile, fmt: str, model: Callable[..., T], *, context: str, label: str, size: int
+) -> Iterator[List[T]]:
+    """Validate every uploaded item, then rewind and return an iterator of validated ``size``-item batches.
+
+    Blocking (run it in a worker thread). Bad input is rejected before the caller
+    opens a write transaction, which then only covers re-reading a known-good
+    spooled upload and the inserts.
+    """
+    for _ in validate_items(iter_upload_items(file, fmt, context=context), model, label=label):
+        pass
+    file.file.seek(0)
+    return batched(validate_items(iter_upload_items(file, fmt, context=context), model, label=label), size)
+
+
 def normalize_items(data: Any, *, context: str) -> List[Dict[str, Any]]:
     """Normalize incoming data to a list of dict items."""
     if data is None:
@@ -1,92 +1,234 @@
-from fastapi import APIRouter, HTTPException
-from ..orchestration.engine import OrchestrationRequest, OrchestrationResult
+from fastapi import APIRouter, BackgroundTasks, File, Form, Header, HTTPException, Query, Request, Response, UploadFile
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from typing import Any, Dict, List
+from ..config import orchestration_batch_concurrency, orchestration_batch_max_items
+from ..integrations.circuit_breaker import CircuitOpenError
+from ..orchestration.engine import (
+    OrchestrationBatchRequest,
+    OrchestrationRequest,
+    OrchestrationResult,
+    OrchestrationJob,
+    dumps_json,
+)
+from ..orchestration.runner import (
+    EngineUnavailableError,
+    build_engine,
+    engine_inputs,
+    finalize_result,
+    persist_run,
+    resolve_engine_key,
+    run_batch,
+    track_run,
+)
+from ..orchestration import jobs
+from ..orchestration.scheduler import build_graph
 from ..services import flows_service as flows
-from ..orchestration.engines.crewai_adapter import CrewAIEngine
-from ..orchestration.engines.robotgreen_adapter import RobotGreenEngine
-from ..orchestration.engines.fake_adapter import FakeEngine
-from ..orchestration.engines.crewai_real import RealCrewAIEngine
-from ..orchestration.engines.langchain_engine import LangChainEngine
-from ..config import DEFAULT_ENGINE, CREWAI_MODE, CREWAI_API_KEY
-import uuid, json, datetime, os
+from ..services import jobs_service
+from .io_support import iter_upload_items, validation_errors_to_messages
+import json
+import logging
+import uuid
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/orchestrate", tags=["orchestrate"])
 
+
+def _engine_or_http_error(engine_key: str):
+    try:
+        return build_engine(engine_key)
+    except EngineUnavailableError as exc:
+        raise HTTPException(501, str(exc))
+    except ValueError:
+        raise HTTPException(400, "Unsupported engine")
+
+
+def _check_agent_refs(flow_id: str) -> None:
+    """Reject flows whose nodes point at agents that no longer exist (one indexed query)."""
+    missing = flows.missing_agent_ids(flow_id)
+    if missing:
+        raise HTTPException(400, f"Flow references unknown agent(s): {', '.join(missing)}")
+
+
 @router.post("/run", response_model=OrchestrationResult)
-def run(req: OrchestrationRequest):
-    f = flows.get_flow(req.flow_id)
+async def run(req: OrchestrationRequest, background: BackgroundTasks):
+    f = await run_in_threadpool(flows.get_flow, req.flow_id)
     if not f:
         raise HTTPException(404, "Flow not found")
-    engine_key = (req.engine or DEFAULT_ENGINE).lower()
-    if engine_key in ("langchain", "langgraph", "lc"):
-        try:
-            runner = LangChainEngine()
-        except RuntimeError as exc:
-            raise HTTPException(501, str(exc))
-    elif engine_key == "crewai":
-        crewai_mode = os.getenv("CREWAI_MODE", CREWAI_MODE).lower()
-        crewai_api_key = os.getenv("CREWAI_API_KEY", CREWAI_API_KEY)
-        if crewai_mode == "real":
-            if not crewai_api_key:
-                raise HTTPException(501, "CrewAI real adapter disabled or CREWAI_API_KEY not set")
-            runner = RealCrewAIEngine()
-        else:
-            runner = CrewAIEngine()
-    elif engine_key == "robotgreen":
-        runner = RobotGreenEngine()
-    elif engine_key == "fake":
-        runner = FakeEngine()
-    else:
-        raise HTTPException(400, "Unsupported engine")
-    engine_inputs = dict(req.inputs or {})
-    engine_inputs.setdefault("_flow_meta", {"id": f.id, "name": f.name, "description": f.description})
+    await run_in_threadpool(_check_agent_refs, f.id)
+    runner = _engine_or_http_error(resolve_engine_key(req.engine))
+    request_id = str(uuid.uuid4())
     try:
-        result = runner.run(f.graph_json, engine_inputs)
+        with track_run(runner.name):
+            result = await runner.arun(f.graph_json, engine_inputs(f, req.inputs, request_id))
     except ValueError as e:
         raise HTTPException(400, f"Engine error: {e}")
     except NotImplementedError as e:
         raise HTTPException(501, str(e))
-    result.flow_id = f.id  # type: ignore
 
-    # Enrich logs with request_id, engine and flow_id and append a summary event
+    result = finalize_result(result, f, request_id)
+    # Sync task: Starlette runs it in the threadpool once the response has been sent.
+    background.add_task(persist_run, f, result)
+    return result
+
+
+def _sse(event: str, data: str) -> str:
+    return f"event: {event}\ndata: {data}\n\n"
+
+
+async def _stream_run(req: OrchestrationRequest) -> StreamingResponse:
+    f = await run_in_threadpool(flows.get_flow, req.flow_id)
+    if not f:
+        raise HTTPException(404, "Flow not found")
+    await run_in_threadpool(_check_agent_refs, f.id)
+    runner = _engine_or_http_error(resolve_engine_key(req.engine))
     request_id = str(uuid.uuid4())
-    result.request_id = request_id  # type: ignore
-    enriched_logs = []
-    for line in (result.logs or []):  # type: ignore
+
+    async def events():
         try:
-            obj = json.loads(line)
-            if isinstance(obj, dict):
-                obj["request_id"] = request_id
-                obj["engine"] = result.engine
-                obj["flow_id"] = f.id
-                enriched_logs.append(json.dumps(obj, ensure_ascii=False))
-            else:
-                raise ValueError("non-dict")
-        except Exception:
-            enriched_logs.append(
-                json.dumps(
-                    {
-                        "ts": datetime.datetime.now(datetime.UTC).isoformat(),
-                        "level": "info",
-                        "msg": str(line),
-                        "request_id": request_id,
-                        "engine": result.engine,
-                        "flow_id": f.id,
-                    },
-                    ensure_ascii=False,
-                )
-            )
-
-    summary = {
-        "ts": datetime.datetime.now(datetime.UTC).isoformat(),
-        "level": "info",
-        "msg": "orchestration_summary",
-        "request_id": request_id,
-        "engine": result.engine,
-        "flow_id": f.id,
-        "duration_ms": result.duration_ms,
-        "executed_nodes": len(result.plan.executed_nodes),  # type: ignore
-        "artifacts": len(result.plan.artifacts),  # type: ignore
-    }
-    enriched_logs.append(json.dumps(summary, ensure_ascii=False))
-    result.logs = enriched_logs  # type: ignore
-    return result
+            with track_run(runner.name):
+                async for event in runner.astream(f.graph_json, engine_inputs(f, req.inputs, request_id)):
+                    if event.type == "log":
+                        yield _sse("log", event.log or "")
+                    elif event.type == "node":
+                        yield _sse("node", dumps_json({"node": event.node, "artifact": event.artifact.model_dump()}))
+                    elif event.type == "result":
+                        result = finalize_result(event.result, f, request_id)
+                        yield _sse("result", result.model_dump_json())
+                        await run_in_threadpool(persist_run, f, result)
+        except ValueError as e:
+            yield _sse("error", json.dumps({"status": 400, "detail": f"Engine error: {e}"}))
+        except NotImplementedError as e:
+            yield _sse("error", json.dumps({"status": 501, "detail": str(e)}))
+        except CircuitOpenError as e:
+            yield _sse("error", json.dumps({"status": 503, "detail": str(e)}))
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", "X-Orchestration-Request-ID": request_id},
+    )
+
+
+@router.get("/run/stream")
+async def run_stream(
+    flow_id: str,
+    engine: str | None = None,
+    inputs: str | None = Query(default=None, description="JSON-encoded inputs object"),
+):
+    """Server-Sent Events: one ``log``/``node`` event per engine step, then the final ``result``."""
+    try:
+        parsed = json.loads(inputs) if inputs else {}
+    except json.JSONDecodeError:
+        raise HTTPException(400, "inputs must be a JSON object")
+    if not isinstance(parsed, dict):
+        raise HTTPException(400, "inputs must be a JSON object")
+    return await _stream_run(OrchestrationRequest(flow_id=flow_id, engine=engine, inputs=parsed))
+
+
+@router.post("/run/stream")
+async def run_stream_post(req: OrchestrationRequest):
+    return await _stream_run(req)
+
+
+async def _batch_request(
+    request: Request, file: UploadFile | None, flow_id: str | None, engine: str | None, concurrency: int | None
+) -> OrchestrationBatchRequest:
+    if file is not None:
+        rows: List[Dict[str, Any]] = await run_in_threadpool(
+            lambda: [item for _, item in iter_upload_items(file, "json", context="batch input", buffered=True)]
+        )
+        data: Any = {"flow_id": flow_id, "engine": engine, "inputs": rows, "concurrency": concurrency}
+    else:
+        try:
+            data = await request.json()
+        except ValueError:
+            raise HTTPException(400, "Body must be a JSON object or a multipart upload with 'file'")
+    try:
+        return OrchestrationBatchRequest.model_validate(data)
+    except ValidationError as exc:
+        raise HTTPException(422, validation_errors_to_messages(exc.errors()))
+
+
+def _batch_line(index: int, request_id: str, outcome: OrchestrationResult | Exception) -> str:
+    if isinstance(outcome, OrchestrationResult):
+        # The result is serialized once, straight into the line.
+        return f'{{"index":{index},"request_id":"{request_id}","status":"ok","result":{outcome.model_dump_json()}}}\n'
+    if isinstance(outcome, ValueError):
+        error = {"status": 400, "detail": f"Engine error: {outcome}"}
+    elif isinstance(outcome, NotImplementedError):
+        error = {"status": 501, "detail": str(outcome)}
+    elif isinstance(outcome, CircuitOpenError):
+        error = {"status": 503, "detail": str(outcome)}
+    else:
+        logger.error("Batch row failed", exc_info=outcome, extra={"run_id": request_id})
+        error = {"status": 500, "detail": f"Unexpected error: {outcome}"}
+    return dumps_json({"index": index, "request_id": request_id, "status": "error", "error": error}) + "\n"
+
+
+@router.post("/batch")
+async def run_batch_endpoint(
+    request: Request,
+    file: UploadFile | None = File(default=None),
+    flow_id: str | None = Form(default=None),
+    engine: str | None = Form(default=None),
+    concurrency: int | None = Form(default=None),
+):
+    """Run one flow over many input rows and stream one NDJSON line per row as it finishes.
+
+    Send ``{"flow_id", "engine", "inputs": [{...}, ...], "concurrency"}`` as JSON,
+    or a multipart upload whose ``file`` holds the rows (NDJSON or a JSON array)
+    with ``flow_id``/``engine``/``concurrency`` as form fields. Lines look like
+    ``{"index", "request_id", "status": "ok", "result"}`` or ``{..., "status": "error", "error"}``.
+    """
+    req = await _batch_request(request, file, flow_id, engine, concurrency)
+    if len(req.inputs) > orchestration_batch_max_items():
+        raise HTTPException(400, f"Batch exceeds the limit of {orchestration_batch_max_items()} rows")
+    f = await run_in_threadpool(flows.get_flow, req.flow_id)
+    if not f:
+        raise HTTPException(404, "Flow not found")
+    await run_in_threadpool(_check_agent_refs, f.id)
+    try:
+        build_graph(f.graph_json)
+    except ValueError as e:
+        raise HTTPException(400, f"Engine error: {e}")
+    runner = _engine_or_http_error(resolve_engine_key(req.engine))
+    parallelism = min(req.concurrency or orchestration_batch_concurrency(), orchestration_batch_concurrency())
+
+    async def lines():
+        async for index, request_id, outcome in run_batch(runner, f, req.inputs, parallelism):
+            yield _batch_line(index, request_id, outcome)
+            if isinstance(outcome, OrchestrationResult):
+                await run_in_threadpool(persist_run, f, outcome)
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson", headers={"Cache-Control": "no-cache"})
+
+
+@router.post("/jobs", response_model=OrchestrationJob, status_code=202)
+def submit_job(
+    req: OrchestrationRequest,
+    response: Response,
+    idempotency_key: str | None = Header(default=None),
+):
+    f = flows.get_flow(req.flow_id)
+    if not f:
+        raise HTTPException(404, "Flow not found")
+    _check_agent_refs(f.id)
+    engine_key = resolve_engine_key(req.engine)
+    # Fail fast on misconfigured engines instead of queueing a job that cannot run.
+    _engine_or_http_error(engine_key)
+    job, created = jobs_service.create_job(f.id, engine_key, dict(req.inputs or {}), idempotency_key)
+    if created:
+        jobs.submit(job.id)
+    response.headers["Location"] = f"{router.prefix}/jobs/{job.id}"
+    return job
+
+
+@router.get("/jobs/{job_id}", response_model=OrchestrationJob)
+def get_job(job_id: str):
+    job = jobs_service.get_job(job_id)
+    if not job:
+        raise HTTPException(404, "Job not found")
+    return job
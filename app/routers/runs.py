@@ -0,0 +1,35 @@
+from typing import List, Optional
+
+from fastapi import APIRouter, HTTPException, Query, Response
+
+from ..orchestration.engine import OrchestrationRun, OrchestrationRunSummary
+from ..services import runs_service as svc
+
+router = APIRouter(prefix="/runs", tags=["runs"])
+
+@router.get("", response_model=List[OrchestrationRunSummary])
+def list_runs(
+    response: Response,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    flow_id: Optional[str] = None,
+):
+    """Stored orchestration runs, newest first, without logs or outputs.
+
+    When more rows exist the ``X-Next-Cursor`` header carries the cursor for the next page.
+    """
+    try:
+        runs, next_cursor = svc.list_runs_page(limit, cursor=cursor, flow_id=flow_id)
+    except ValueError as exc:
+        raise HTTPException(400, str(exc))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return runs
+
+@router.get("/{request_id}", response_model=OrchestrationRun)
+def get_run(request_id: str):
+    """A stored run with its artifacts and logs, by the request_id returned from /orchestrate."""
+    run = svc.get_run(request_id)
+    if not run:
+        raise HTTPException(404, "Run not found")
+    return run
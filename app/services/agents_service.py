@@ -1,60 +1,226 @@
-from typing import List, Optional, Dict, Any
+from typing import Iterable, Iterator, List, Optional, Dict, Any, Tuple
 import json
-from ..db import get_conn
+import threading
+import time
+from ..config import agent_cache_ttl_sec, export_batch_size
+from ..db import connection
 from ..models import Agent, AgentCreate
+from .pagination import keyset_query, page_limit, prefix_range, resolve_fields, rows_to_dicts, split_page
+
+# SQLite's default SQLITE_MAX_VARIABLE_NUMBER is 999 on older builds.
+_IN_CHUNK = 900
+
+# Short-lived cache behind get_agents_by_ids: agent_id -> (expires_at, Agent).
+# Writes bump _cache_generation so a load that raced with them is not stored.
+_cache: Dict[str, Tuple[float, Agent]] = {}
+_cache_generation = 0
+_cache_lock = threading.Lock()
+
+LIST_FIELDS = ("id", "name", "role", "goal", "backstory", "tools", "input_artifacts", "output_artifacts", "created_at")
+SUMMARY_FIELDS = ("name", "role")
+_JSON_FIELDS = {"tools": None, "input_artifacts": None, "output_artifacts": None}
 
 def _dumps(x): return json.dumps(x) if x is not None else None
 def _loads(x): return json.loads(x) if x else None
 
+def _row_to_agent(r) -> Agent:
+    return Agent(
+        id=r["id"], name=r["name"], role=r["role"], goal=r["goal"], backstory=r["backstory"],
+        tools=_loads(r["tools"]), input_artifacts=_loads(r["input_artifacts"]),
+        output_artifacts=_loads(r["output_artifacts"]), created_at=r["created_at"]
+    )
+
+def invalidate_agent_cache(agent_id: Optional[str] = None) -> None:
+    """Evict one agent (or every agent when ``agent_id`` is None) from the batch-loader cache."""
+    global _cache_generation
+    with _cache_lock:
+        _cache_generation += 1
+        if agent_id is None:
+            _cache.clear()
+        else:
+            _cache.pop(agent_id, None)
+
 def create_agent(data: AgentCreate) -> Agent:
     a = Agent(**data.model_dump())
-    conn = get_conn(); cur = conn.cursor()
-    cur.execute(
-        "INSERT INTO agents (id,name,role,goal,backstory,tools,input_artifacts,output_artifacts,created_at) VALUES (?,?,?,?,?,?,?,?,?)",
-        (a.id, a.name, a.role, a.goal, a.backstory, _dumps(a.tools), _dumps(a.input_artifacts), _dumps(a.output_artifacts), a.created_at)
-    )
-    conn.commit(); conn.close()
+    with connection() as conn:
+        cur = conn.cursor()
+        cur.execute(
+            "INSERT INTO agents (id,name,role,goal,backstory,tools,input_artifacts,output_artifacts,created_at) VALUES (?,?,?,?,?,?,?,?,?)",
+            (a.id, a.name, a.role, a.goal, a.backstory, _dumps(a.tools), _dumps(a.input_artifacts), _dumps(a.output_artifacts), a.created_at)
+        )
+        conn.commit()
+    invalidate_agent_cache(a.id)
     return a
 
+_INSERT_AGENT = (
+    "INSERT INTO agents (id,name,role,goal,backstory,tools,input_artifacts,output_artifacts,created_at) "
+    "VALUES (?,?,?,?,?,?,?,?,?)"
+)
+
+def _agent_params(a: Agent) -> tuple:
+    return (
+        a.id, a.name, a.role, a.goal, a.backstory,
+        _dumps(a.tools), _dumps(a.input_artifacts), _dumps(a.output_artifacts), a.created_at,
+    )
+
+def create_agents_bulk(items: List[AgentCreate]) -> List[Agent]:
+    """Insert every agent in one transaction with executemany; nothing is written if any row fails."""
+    agents = [Agent(**data.model_dump()) for data in items]
+    with connection() as conn:
+        cur = conn.cursor()
+        try:
+            cur.executemany(_INSERT_AGENT, [_agent_params(a) for a in agents])
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    invalidate_agent_cache()
+    return agents
+
+def create_agents_batched(batches: Iterable[List[AgentCreate]], keep: int) -> Tuple[List[Agent], int]:
+    """Insert agents batch by batch as they are produced, committing once at the end.
+
+    The write transaction stays open while ``batches`` is consumed, so pass
+    already-validated input (``validated_upload_batches``). An exception from the
+    producer still rolls the whole import back. Returns the first ``keep``
+    created agents and the total count.
+    """
+    kept: List[Agent] = []
+    total = 0
+    with connection() as conn:
+        cur = conn.cursor()
+        try:
+            for batch in batches:
+                agents = [Agent(**data.model_dump()) for data in batch]
+                cur.executemany(_INSERT_AGENT, [_agent_params(a) for a in agents])
+                kept.extend(agents[:max(0, keep - len(kept))])
+                total += len(agents)
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+    invalidate_agent_cache()
+    return kept, total
+
 def list_agents() -> List[Agent]:
-    conn = get_conn(); cur = conn.cursor()
-    cur.execute("SELECT * FROM agents ORDER BY created_at DESC")
-    rows = cur.fetchall(); conn.close()
-    out = []
-    for r in rows:
-        out.append(Agent(
-            id=r["id"], name=r["name"], role=r["role"], goal=r["goal"], backstory=r["backstory"],
-            tools=_loads(r["tools"]), input_artifacts=_loads(r["input_artifacts"]), 
-            output_artifacts=_loads(r["output_artifacts"]), created_at=r["created_at"]
-        ))
-    return out
+    with connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT * FROM agents ORDER BY created_at DESC")
+        rows = cur.fetchall()
+    return [_row_to_agent(r) for r in rows]
+
+def iter_agents() -> Iterator[Agent]:
+    """Yield every agent (newest first), reading keyset pages of ``EXPORT_BATCH_SIZE`` rows.
+
+    Each page borrows a pooled connection only while it is fetched, so a slow
+    export download does not hold one.
+    """
+    batch_size = export_batch_size()
+    cursor: Optional[str] = None
+    while True:
+        sql, args = keyset_query("agents", [], [], batch_size, cursor)
+        with connection() as conn:
+            cur = conn.cursor()
+            cur.execute(sql, args)
+            rows, cursor = split_page(cur.fetchall(), batch_size)
+        for r in rows:
+            yield _row_to_agent(r)
+        if cursor is None:
+            return
+
+def list_agents_page(
+    limit: Optional[int],
+    cursor: Optional[str] = None,
+    name_prefix: Optional[str] = None,
+    fields: Optional[str] = None,
+    view: Optional[str] = None,
+) -> Tuple[List[Any], Optional[str]]:
+    """Newest-first page of agents; returns ``(agents, next_cursor)``.
+
+    With ``limit`` and ``cursor`` both None every row is returned in one page.
+
+    With ``fields``/``view=summary`` only those columns are read and the page
+    holds plain dicts instead of Agent models. Raises ValueError on a bad
+    cursor, field or view.
+    """
+    limit = page_limit(limit, cursor)
+    columns = resolve_fields(fields, view, LIST_FIELDS, SUMMARY_FIELDS)
+    where, params = [], []
+    if name_prefix:
+        where.append("name >= ? AND name < ?")
+        params.extend(prefix_range(name_prefix))
+    sql, args = keyset_query("agents", where, params, limit, cursor, columns=",".join(columns) if columns else "*")
+    with connection() as conn:
+        cur = conn.cursor()
+        cur.execute(sql, args)
+        rows, next_cursor = split_page(cur.fetchall(), limit)
+    if columns:
+        return rows_to_dicts(rows, _JSON_FIELDS), next_cursor
+    return [_row_to_agent(r) for r in rows], next_cursor
 
 def get_agent(agent_id: str) -> Optional[Agent]:
-    conn = get_conn(); cur = conn.cursor()
-    cur.execute("SELECT * FROM agents WHERE id=?", (agent_id,))
-    r = cur.fetchone(); conn.close()
+    with connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT * FROM agents WHERE id=?", (agent_id,))
+        r = cur.fetchone()
     if not r: return None
-    return Agent(
-        id=r["id"], name=r["name"], role=r["role"], goal=r["goal"], backstory=r["backstory"],
-        tools=_loads(r["tools"]), input_artifacts=_loads(r["input_artifacts"]),
-        output_artifacts=_loads(r["output_artifacts"]), created_at=r["created_at"]
-    )
+    return _row_to_agent(r)
+
+def get_agents_by_ids(agent_ids: Iterable[str]) -> Dict[str, Agent]:
+    """Load many agents with one ``WHERE id IN (...)`` query; unknown ids are absent from the result.
+
+    Results are reused for ``AGENT_CACHE_TTL_SEC`` seconds; create/update/delete
+    evict the affected agent. Returned models are copies, safe to mutate.
+    """
+    ids = list(dict.fromkeys(i for i in agent_ids if i))
+    ttl = agent_cache_ttl_sec()
+    now = time.monotonic()
+    found: Dict[str, Agent] = {}
+    with _cache_lock:
+        generation = _cache_generation
+        if ttl > 0:
+            for agent_id in ids:
+                entry = _cache.get(agent_id)
+                if entry is not None and entry[0] > now:
+                    found[agent_id] = entry[1]
+    missing = [i for i in ids if i not in found]
+    if missing:
+        loaded: Dict[str, Agent] = {}
+        with connection() as conn:
+            cur = conn.cursor()
+            for start in range(0, len(missing), _IN_CHUNK):
+                chunk = missing[start:start + _IN_CHUNK]
+                cur.execute(f"SELECT * FROM agents WHERE id IN ({','.join('?' * len(chunk))})", chunk)
+                for r in cur.fetchall():
+                    loaded[r["id"]] = _row_to_agent(r)
+        found.update(loaded)
+        if ttl > 0:
+            with _cache_lock:
+                if generation == _cache_generation:
+                    for agent_id, agent in loaded.items():
+                        _cache[agent_id] = (now + ttl, agent)
+    return {i: found[i].model_copy(deep=True) for i in ids if i in found}
 
 def update_agent(agent_id: str, data: Dict[str, Any]) -> Optional[Agent]:
     a = get_agent(agent_id)
     if not a: return None
     payload = a.model_dump(); payload.update(data)
-    conn = get_conn(); cur = conn.cursor()
-    cur.execute(
-        "UPDATE agents SET name=?, role=?, goal=?, backstory=?, tools=?, input_artifacts=?, output_artifacts=? WHERE id=?",
-        (payload["name"], payload.get("role",""), payload.get("goal",""), payload.get("backstory",""),
-         _dumps(payload.get("tools")), _dumps(payload.get("input_artifacts")), _dumps(payload.get("output_artifacts")), agent_id)
-    )
-    conn.commit(); conn.close()
+    with connection() as conn:
+        cur = conn.cursor()
+        cur.execute(
+            "UPDATE agents SET name=?, role=?, goal=?, backstory=?, tools=?, input_artifacts=?, output_artifacts=? WHERE id=?",
+            (payload["name"], payload.get("role",""), payload.get("goal",""), payload.get("backstory",""),
+             _dumps(payload.get("tools")), _dumps(payload.get("input_artifacts")), _dumps(payload.get("output_artifacts")), agent_id)
+        )
+        conn.commit()
+    invalidate_agent_cache(agent_id)
     return get_agent(agent_id)
 
 def delete_agent(agent_id: str) -> bool:
-    conn = get_conn(); cur = conn.cursor()
-    cur.execute("DELETE FROM agents WHERE id=?", (agent_id,))
-    conn.commit(); deleted = cur.rowcount>0; conn.close()
+    with connection() as conn:
+        cur = conn.cursor()
+        cur.execute("DELETE FROM agents WHERE id=?", (agent_id,))
+        conn.commit()
+        deleted = cur.rowcount>0
+    invalidate_agent_cache(agent_id)
     return deleted
@@ -1,22 +1,115 @@
-from typing import List
-from ..db import get_conn
-from ..models import Evaluation, EvaluationCreate
+from typing import Any, List, Optional, Sequence, Tuple
+import math
+from ..db import connection
+from ..models import Evaluation, EvaluationCreate, EvaluationStats
+from .pagination import keyset_query, page_limit, resolve_fields, rows_to_dicts, split_page
+
+LIST_FIELDS = ("id", "agent_id", "score", "comments", "created_at")
+SUMMARY_FIELDS = ("agent_id", "score")
+# SQLite's default SQLITE_MAX_VARIABLE_NUMBER is 999 on older builds.
+_IN_CHUNK = 900
+
+def _row_to_evaluation(r) -> Evaluation:
+    return Evaluation(
+        id=r["id"], agent_id=r["agent_id"], score=r["score"], comments=r["comments"], created_at=r["created_at"]
+    )
+
+# Folds one score into the agent's rollup; runs in the same transaction as the evaluation insert.
+_UPSERT_STATS = (
+    "INSERT INTO evaluation_stats (agent_id, count, sum, sum_sq, min, max, last_at) VALUES (?,1,?,?,?,?,?) "
+    "ON CONFLICT(agent_id) DO UPDATE SET count=count+1, sum=sum+excluded.sum, sum_sq=sum_sq+excluded.sum_sq, "
+    "min=MIN(min, excluded.min), max=MAX(max, excluded.max), last_at=MAX(COALESCE(last_at, ''), excluded.last_at)"
+)
+
+def _row_to_stats(r) -> EvaluationStats:
+    count = r["count"]
+    mean = r["sum"] / count
+    # Population variance from running sums; clamp the tiny negatives floating point can produce.
+    variance = max(0.0, r["sum_sq"] / count - mean * mean)
+    return EvaluationStats(
+        agent_id=r["agent_id"], count=count, mean=mean, stddev=math.sqrt(variance),
+        min=r["min"], max=r["max"], last_at=r["last_at"],
+    )
 
 def create_evaluation(data: EvaluationCreate) -> Evaluation:
     e = Evaluation(**data.model_dump())
-    conn = get_conn(); cur = conn.cursor()
-    cur.execute(
-        "INSERT INTO evaluations (id,agent_id,score,comments,created_at) VALUES (?,?,?,?,?)",
-        (e.id, e.agent_id, e.score, e.comments, e.created_at)
-    )
-    conn.commit(); conn.close()
+    with connection() as conn:
+        cur = conn.cursor()
+        try:
+            cur.execute(
+                "INSERT INTO evaluations (id,agent_id,score,comments,created_at) VALUES (?,?,?,?,?)",
+                (e.id, e.agent_id, e.score, e.comments, e.created_at)
+            )
+            cur.execute(_UPSERT_STATS, (e.agent_id, e.score, e.score * e.score, e.score, e.score, e.created_at))
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
     return e
 
+def get_evaluation_stats(agent_id: str) -> EvaluationStats:
+    """Rollup for one agent (a primary-key read); ``count=0`` when it has no evaluations."""
+    with connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT * FROM evaluation_stats WHERE agent_id=?", (agent_id,))
+        row = cur.fetchone()
+    return _row_to_stats(row) if row else EvaluationStats(agent_id=agent_id)
+
+def list_evaluation_stats(agent_ids: Optional[Sequence[str]] = None) -> List[EvaluationStats]:
+    """Rollups ordered by agent_id, optionally restricted to ``agent_ids`` (agents without evaluations are omitted)."""
+    with connection() as conn:
+        cur = conn.cursor()
+        if not agent_ids:
+            cur.execute("SELECT * FROM evaluation_stats ORDER BY agent_id")
+            return [_row_to_stats(r) for r in cur.fetchall()]
+        ids = list(dict.fromkeys(agent_ids))
+        rows = []
+        for start in range(0, len(ids), _IN_CHUNK):
+            chunk = ids[start:start + _IN_CHUNK]
+            cur.execute(f"SELECT * FROM evaluation_stats WHERE agent_id IN ({','.join('?' * len(chunk))})", chunk)
+            rows.extend(cur.fetchall())
+    return sorted((_row_to_stats(r) for r in rows), key=lambda s: s.agent_id)
+
 def list_evaluations() -> List[Evaluation]:
-    conn = get_conn(); cur = conn.cursor()
-    cur.execute("SELECT * FROM evaluations ORDER BY created_at DESC")
-    rows = cur.fetchall(); conn.close()
-    out = [Evaluation(
-        id=r["id"], agent_id=r["agent_id"], score=r["score"], comments=r["comments"], created_at=r["created_at"]
-    ) for r in rows]
-    return out
+    with connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT * FROM evaluations ORDER BY created_at DESC")
+        rows = cur.fetchall()
+    return [_row_to_evaluation(r) for r in rows]
+
+def list_evaluations_page(
+    limit: Optional[int],
+    cursor: Optional[str] = None,
+    agent_id: Optional[str] = None,
+    min_score: Optional[float] = None,
+    max_score: Optional[float] = None,
+    fields: Optional[str] = None,
+    view: Optional[str] = None,
+) -> Tuple[List[Any], Optional[str]]:
+    """Newest-first page of evaluations; returns ``(evaluations, next_cursor)``.
+
+    With ``limit`` and ``cursor`` both None every row is returned in one page.
+
+    With ``fields``/``view=summary`` only those columns are read and the page
+    holds plain dicts. Raises ValueError on a bad cursor, field or view.
+    """
+    limit = page_limit(limit, cursor)
+    columns = resolve_fields(fields, view, LIST_FIELDS, SUMMARY_FIELDS)
+    where, params = [], []
+    if agent_id:
+        where.append("agent_id=?")
+        params.append(agent_id)
+    if min_score is not None:
+        where.append("score>=?")
+        params.append(min_score)
+    if max_score is not None:
+        where.append("score<=?")
+        params.append(max_score)
+    sql, args = keyset_query("evaluations", where, params, limit, cursor, columns=",".join(columns) if columns else "*")
+    with connection() as conn:
+        cur = conn.cursor()
+        cur.execute(sql, args)
+        rows, next_cursor = split_page(cur.fetchall(), limit)
+    if columns:
+        return rows_to_dicts(rows), next_cursor
+    return [_row_to_evaluation(r) for r in rows], next_cursor
@@ -1,51 +1,165 @@
-from typing import List, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 import json
-from ..db import get_conn
+from ..config import export_batch_size
+from ..db import connection
 from ..models import Flow, FlowCreate
+from .pagination import keyset_query, page_limit, prefix_range, resolve_fields, rows_to_dicts, split_page
+
+LIST_FIELDS = ("id", "name", "description", "graph_json", "created_at")
+SUMMARY_FIELDS = ("name", "description")
+
+def _row_to_flow(r) -> Flow:
+    return Flow(
+        id=r["id"], name=r["name"], description=r["description"],
+        graph_json=json.loads(r["graph_json"]) if r["graph_json"] else {},
+        created_at=r["created_at"]
+    )
+
+def node_agent_id(node: Any) -> Optional[str]:
+    """Agent referenced by a graph node: ``agentId``, or the node ``id`` for ``type: "agent"`` nodes."""
+    if not isinstance(node, dict):
+        return None
+    agent_id = node.get("agentId")
+    if agent_id is None and node.get("type") == "agent":
+        agent_id = node.get("id")
+    return str(agent_id) if agent_id is not None else None
+
+def _flow_node_rows(graphs: Iterable[Tuple[str, Optional[Dict[str, Any]]]]) -> List[tuple]:
+    rows = []
+    for flow_id, graph in graphs:
+        nodes = (graph or {}).get("nodes") or []
+        for node in nodes:
+            if isinstance(node, dict) and node.get("id") is not None:
+                rows.append((flow_id, str(node["id"]), node_agent_id(node)))
+    return rows
+
+def _write_flow_nodes(cur, graphs: Iterable[Tuple[str, Optional[Dict[str, Any]]]]) -> None:
+    """Keep flow_nodes in step with each ``(flow_id, graph_json)`` (same transaction as the flow write)."""
+    cur.executemany(
+        "INSERT OR IGNORE INTO flow_nodes (flow_id,node_id,agent_id) VALUES (?,?,?)", _flow_node_rows(graphs)
+    )
 
 def create_flow(data: FlowCreate) -> Flow:
     f = Flow(**data.model_dump())
-    conn = get_conn(); cur = conn.cursor()
-    cur.execute(
-        "INSERT INTO flows (id,name,description,graph_json,created_at) VALUES (?,?,?,?,?)",
-        (f.id, f.name, f.description, json.dumps(f.graph_json), f.created_at)
-    )
-    conn.commit(); conn.close()
+    with connection() as conn:
+        cur = conn.cursor()
+        cur.execute(
+            "INSERT INTO flows (id,name,description,graph_json,created_at) VALUES (?,?,?,?,?)",
+            (f.id, f.name, f.description, json.dumps(f.graph_json), f.created_at)
+        )
+        _write_flow_nodes(cur, [(f.id, f.graph_json)])
+        conn.commit()
     return f
 
+_INSERT_FLOW = "INSERT INTO flows (id,name,description,graph_json,created_at) VALUES (?,?,?,?,?)"
+
+def _flow_params(f: Flow) -> tuple:
+    return (f.id, f.name, f.description, json.dumps(f.graph_json), f.created_at)
+
+def create_flows_bulk(items: List[FlowCreate]) -> List[Flow]:
+    """Insert every flow in one transaction with executemany; nothing is written if any row fails."""
+    flows = [Flow(**data.model_dump()) for data in items]
+    with connection() as conn:
+        cur = conn.cursor()
+        try:
+            cur.executemany(_INSERT_FLOW, [_flow_params(f) for f in flows])
+            _write_flow_nodes(cur, ((f.id, f.graph_json) for f in flows))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    return flows
+
+def create_flows_batched(batches: Iterable[List[FlowCreate]], keep: int) -> Tuple[List[Flow], int]:
+    """Insert flows batch by batch as they are produced, committing once at the end.
+
+    The write transaction stays open while ``batches`` is consumed, so pass
+    already-validated input (``validated_upload_batches``). An exception from the
+    producer still rolls the whole import back. Returns the first ``keep``
+    created flows and the total count.
+    """
+    kept: List[Flow] = []
+    total = 0
+    with connection() as conn:
+        cur = conn.cursor()
+        try:
+            for batch in batches:
+                flows = [Flow(**data.model_dump()) for data in batch]
+                cur.executemany(_INSERT_FLOW, [_flow_params(f) for f in flows])
+                _write_flow_nodes(cur, ((f.id, f.graph_json) for f in flows))
+                kept.extend(flows[:max(0, keep - len(kept))])
+                total += len(flows)
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+    return kept, total
+
 def list_flows() -> List[Flow]:
-    conn = get_conn(); cur = conn.cursor()
-    cur.execute("SELECT * FROM flows ORDER BY created_at DESC")
-    rows = cur.fetchall(); conn.close()
-    out = []
-    for r in rows:
-        out.append(Flow(
-            id=r["id"], name=r["name"], description=r["description"],
-            graph_json=json.loads(r["graph_json"]) if r["graph_json"] else {},
-            created_at=r["created_at"]
-        ))
-    return out
+    with connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT * FROM flows ORDER BY created_at DESC")
+        rows = cur.fetchall()
+    return [_row_to_flow(r) for r in rows]
+
+def iter_flows() -> Iterator[Flow]:
+    """Yield every flow (newest first), reading keyset pages of ``EXPORT_BATCH_SIZE`` rows.
+
+    Each page borrows a pooled connection only while it is fetched, so a slow
+    export download does not hold one.
+    """
+    batch_size = export_batch_size()
+    cursor: Optional[str] = None
+    while True:
+        sql, args = keyset_query("flows", [], [], batch_size, cursor)
+        with connection() as conn:
+            cur = conn.cursor()
+            cur.execute(sql, args)
+            rows, cursor = split_page(cur.fetchall(), batch_size)
+        for r in rows:
+            yield _row_to_flow(r)
+        if cursor is None:
+            return
+
+def list_flows_page(
+    limit: Optional[int],
+    cursor: Optional[str] = None,
+    name_prefix: Optional[str] = None,
+    fields: Optional[str] = None,
+    view: Optional[str] = None,
+) -> Tuple[List[Any], Optional[str]]:
+    """Newest-first page of flows; returns ``(flows, next_cursor)``.
+
+    With ``limit`` and ``cursor`` both None every row is returned in one page.
+
+    With ``fields``/``view=summary`` only those columns are read (``graph_json``
+    is neither fetched nor decoded unless asked for) and the page holds plain
+    dicts. Raises ValueError on a bad cursor, field or view.
+    """
+    limit = page_limit(limit, cursor)
+    columns = resolve_fields(fields, view, LIST_FIELDS, SUMMARY_FIELDS)
+    where, params = [], []
+    if name_prefix:
+        where.append("name >= ? AND name < ?")
+        params.extend(prefix_range(name_prefix))
+    sql, args = keyset_query("flows", where, params, limit, cursor, columns=",".join(columns) if columns else "*")
+    with connection() as conn:
+        cur = conn.cursor()
+        cur.execute(sql, args)
+        rows, next_cursor = split_page(cur.fetchall(), limit)
+    if columns:
+        return rows_to_dicts(rows, {"graph_json": {}}), next_cursor
+    return [_row_to_flow(r) for r in rows], next_cursor
 
 def get_flow(flow_id: str) -> Optional[Flow]:
-    conn = get_conn(); cur = conn.cursor()
-    cur.execute("SELECT * FROM flows WHERE id=?", (flow_id,))
-    r = cur.fetchone(); conn.close()
+    with connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT * FROM flows WHERE id=?", (flow_id,))
+        r = cur.fetchone()
     if not r: return None
-    return Flow(
-        id=r["id"], name=r["name"], description=r["description"],
-        graph_json=json.loads(r["graph_json"]) if r["graph_json"] else {},
-        created_at=r["created_at"]
-    )
+    return _row_to_flow(r)
 
 def update_flow(flow_id: str, payload: dict) -> Optional[Flow]:
-    conn = get_conn(); cur = conn.cursor()
-    
-    # First check if exists
-    cur.execute("SELECT * FROM flows WHERE id=?", (flow_id,))
-    if not cur.fetchone():
-        conn.close()
-        return None
-        
     # Update fields
     update_fields = []
     params = []
@@ -59,21 +173,55 @@ def update_flow(flow_id: str, payload: dict) -> Optional[Flow]:
     if "graph_json" in payload:
         update_fields.append("graph_json=?")
         params.append(json.dumps(payload["graph_json"]))
-        
-    if not update_fields:
-        conn.close()
-        return get_flow(flow_id)
-        
-    params.append(flow_id)
-    query = f"UPDATE flows SET {','.join(update_fields)} WHERE id=?"
-    cur.execute(query, tuple(params))
-    conn.commit(); conn.close()
+
+    with connection() as conn:
+        cur = conn.cursor()
+
+        # First check if exists
+        cur.execute("SELECT 1 FROM flows WHERE id=?", (flow_id,))
+        if not cur.fetchone():
+            return None
+
+        if update_fields:
+            params.append(flow_id)
+            query = f"UPDATE flows SET {','.join(update_fields)} WHERE id=?"
+            cur.execute(query, tuple(params))
+            if "graph_json" in payload:
+                cur.execute("DELETE FROM flow_nodes WHERE flow_id=?", (flow_id,))
+                _write_flow_nodes(cur, [(flow_id, payload["graph_json"])])
+            conn.commit()
     
     return get_flow(flow_id)
 
 def delete_flow(flow_id: str) -> bool:
-    conn = get_conn(); cur = conn.cursor()
-    cur.execute("DELETE FROM flows WHERE id=?", (flow_id,))
-    rows = cur.rowcount
-    conn.commit(); conn.close()
+    with connection() as conn:
+        cur = conn.cursor()
+        cur.execute("DELETE FROM flows WHERE id=?", (flow_id,))
+        rows = cur.rowcount
+        cur.execute("DELETE FROM flow_nodes WHERE flow_id=?", (flow_id,))
+        conn.commit()
     return rows > 0
+
+def list_flows_for_agent(agent_id: str) -> List[Flow]:
+    """Flows with at least one node referencing ``agent_id`` (newest first), via the flow_nodes index."""
+    with connection() as conn:
+        cur = conn.cursor()
+        cur.execute(
+            "SELECT * FROM flows WHERE id IN (SELECT flow_id FROM flow_nodes WHERE agent_id=?) "
+            "ORDER BY created_at DESC, id DESC",
+            (agent_id,)
+        )
+        rows = cur.fetchall()
+    return [_row_to_flow(r) for r in rows]
+
+def missing_agent_ids(flow_id: str) -> List[str]:
+    """Agent ids referenced by the flow's nodes that do not exist, in one query."""
+    with connection() as conn:
+        cur = conn.cursor()
+        cur.execute(
+            "SELECT DISTINCT fn.agent_id FROM flow_nodes fn LEFT JOIN agents a ON a.id = fn.agent_id "
+            "WHERE fn.flow_id=? AND fn.agent_id IS NOT NULL AND a.id IS NULL ORDER BY fn.agent_id",
+            (flow_id,)
+        )
+        rows = cur.fetchall()
+    return [r["agent_id"] for r in rows]
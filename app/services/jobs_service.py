@@ -0,0 +1,103 @@
+import datetime
+import json
+import sqlite3
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..db import connection
+from ..orchestration.engine import OrchestrationJob, OrchestrationResult
+
+
+def _now() -> str: return datetime.datetime.now(datetime.UTC).isoformat()
+
+def _row_to_job(r) -> OrchestrationJob:
+    return OrchestrationJob(
+        id=r["id"], flow_id=r["flow_id"], engine=r["engine"], status=r["status"],
+        result=OrchestrationResult.model_validate_json(r["result"]) if r["result"] else None,
+        error=r["error"], created_at=r["created_at"], updated_at=r["updated_at"]
+    )
+
+def create_job(
+    flow_id: str, engine: Optional[str], inputs: Dict[str, Any], idempotency_key: Optional[str] = None
+) -> Tuple[OrchestrationJob, bool]:
+    """Insert a queued job. Returns ``(job, created)``; a repeated idempotency key returns the original job."""
+    job_id = str(uuid.uuid4())
+    now = _now()
+    with connection() as conn:
+        cur = conn.cursor()
+        try:
+            cur.execute(
+                "INSERT INTO orchestration_jobs "
+                "(id,flow_id,engine,inputs,status,idempotency_key,created_at,updated_at) VALUES (?,?,?,?,?,?,?,?)",
+                (job_id, flow_id, engine, json.dumps(inputs), "queued", idempotency_key, now, now)
+            )
+            conn.commit()
+        except sqlite3.IntegrityError:
+            conn.rollback()
+            cur.execute("SELECT * FROM orchestration_jobs WHERE idempotency_key=?", (idempotency_key,))
+            return _row_to_job(cur.fetchone()), False
+    return get_job(job_id), True
+
+def get_job(job_id: str) -> Optional[OrchestrationJob]:
+    with connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT * FROM orchestration_jobs WHERE id=?", (job_id,))
+        r = cur.fetchone()
+    if not r:
+        return None
+    return _row_to_job(r)
+
+def claim_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """Atomically move a queued job to running; returns its spec, or None if another worker got it."""
+    with connection() as conn:
+        cur = conn.cursor()
+        cur.execute(
+            "UPDATE orchestration_jobs SET status='running', updated_at=? WHERE id=? AND status='queued'",
+            (_now(), job_id)
+        )
+        conn.commit()
+        if cur.rowcount == 0:
+            return None
+        cur.execute("SELECT flow_id, engine, inputs FROM orchestration_jobs WHERE id=?", (job_id,))
+        r = cur.fetchone()
+    return {"flow_id": r["flow_id"], "engine": r["engine"], "inputs": json.loads(r["inputs"] or "{}")}
+
+def complete_job(job_id: str, result: OrchestrationResult) -> None:
+    """Record the result of a running job (a job already failed by shutdown/recovery is left alone)."""
+    with connection() as conn:
+        cur = conn.cursor()
+        cur.execute(
+            "UPDATE orchestration_jobs SET status='succeeded', result=?, error=NULL, updated_at=? "
+            "WHERE id=? AND status='running'",
+            (result.model_dump_json(), _now(), job_id)
+        )
+        conn.commit()
+
+def fail_job(job_id: str, error: str) -> bool:
+    """Mark a running job failed; returns False when it had already finished."""
+    with connection() as conn:
+        cur = conn.cursor()
+        cur.execute(
+            "UPDATE orchestration_jobs SET status='failed', error=?, updated_at=? WHERE id=? AND status='running'",
+            (error, _now(), job_id)
+        )
+        conn.commit()
+        return cur.rowcount > 0
+
+def fail_running_jobs(error: str) -> int:
+    """Fail every job still marked running, e.g. left behind by a process that crashed; returns the count."""
+    with connection() as conn:
+        cur = conn.cursor()
+        cur.execute(
+            "UPDATE orchestration_jobs SET status='failed', error=?, updated_at=? WHERE status='running'",
+            (error, _now())
+        )
+        conn.commit()
+        return cur.rowcount
+
+def list_queued_job_ids() -> List[str]:
+    with connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT id FROM orchestration_jobs WHERE status='queued' ORDER BY created_at")
+        rows = cur.fetchall()
+    return [r["id"] for r in rows]
@@ -0,0 +1,118 @@
+import base64
+import json
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+# Upper bound for prefix range scans: every string starting with ``p`` sorts in [p, p + _PREFIX_END).
+_PREFIX_END = "\U0010ffff"
+
+
+def encode_cursor(created_at: str, row_id: str) -> str:
+    """Opaque cursor pointing just after the row ``(created_at, row_id)``."""
+    raw = json.dumps([created_at, row_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """Inverse of encode_cursor; raises ValueError for anything it did not produce."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, row_id = json.loads(raw)
+    except Exception as exc:
+        raise ValueError("invalid cursor") from exc
+    if not isinstance(created_at, str) or not isinstance(row_id, str):
+        raise ValueError("invalid cursor")
+    return created_at, row_id
+
+
+# Page size used when a cursor is sent without ``limit``.
+DEFAULT_PAGE_SIZE = 100
+
+
+def page_limit(limit: Optional[int], cursor: Optional[str]) -> Optional[int]:
+    """Effective page size: None (every row, as before pagination) when neither ``limit`` nor ``cursor`` is given."""
+    if limit is None and cursor:
+        return DEFAULT_PAGE_SIZE
+    return limit
+
+
+# Keyset pagination needs these on every row, so sparse selections always include them.
+KEY_COLUMNS = ("id", "created_at")
+
+
+def resolve_fields(
+    fields: Optional[str], view: Optional[str], allowed: Sequence[str], summary: Sequence[str]
+) -> Optional[List[str]]:
+    """Columns to SELECT for ``fields=a,b`` / ``view=summary``; None means the full model.
+
+    Raises ValueError for unknown fields or views.
+    """
+    if fields:
+        requested = [f.strip() for f in fields.split(",") if f.strip()]
+        unknown = [f for f in requested if f not in allowed]
+        if unknown:
+            raise ValueError(f"unknown field(s): {', '.join(unknown)}; allowed: {', '.join(allowed)}")
+    elif view in (None, "", "full"):
+        return None
+    elif view == "summary":
+        requested = list(summary)
+    else:
+        raise ValueError(f"unknown view '{view}'; use 'full' or 'summary'")
+    return list(dict.fromkeys([*KEY_COLUMNS, *requested]))
+
+
+def rows_to_dicts(rows: Sequence[Any], json_columns: Mapping[str, Any] = {}) -> List[Dict[str, Any]]:
+    """Plain dicts for sparse selections.
+
+    Only the JSON columns actually selected are decoded; ``json_columns`` maps
+    each to the value used when the stored text is empty.
+    """
+    out = []
+    for r in rows:
+        item = dict(r)
+        for col, empty in json_columns.items():
+            if col in item:
+                item[col] = json.loads(item[col]) if item[col] else empty
+        out.append(item)
+    return out
+
+
+def prefix_range(prefix: str) -> Tuple[str, str]:
+    """Bounds for an index-friendly ``col >= ? AND col < ?`` prefix match (case-sensitive)."""
+    return prefix, prefix + _PREFIX_END
+
+
+def keyset_query(
+    table: str,
+    where: Sequence[str],
+    params: Sequence[Any],
+    limit: Optional[int],
+    cursor: Optional[str],
+    columns: str = "*",
+) -> Tuple[str, List[Any]]:
+    """Build a newest-first page query on ``(created_at, id)``.
+
+    One row beyond ``limit`` is requested so the caller can tell whether a
+    next page exists without a COUNT; ``limit=None`` reads every row.
+    """
+    clauses = list(where)
+    args = list(params)
+    if cursor:
+        clauses.append("(created_at, id) < (?, ?)")
+        args.extend(decode_cursor(cursor))
+    sql = f"SELECT {columns} FROM {table}"
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    sql += " ORDER BY created_at DESC, id DESC"
+    if limit is not None:
+        sql += " LIMIT ?"
+        args.append(limit + 1)
+    return sql, args
+
+
+def split_page(rows: Sequence[Any], limit: Optional[int]) -> Tuple[Sequence[Any], Optional[str]]:
+    """Trim the look-ahead row and return ``(rows, next_cursor)``."""
+    if limit is None or len(rows) <= limit:
+        return rows, None
+    page = rows[:limit]
+    last = page[-1]
+    return page, encode_cursor(last["created_at"], last["id"])
@@ -0,0 +1,140 @@
+import datetime
+import json
+import zlib
+from typing import List, Optional, Tuple
+
+from ..config import run_compress_min_bytes, run_compression
+from ..db import connection
+from ..orchestration.engine import (
+    OrchestrationArtifact,
+    OrchestrationPlan,
+    OrchestrationResult,
+    OrchestrationRun,
+    OrchestrationRunSummary,
+    OrchestrationUsage,
+    dumps_json,
+)
+from .pagination import keyset_query, split_page
+
+try:  # zstandard is optional; RUN_COMPRESSION=zstd falls back to zlib without it.
+    import zstandard
+except ImportError:  # pragma: no cover - depends on the environment
+    zstandard = None
+
+SUMMARY_COLUMNS = "id,flow_id,engine,duration_ms,executed_nodes,usage,created_at"
+
+def _now() -> str: return datetime.datetime.now(datetime.UTC).isoformat()
+
+def encode_blob(text: Optional[str]) -> Tuple[Optional[bytes], str]:
+    """``(stored bytes, encoding)``; text below RUN_COMPRESS_MIN_BYTES is kept as plain UTF-8 ("identity")."""
+    if text is None:
+        return None, "identity"
+    raw = text.encode("utf-8")
+    if len(raw) < run_compress_min_bytes():
+        return raw, "identity"
+    if run_compression() == "zstd" and zstandard is not None:
+        return zstandard.ZstdCompressor().compress(raw), "zstd"
+    return zlib.compress(raw, 6), "zlib"
+
+def decode_blob(data: Optional[bytes], encoding: str) -> Optional[str]:
+    """Inverse of encode_blob; raises RuntimeError for zstd rows when 'zstandard' is not installed."""
+    if data is None:
+        return None
+    if encoding == "zlib":
+        data = zlib.decompress(data)
+    elif encoding == "zstd":
+        if zstandard is None:
+            raise RuntimeError("run was stored with zstd; install the 'zstandard' package to read it")
+        data = zstandard.ZstdDecompressor().decompress(data)
+    return bytes(data).decode("utf-8")
+
+def _usage_json(usage: Optional[OrchestrationUsage]) -> Optional[str]:
+    return usage.model_dump_json() if usage is not None else None
+
+def _usage(text: Optional[str]) -> Optional[OrchestrationUsage]:
+    return OrchestrationUsage.model_validate_json(text) if text else None
+
+def _row_to_summary(r) -> OrchestrationRunSummary:
+    return OrchestrationRunSummary(
+        id=r["id"], flow_id=r["flow_id"], engine=r["engine"], duration_ms=r["duration_ms"],
+        node_count=len(json.loads(r["executed_nodes"] or "[]")), usage=_usage(r["usage"]), created_at=r["created_at"]
+    )
+
+def save_run(result: OrchestrationResult) -> str:
+    """Store a finished run and its artifacts in one transaction, keyed by ``result.request_id``.
+
+    Saving the same request_id again replaces the earlier copy.
+    """
+    if not result.request_id:
+        raise ValueError("result has no request_id")
+    logs, logs_encoding = encode_blob(dumps_json(result.logs or []))
+    artifacts = []
+    for node_id, artifact in result.plan.artifacts.items():
+        output, encoding = encode_blob(artifact.output)
+        artifacts.append(
+            (result.request_id, node_id, artifact.status, artifact.error, _usage_json(artifact.usage), output, encoding)
+        )
+    with connection() as conn:
+        cur = conn.cursor()
+        try:
+            cur.execute("DELETE FROM run_artifacts WHERE run_id=?", (result.request_id,))
+            cur.execute(
+                "INSERT OR REPLACE INTO runs "
+                "(id,flow_id,engine,duration_ms,routing,executed_nodes,usage,logs,logs_encoding,created_at) "
+                "VALUES (?,?,?,?,?,?,?,?,?,?)",
+                (
+                    result.request_id, result.flow_id, result.engine, result.duration_ms, result.plan.routing,
+                    dumps_json(result.plan.executed_nodes), _usage_json(result.usage), logs, logs_encoding, _now(),
+                ),
+            )
+            cur.executemany(
+                "INSERT INTO run_artifacts (run_id,node_id,status,error,usage,output,output_encoding) "
+                "VALUES (?,?,?,?,?,?,?)",
+                artifacts,
+            )
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+    return result.request_id
+
+def list_runs_page(
+    limit: int = 50, cursor: Optional[str] = None, flow_id: Optional[str] = None
+) -> Tuple[List[OrchestrationRunSummary], Optional[str]]:
+    """Newest-first page of run summaries (no logs or outputs are read); raises ValueError on a bad cursor."""
+    where, params = [], []
+    if flow_id:
+        where.append("flow_id=?")
+        params.append(flow_id)
+    sql, args = keyset_query("runs", where, params, limit, cursor, columns=SUMMARY_COLUMNS)
+    with connection() as conn:
+        cur = conn.cursor()
+        cur.execute(sql, args)
+        rows, next_cursor = split_page(cur.fetchall(), limit)
+    return [_row_to_summary(r) for r in rows], next_cursor
+
+def get_run(run_id: str) -> Optional[OrchestrationRun]:
+    with connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT * FROM runs WHERE id=?", (run_id,))
+        r = cur.fetchone()
+        if not r:
+            return None
+        cur.execute("SELECT * FROM run_artifacts WHERE run_id=? ORDER BY rowid", (run_id,))
+        artifact_rows = cur.fetchall()
+    artifacts = {
+        a["node_id"]: OrchestrationArtifact(
+            status=a["status"], output=decode_blob(a["output"], a["output_encoding"]), error=a["error"],
+            usage=_usage(a["usage"]),
+        )
+        for a in artifact_rows
+    }
+    logs = decode_blob(r["logs"], r["logs_encoding"])
+    summary = _row_to_summary(r)
+    return OrchestrationRun(
+        **summary.model_dump(),
+        plan=OrchestrationPlan(
+            executed_nodes=json.loads(r["executed_nodes"] or "[]"), artifacts=artifacts, routing=r["routing"]
+        ),
+        logs=json.loads(logs) if logs else [],
+    )
@@ -0,0 +1,81 @@
+import datetime
+from typing import Dict, List, Optional, Tuple
+
+from ..db import connection
+from ..models import Flow, UsageRecord
+from ..orchestration.engine import OrchestrationResult
+from .flows_service import node_agent_id
+
+_UPSERT_USAGE = (
+    "INSERT INTO usage_daily "
+    "(day,flow_id,agent_id,model,calls,prompt_tokens,completion_tokens,total_tokens,latency_ms) "
+    "VALUES (?,?,?,?,?,?,?,?,?) ON CONFLICT(flow_id, day, agent_id, model) DO UPDATE SET "
+    "calls=calls+excluded.calls, prompt_tokens=prompt_tokens+excluded.prompt_tokens, "
+    "completion_tokens=completion_tokens+excluded.completion_tokens, total_tokens=total_tokens+excluded.total_tokens, "
+    "latency_ms=latency_ms+excluded.latency_ms"
+)
+
+def _row_to_usage(r) -> UsageRecord:
+    return UsageRecord(
+        day=r["day"], flow_id=r["flow_id"], agent_id=r["agent_id"] or None, model=r["model"] or None,
+        calls=r["calls"], prompt_tokens=r["prompt_tokens"], completion_tokens=r["completion_tokens"],
+        total_tokens=r["total_tokens"], latency_ms=r["latency_ms"],
+    )
+
+def record_run_usage(flow: Flow, result: OrchestrationResult, day: Optional[str] = None) -> int:
+    """Fold every node usage of ``result`` into today's (UTC) rows; returns how many rows were upserted."""
+    nodes = {str(n.get("id")): n for n in (flow.graph_json or {}).get("nodes") or [] if isinstance(n, dict)}
+    totals: Dict[Tuple[str, str], List[int]] = {}
+    for node_id, artifact in result.plan.artifacts.items():
+        usage = artifact.usage
+        if usage is None:
+            continue
+        key = (node_agent_id(nodes.get(node_id)) or "", usage.model or "")
+        row = totals.setdefault(key, [0, 0, 0, 0, 0])
+        row[0] += 1
+        row[1] += usage.prompt_tokens
+        row[2] += usage.completion_tokens
+        row[3] += usage.total_tokens
+        row[4] += usage.latency_ms
+    if not totals:
+        return 0
+    day = day or datetime.datetime.now(datetime.UTC).date().isoformat()
+    params = [(day, flow.id, agent_id, model, *sums) for (agent_id, model), sums in totals.items()]
+    with connection() as conn:
+        cur = conn.cursor()
+        try:
+            cur.executemany(_UPSERT_USAGE, params)
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+    return len(params)
+
+def list_usage(
+    flow_id: Optional[str] = None,
+    agent_id: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+) -> List[UsageRecord]:
+    """Daily usage rows, newest day first; ``since``/``until`` are inclusive ``YYYY-MM-DD`` bounds."""
+    where, params = [], []
+    if flow_id:
+        where.append("flow_id=?")
+        params.append(flow_id)
+    if agent_id:
+        where.append("agent_id=?")
+        params.append(agent_id)
+    if since:
+        where.append("day>=?")
+        params.append(since)
+    if until:
+        where.append("day<=?")
+        params.append(until)
+    sql = "SELECT * FROM usage_daily"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    with connection() as conn:
+        cur = conn.cursor()
+        cur.execute(sql + " ORDER BY day DESC, total_tokens DESC", params)
+        rows = cur.fetchall()
+    return [_row_to_usage(r) for r in rows]
@@ -0,0 +1,34 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models import AgentCreate
+from app.services import agents_service
+
+_client = TestClient(app)
+
+# Two nodes joined by one edge: the smallest flow that exercises ordering and context.
+CHAIN_GRAPH = {"nodes": [{"id": "a"}, {"id": "b"}], "edges": [{"from": "a", "to": "b"}]}
+
+
+@pytest.fixture
+def make_agent():
+    """Create an agent through the service layer: ``make_agent("Writer", role="Editor")``."""
+
+    def create(name, **fields):
+        data = {"role": "r", "goal": "g", "backstory": "b", **fields}
+        return agents_service.create_agent(AgentCreate(name=name, **data))
+
+    return create
+
+
+@pytest.fixture
+def make_flow():
+    """Create a flow through the API and return its id; the graph defaults to ``CHAIN_GRAPH``."""
+
+    def create(name, graph=None):
+        resp = _client.post("/flows", json={"name": name, "graph_json": graph or CHAIN_GRAPH})
+        assert resp.status_code == 201
+        return resp.json()["id"]
+
+    return create
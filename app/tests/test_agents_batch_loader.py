@@ -0,0 +1,69 @@
+import sqlite3
+import uuid
+
+import pytest
+
+from app.db import init_db
+from app.models import AgentCreate
+from app.services import agents_service as svc
+
+
+def _count_queries(monkeypatch):
+    calls = {"count": 0}
+    real_connection = svc.connection
+
+    def counting_connection():
+        calls["count"] += 1
+        return real_connection()
+
+    monkeypatch.setattr(svc, "connection", counting_connection)
+    return calls
+
+
+def test_get_agents_by_ids_loads_in_one_query_and_reuses_cache(monkeypatch, make_agent):
+    init_db()
+    a, b = make_agent("Batch A"), make_agent("Batch B")
+    calls = _count_queries(monkeypatch)
+
+    loaded = svc.get_agents_by_ids([a.id, b.id, a.id, "missing"])
+    assert set(loaded) == {a.id, b.id}
+    assert loaded[b.id].name == "Batch B"
+    assert calls["count"] == 1
+
+    svc.get_agents_by_ids([a.id, b.id])
+    assert calls["count"] == 1
+
+
+def test_writes_evict_cached_agents(make_agent):
+    init_db()
+    a = make_agent("Before")
+    assert svc.get_agents_by_ids([a.id])[a.id].name == "Before"
+
+    svc.update_agent(a.id, {"name": "After"})
+    assert svc.get_agents_by_ids([a.id])[a.id].name == "After"
+
+    svc.delete_agent(a.id)
+    assert svc.get_agents_by_ids([a.id]) == {}
+
+
+def test_cache_disabled_with_zero_ttl(monkeypatch, make_agent):
+    init_db()
+    a = make_agent("No Cache")
+    monkeypatch.setenv("AGENT_CACHE_TTL_SEC", "0")
+    calls = _count_queries(monkeypatch)
+    svc.get_agents_by_ids([a.id])
+    svc.get_agents_by_ids([a.id])
+    assert calls["count"] == 2
+
+
+def test_bulk_create_is_all_or_nothing(monkeypatch):
+    init_db()
+    items = [AgentCreate(name=f"Bulk {i}", role="r", goal="g", backstory="b") for i in range(3)]
+    created = svc.create_agents_bulk(items)
+    assert set(svc.get_agents_by_ids([a.id for a in created])) == {a.id for a in created}
+
+    fixed = uuid.uuid4()
+    monkeypatch.setattr("app.models.uuid.uuid4", lambda: fixed)
+    with pytest.raises(sqlite3.IntegrityError):
+        svc.create_agents_bulk(items)
+    assert svc.get_agents_by_ids([str(fixed)]) == {}
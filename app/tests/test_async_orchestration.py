@@ -0,0 +1,68 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from app.integrations.crewai_client import CrewAIClient
+from app.orchestration.engines import langchain_engine
+from app.orchestration.engines.langchain_engine import LangChainEngine
+from app.orchestration.scheduler import aiter_dag, build_graph
+
+
+def test_aiter_dag_runs_independent_nodes_concurrently():
+    nodes = [{"id": "root"}] + [{"id": f"n{i}"} for i in range(5)]
+    graph = build_graph({"nodes": nodes, "edges": [{"from": "root", "to": f"n{i}"} for i in range(5)]})
+
+    async def execute(node):
+        if node["id"] != "root":
+            await asyncio.sleep(0.1)
+        return node["id"]
+
+    async def collect():
+        return [nid async for nid, _ in aiter_dag(graph, execute, max_concurrency=5)]
+
+    start = time.perf_counter()
+    done = asyncio.run(collect())
+    assert time.perf_counter() - start < 0.3
+    assert done[0] == "root" and sorted(done[1:]) == [f"n{i}" for i in range(5)]
+
+
+def test_crewai_client_async_retries_without_blocking_sleep(monkeypatch):
+    calls = {"count": 0}
+
+    class DummyAsyncClient:
+        async def post(self, url, json=None, headers=None, timeout=None):
+            calls["count"] += 1
+            raise httpx.ReadTimeout("timeout", request=httpx.Request("POST", url))
+
+    def _blocking_sleep(*args, **kwargs):
+        raise AssertionError("time.sleep must not be used on the async path")
+
+    monkeypatch.setattr("time.sleep", _blocking_sleep)
+
+    client = CrewAIClient(
+        api_key="key-123",
+        base_url="https://api.crewai.fake",
+        max_retries=2,
+        backoff_sec=0,
+        async_http_client=DummyAsyncClient(),
+    )
+    with pytest.raises(httpx.ReadTimeout):
+        asyncio.run(client.arun_node(prompt="timeout", context={"node": "n1"}))
+    assert calls["count"] == 3
+
+
+def test_langchain_engine_arun_uses_async_model(monkeypatch):
+    agent = SimpleNamespace(name="Async Agent", role="Tester", prompt="Resuma.")
+    monkeypatch.setattr(langchain_engine.agents_service, "get_agents_by_ids", lambda ids: {i: agent for i in ids})
+
+    engine = LangChainEngine()
+    flow = {
+        "nodes": [{"id": "a", "agentId": "x"}, {"id": "b", "agentId": "x"}],
+        "edges": [{"from": "a", "to": "b"}],
+    }
+    result = asyncio.run(engine.arun(flow, {"subject": "async"}))
+    assert result.plan.executed_nodes == ["a", "b"]
+    assert "langchain-stub" in result.plan.artifacts["b"].output
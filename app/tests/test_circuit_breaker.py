@@ -0,0 +1,136 @@
+import time
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app.integrations.circuit_breaker import CircuitBreaker, CircuitOpenError, counts_as_failure, get_breaker
+from app.integrations.crewai_client import CrewAIClient
+from app.main import app
+from app.metrics import CIRCUIT_STATE
+
+client = TestClient(app)
+
+
+def _status_error(code):
+    request = httpx.Request("POST", "https://x")
+    return httpx.HTTPStatusError("x", request=request, response=httpx.Response(code, request=request))
+
+
+def test_failure_classification():
+    assert counts_as_failure(httpx.ConnectError("refused"))
+    assert counts_as_failure(_status_error(502))
+    assert not counts_as_failure(_status_error(404))
+    assert not counts_as_failure(_status_error(429))
+    assert not counts_as_failure(ValueError("CrewAI returned status=error"))
+
+
+def test_opens_on_failure_rate_then_half_open_probe_closes():
+    breaker = CircuitBreaker("test-open", failure_rate=0.5, min_calls=4, window=10, open_sec=0.05)
+    for exc in (None, RuntimeError("down"), None):
+        breaker.before_call()
+        breaker.record(0.01, exc)
+    assert breaker.state == "closed"
+    breaker.before_call()
+    breaker.record(0.01, RuntimeError("down"))
+    assert breaker.state == "open"
+    assert CIRCUIT_STATE.labels("test-open").value() == 2
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    time.sleep(0.06)
+    breaker.before_call()
+    assert breaker.state == "half_open"
+    # Only the probe goes out while half-open.
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record(0.01)
+    assert breaker.state == "closed" and CIRCUIT_STATE.labels("test-open").value() == 0
+
+
+def test_failed_probe_reopens_and_slow_calls_count():
+    breaker = CircuitBreaker("test-slow", failure_rate=1.0, min_calls=2, window=2, open_sec=0.05, slow_call_sec=0.5)
+    for _ in range(2):
+        breaker.before_call()
+        breaker.record(1.0)
+    assert breaker.state == "open"
+    time.sleep(0.06)
+    with pytest.raises(RuntimeError):
+        with breaker.guard():
+            raise RuntimeError("still down")
+    assert breaker.state == "open"
+
+
+def test_cancelled_probe_does_not_close_the_breaker():
+    import asyncio
+
+    from app.integrations.langchain_client import guard_chat_model
+
+    breaker = CircuitBreaker("test-cancel", failure_rate=0.5, min_calls=1, window=4, open_sec=0.05)
+    breaker.before_call()
+    breaker.record(0.01, RuntimeError("down"))
+    assert breaker.state == "open"
+    time.sleep(0.06)
+
+    class _SlowModel:
+        async def ainvoke(self, messages, **kwargs):
+            await asyncio.sleep(60)
+
+    async def cancel_probe():
+        probe = asyncio.create_task(guard_chat_model(_SlowModel(), breaker).ainvoke("hi"))
+        await asyncio.sleep(0.01)
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+
+    asyncio.run(cancel_probe())
+    assert breaker.state == "half_open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    # The unanswered probe expires after open_sec and a new one may go out.
+    time.sleep(0.06)
+    breaker.before_call()
+    assert breaker.state == "half_open"
+
+
+def test_crewai_fails_fast_while_open(monkeypatch):
+    monkeypatch.setenv("CIRCUIT_MIN_CALLS", "2")
+    monkeypatch.setenv("CIRCUIT_OPEN_SEC", "60")
+    monkeypatch.setattr("time.sleep", lambda _: None)
+    calls = {"n": 0}
+
+    def handler(request):
+        calls["n"] += 1
+        return httpx.Response(500, json={"detail": "boom"})
+
+    base_url = "https://crew-breaker.test"
+    crew = CrewAIClient(
+        api_key="k", base_url=base_url, max_retries=3, backoff_sec=0,
+        http_client=httpx.Client(transport=httpx.MockTransport(handler)),
+    )
+    with pytest.raises(CircuitOpenError):
+        crew.run_node(prompt="hi")
+    assert calls["n"] == 2 and get_breaker(base_url).state == "open"
+    with pytest.raises(CircuitOpenError):
+        crew.run_node(prompt="hi")
+    assert calls["n"] == 2
+
+    metrics = client.get("/metrics").text
+    assert f'circuit_breaker_state{{endpoint="{base_url}"}} 2' in metrics
+
+
+def test_open_circuit_maps_to_503(monkeypatch):
+    from app.routers import orchestrate
+
+    class _Runner:
+        name = "fake"
+
+        async def arun(self, flow, inputs):
+            raise CircuitOpenError("https://llm.test", 12.3)
+
+    monkeypatch.setattr(orchestrate, "_engine_or_http_error", lambda key: _Runner())
+    graph = {"nodes": [{"id": "a"}], "edges": []}
+    flow_id = client.post("/flows", json={"name": "Breaker Flow", "graph_json": graph}).json()["id"]
+    resp = client.post("/orchestrate/run", json={"engine": "fake", "flow_id": flow_id, "inputs": {}})
+    assert resp.status_code == 503
+    assert resp.headers["retry-after"] == "12"
@@ -22,16 +22,8 @@ def test_crewai_client_success(monkeypatch):
     recorded = {}
 
     class DummyClient:
-        def __init__(self, *args, **kwargs):
-            recorded["timeout"] = kwargs.get("timeout")
-
-        def __enter__(self):
-            return self
-
-        def __exit__(self, exc_type, exc, tb):
-            return False
-
-        def post(self, url, json=None, headers=None):
+        def post(self, url, json=None, headers=None, timeout=None):
+            recorded["timeout"] = timeout
             recorded["url"] = url
             recorded["payload"] = json
             recorded["headers"] = headers
@@ -44,9 +36,13 @@ def test_crewai_client_success(monkeypatch):
                 },
             )
 
-    monkeypatch.setattr(httpx, "Client", DummyClient)
-
-    client = CrewAIClient(api_key="key-123", base_url="https://api.crewai.fake", timeout_sec=12, max_retries=0)
+    client = CrewAIClient(
+        api_key="key-123",
+        base_url="https://api.crewai.fake",
+        timeout_sec=12,
+        max_retries=0,
+        http_client=DummyClient(),
+    )
     resp = client.run_node(
         prompt="Generate summary",
         context={
@@ -68,21 +64,12 @@ def test_crewai_client_success(monkeypatch):
 
 def test_crewai_client_error_payload(monkeypatch):
     class DummyClient:
-        def __init__(self, *args, **kwargs):
-            pass
-
-        def __enter__(self):
-            return self
-
-        def __exit__(self, exc_type, exc, tb):
-            return False
-
-        def post(self, url, json=None, headers=None):
+        def post(self, url, json=None, headers=None, timeout=None):
             return _DummyResponse(200, {"status": "error", "error": {"message": "invalid prompt"}})
 
-    monkeypatch.setattr(httpx, "Client", DummyClient)
-
-    client = CrewAIClient(api_key="key-123", base_url="https://api.crewai.fake", max_retries=0)
+    client = CrewAIClient(
+        api_key="key-123", base_url="https://api.crewai.fake", max_retries=0, http_client=DummyClient()
+    )
     with pytest.raises(ValueError) as excinfo:
         client.run_node(prompt="bad", context={"node": "n1"})
     assert "invalid prompt" in str(excinfo.value)
@@ -92,23 +79,24 @@ def test_crewai_client_timeout_retries(monkeypatch):
     calls = {"count": 0}
 
     class DummyClient:
-        def __init__(self, *args, **kwargs):
-            pass
-
-        def __enter__(self):
-            return self
-
-        def __exit__(self, exc_type, exc, tb):
-            return False
-
-        def post(self, url, json=None, headers=None):
+        def post(self, url, json=None, headers=None, timeout=None):
             calls["count"] += 1
             raise httpx.ReadTimeout("timeout", request=httpx.Request("POST", url))
 
-    monkeypatch.setattr(httpx, "Client", DummyClient)
     monkeypatch.setattr("time.sleep", lambda *args, **kwargs: None)
 
-    client = CrewAIClient(api_key="key-123", base_url="https://api.crewai.fake", max_retries=2, backoff_sec=0)
+    client = CrewAIClient(
+        api_key="key-123", base_url="https://api.crewai.fake", max_retries=2, backoff_sec=0, http_client=DummyClient()
+    )
     with pytest.raises(httpx.ReadTimeout):
         client.run_node(prompt="timeout", context={"node": "n1"})
     assert calls["count"] == 3
+
+
+def test_crewai_clients_share_one_connection_pool():
+    from app.integrations.crewai_client import get_shared_client
+
+    first = CrewAIClient(api_key="a")
+    second = CrewAIClient(api_key="b")
+    assert first._http_client is None and second._http_client is None
+    assert get_shared_client() is get_shared_client()
@@ -9,10 +9,10 @@ def test_crewai_real_http_mode_engine_error(monkeypatch):
     monkeypatch.setenv("CREWAI_API_KEY", "dummy-key")
     monkeypatch.setenv("CREWAI_HTTP_MODE", "http")
 
-    def fake_run_node(self, prompt: str, context=None):  # noqa: ANN001
+    async def fake_run_node(self, prompt: str, context=None):  # noqa: ANN001
         return {"status": "error", "error": "invalid_prompt"}
 
-    monkeypatch.setattr(CrewAIClient, "run_node", fake_run_node)
+    monkeypatch.setattr(CrewAIClient, "arun_node", fake_run_node)
 
     client = TestClient(app)
     rf = client.post(
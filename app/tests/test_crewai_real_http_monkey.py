@@ -10,11 +10,11 @@ def test_crewai_real_http_mode_with_monkeypatched_client(monkeypatch):
     monkeypatch.setenv("CREWAI_API_KEY", "dummy-key")
     monkeypatch.setenv("CREWAI_HTTP_MODE", "http")
 
-    def fake_run_node(self, prompt: str, context=None):  # noqa: ANN001
+    async def fake_run_node(self, prompt: str, context=None):  # noqa: ANN001
         node = (context or {}).get("node", "?")
         return {"status": "ok", "output": f"http-out-{node}"}
 
-    monkeypatch.setattr(CrewAIClient, "run_node", fake_run_node)
+    monkeypatch.setattr(CrewAIClient, "arun_node", fake_run_node)
 
     client = TestClient(app)
     rf = client.post(
@@ -10,7 +10,7 @@ def test_crewai_real_http_payload_contains_model_and_edges(monkeypatch):
     monkeypatch.setenv("CREWAI_HTTP_MODE", "http")
     monkeypatch.setenv("CREWAI_MODEL", "crewai-large")
 
-    def fake_run_node(self, prompt: str, context=None):  # noqa: ANN001
+    async def fake_run_node(self, prompt: str, context=None):  # noqa: ANN001
         assert isinstance(prompt, str) and "node:" in prompt
         ctx = context or {}
         assert ctx.get("model") == os.getenv("CREWAI_MODEL")
@@ -19,7 +19,7 @@ def test_crewai_real_http_payload_contains_model_and_edges(monkeypatch):
         assert ctx["inputs"]["prompt"] == "P"
         return {"status": "ok", "output": f"ok-{ctx.get('node','?')}"}
 
-    monkeypatch.setattr(CrewAIClient, "run_node", fake_run_node)
+    monkeypatch.setattr(CrewAIClient, "arun_node", fake_run_node)
 
     client = TestClient(app)
     rf = client.post(
@@ -0,0 +1,47 @@
+import sqlite3
+
+import pytest
+
+from app.db import ConnectionPool
+
+
+def test_pool_reuses_connections(tmp_path):
+    pool = ConnectionPool(tmp_path / "pool.db", size=2)
+    first = pool.acquire()
+    first.close()
+    second = pool.acquire()
+    assert second is first
+    second.close()
+    pool.close()
+
+
+def test_pool_applies_pragmas(tmp_path):
+    pool = ConnectionPool(tmp_path / "pragmas.db", size=1, busy_timeout_ms=1234)
+    conn = pool.acquire()
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0].lower() == "wal"
+    assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 1234
+    conn.close()
+    pool.close()
+
+
+def test_pool_times_out_when_exhausted(tmp_path):
+    pool = ConnectionPool(tmp_path / "exhausted.db", size=1, timeout=0.05)
+    held = pool.acquire()
+    with pytest.raises(sqlite3.OperationalError):
+        pool.acquire()
+    held.close()
+    pool.acquire().close()
+    pool.close()
+
+
+def test_pool_rolls_back_uncommitted_work_on_release(tmp_path):
+    pool = ConnectionPool(tmp_path / "rollback.db", size=1)
+    conn = pool.acquire()
+    conn.execute("CREATE TABLE t (v INTEGER)")
+    conn.commit()
+    conn.execute("INSERT INTO t VALUES (1)")
+    conn.close()
+    conn = pool.acquire()
+    assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
+    conn.close()
+    pool.close()
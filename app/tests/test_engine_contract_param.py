@@ -31,7 +31,7 @@ def test_engine_contract_success(engine):
     assert data["engine"] == engine
     assert data["flow_id"] == flow_id
     plan = data["plan"]
-    assert plan["routing"] == "sequential"
+    assert plan["routing"] == "dag-parallel"
     assert plan["executed_nodes"] == node_ids
     assert set(plan["artifacts"].keys()) == set(node_ids)
     # artifacts have status ok
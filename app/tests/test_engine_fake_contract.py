@@ -1,5 +1,8 @@
+import json
+
 from fastapi.testclient import TestClient
 from app.main import app
+from app.orchestration.engine import LogEmitter
 
 client = TestClient(app)
 
@@ -27,7 +30,7 @@ def test_fake_engine_success_contract():
     assert data["flow_id"] == flow_id
     assert "plan" in data and "logs" in data
     plan = data["plan"]
-    assert plan["routing"] == "sequential"
+    assert plan["routing"] == "dag-parallel"
     assert plan["executed_nodes"] == ["n1", "n2"]
     assert set(plan["artifacts"].keys()) == {"n1", "n2"}
     assert plan["artifacts"]["n1"]["status"] == "ok"
@@ -44,3 +47,31 @@ def test_fake_engine_reports_error():
     assert rr.status_code == 400
     assert "invalid_prompt" in rr.text
 
+
+
+def test_fake_engine_logs_carry_bound_context():
+    flow_id = _create_simple_flow()
+    rr = client.post("/orchestrate/run", json={"engine": "fake", "flow_id": flow_id})
+    assert rr.status_code == 200
+    data = rr.json()
+    entries = [json.loads(line) for line in data["logs"]]
+    assert entries[-1]["msg"] == "orchestration_summary"
+    assert entries[-1]["executed_nodes"] == 2
+    for entry in entries:
+        assert entry["request_id"] == data["request_id"]
+        assert entry["engine"] == "fake"
+        assert entry["flow_id"] == flow_id
+    assert {e.get("node") for e in entries} >= {"n1", "n2"}
+
+
+def test_log_emitter_serializes_context_and_payload_once():
+    event = LogEmitter(request_id="r1", engine="fake", flow_id=None).emit("hello", node="n1", payload={"cache": "hit"})
+    assert json.loads(event.line) == {
+        "ts": event.ts,
+        "level": "info",
+        "request_id": "r1",
+        "engine": "fake",
+        "cache": "hit",
+        "msg": "hello",
+        "node": "n1",
+    }
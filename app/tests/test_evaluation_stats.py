@@ -0,0 +1,57 @@
+import math
+import statistics
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+client = TestClient(app)
+
+
+def test_agent_stats_track_each_evaluation(make_agent):
+    agent = make_agent("Stats Agent")
+    empty = client.get(f"/agents/{agent.id}/stats")
+    assert empty.status_code == 200
+    assert empty.json() == {
+        "agent_id": agent.id, "count": 0, "mean": None, "stddev": None, "min": None, "max": None, "last_at": None
+    }
+
+    scores = [3.0, 4.5, 1.5, 5.0]
+    created = [client.post("/evaluations", json={"agent_id": agent.id, "score": s}).json() for s in scores]
+
+    stats = client.get(f"/agents/{agent.id}/stats").json()
+    assert stats["count"] == 4
+    assert math.isclose(stats["mean"], statistics.fmean(scores))
+    assert math.isclose(stats["stddev"], statistics.pstdev(scores))
+    assert (stats["min"], stats["max"]) == (1.5, 5.0)
+    assert stats["last_at"] == max(e["created_at"] for e in created)
+
+
+def test_evaluation_stats_filtered_by_agent(make_agent):
+    a, b, unevaluated = make_agent("Stats A"), make_agent("Stats B"), make_agent("Stats C")
+    client.post("/evaluations", json={"agent_id": a.id, "score": 2})
+    client.post("/evaluations", json={"agent_id": b.id, "score": 4})
+    client.post("/evaluations", json={"agent_id": b.id, "score": 5})
+
+    params = [("agent_id", b.id), ("agent_id", a.id), ("agent_id", unevaluated.id)]
+    resp = client.get("/evaluations/stats", params=params)
+    assert resp.status_code == 200
+    by_agent = {row["agent_id"]: row for row in resp.json()}
+    assert set(by_agent) == {a.id, b.id}
+    assert by_agent[a.id]["count"] == 1 and by_agent[a.id]["stddev"] == 0
+    assert by_agent[b.id]["count"] == 2 and by_agent[b.id]["mean"] == 4.5
+
+
+def test_agent_stats_unknown_agent():
+    assert client.get("/agents/does-not-exist/stats").status_code == 404
+
+
+def test_evaluation_stats_accepts_more_ids_than_sqlite_parameters(make_agent):
+    from app.services import evals_service
+
+    a, b = make_agent("Stats Many A"), make_agent("Stats Many B")
+    client.post("/evaluations", json={"agent_id": a.id, "score": 3})
+    client.post("/evaluations", json={"agent_id": b.id, "score": 1})
+    ids = [f"missing-{i}" for i in range(2000)] + [b.id, a.id]
+    stats = evals_service.list_evaluation_stats(ids)
+    assert [s.agent_id for s in stats] == sorted([a.id, b.id])
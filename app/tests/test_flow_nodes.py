@@ -0,0 +1,41 @@
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models import FlowCreate
+from app.services import agents_service, flows_service
+
+client = TestClient(app)
+
+
+def test_agent_flows_follow_create_update_and_delete(make_agent):
+    writer, reviewer = make_agent("Writer"), make_agent("Reviewer")
+    flow = flows_service.create_flow(
+        FlowCreate(
+            name="Refs",
+            graph_json={"nodes": [{"id": "n1", "agentId": writer.id}, {"id": reviewer.id, "type": "agent"}]},
+        )
+    )
+    assert [f["id"] for f in client.get(f"/agents/{writer.id}/flows").json()] == [flow.id]
+    assert [f["id"] for f in client.get(f"/agents/{reviewer.id}/flows").json()] == [flow.id]
+
+    flows_service.update_flow(flow.id, {"graph_json": {"nodes": [{"id": "n1", "agentId": reviewer.id}]}})
+    assert client.get(f"/agents/{writer.id}/flows").json() == []
+    assert [f["id"] for f in client.get(f"/agents/{reviewer.id}/flows").json()] == [flow.id]
+
+    flows_service.delete_flow(flow.id)
+    assert client.get(f"/agents/{reviewer.id}/flows").json() == []
+    assert client.get("/agents/missing-agent/flows").status_code == 404
+
+
+def test_run_rejects_flows_with_unknown_agents(make_agent):
+    agent = make_agent("Short-lived")
+    flow = flows_service.create_flow(
+        FlowCreate(name="Dangling", graph_json={"nodes": [{"id": "a", "agentId": agent.id}, {"id": "b"}]})
+    )
+    assert flows_service.missing_agent_ids(flow.id) == []
+
+    agents_service.delete_agent(agent.id)
+    assert flows_service.missing_agent_ids(flow.id) == [agent.id]
+    resp = client.post("/orchestrate/run", json={"engine": "fake", "flow_id": flow.id})
+    assert resp.status_code == 400
+    assert agent.id in resp.json()["detail"]
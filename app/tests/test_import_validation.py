@@ -1,7 +1,9 @@
 from __future__ import annotations
 
 import json
+import uuid
 
+import pytest
 from fastapi.testclient import TestClient
 
 from app.main import app
@@ -100,6 +102,32 @@ def test_agents_import_file_rejects_over_limit(monkeypatch):
     assert "limit_bytes" in detail
 
 
+def test_yaml_import_is_capped_even_without_a_file_limit(monkeypatch):
+    data_bytes = "- name: Agent 1\n  role: R1\n  prompt: ok\n".encode("utf-8") * 10
+    monkeypatch.setattr("app.routers.io_support.import_max_file_bytes", lambda: 0)
+    monkeypatch.setattr("app.routers.io_support.import_max_buffered_bytes", lambda: len(data_bytes) - 1)
+    resp = client.post(
+        "/agents/import",
+        data={"file_format": "yaml"},
+        files={"file": ("agents.yaml", data_bytes, "application/yaml")},
+    )
+    assert resp.status_code == 413
+
+
+def test_invalid_upload_is_rejected_before_any_write(monkeypatch):
+    def write(batches, keep):
+        raise AssertionError("no write transaction for an invalid upload")
+
+    monkeypatch.setattr("app.routers.flows_io.svc.create_flows_batched", write)
+    items = [{"name": "Valid", "graph_json": {"nodes": []}}] * 3 + [{"name": "", "graph_json": {}}]
+    resp = client.post(
+        "/flows/import",
+        files={"file": ("flows.json", json.dumps(items).encode("utf-8"), "application/json")},
+    )
+    assert resp.status_code == 422
+    assert resp.json()["detail"]["index"] == 3
+
+
 def test_flow_validate_endpoint_returns_errors():
     payload = {"name": "", "graph_json": {"nodes": "invalid-type"}}
     resp = client.post("/flows/validate", json=payload)
@@ -152,3 +180,84 @@ def test_flow_validate_success_message():
     body = resp.json()
     assert body["ok"] is True
     assert body["message"] == "Validation passed."
+
+
+def _chars(text):
+    return iter(list(text))
+
+
+def test_streaming_json_parser_handles_arrays_ndjson_and_items_wrapper():
+    from app.routers.io_support import _iter_json_items
+
+    assert list(_iter_json_items(_chars(' [ {"a": 1}, {"b": [1, 2]} , {"n": 12345} ] '))) == [
+        {"a": 1},
+        {"b": [1, 2]},
+        {"n": 12345},
+    ]
+    assert list(_iter_json_items(_chars('{"a": 1}\n{"a": 2}\n'))) == [{"a": 1}, {"a": 2}]
+    assert list(_iter_json_items(_chars('{"items": [{"a": 1}]}'))) == [{"a": 1}]
+    assert list(_iter_json_items(_chars("[]"))) == []
+
+
+def test_streaming_json_parser_handles_brackets_and_escapes_inside_strings():
+    from app.routers.io_support import _iter_json_items
+
+    text = '[{"a": "x\\"]}{", "b": ["\\\\"]}, "s", 7]'
+    assert list(_iter_json_items(_chars(text))) == json.loads(text)
+
+
+def test_streaming_json_parser_is_linear_for_one_large_item():
+    import time
+
+    from app.routers.io_support import UPLOAD_CHUNK_BYTES, _iter_json_items
+
+    def parse_seconds(nodes):
+        item = {"name": "big", "graph_json": {"nodes": [{"id": f"n{i}", "text": "x" * 200} for i in range(nodes)]}}
+        text = json.dumps([item])
+        best = float("inf")
+        for _ in range(3):
+            chunks = (text[i : i + UPLOAD_CHUNK_BYTES] for i in range(0, len(text), UPLOAD_CHUNK_BYTES))
+            start = time.perf_counter()
+            assert list(_iter_json_items(chunks)) == [item]
+            best = min(best, time.perf_counter() - start)
+        return best
+
+    # ~1 MB vs ~4.5 MB item in 64 KB chunks: linear parsing costs ~4x, quadratic ~16x.
+    assert parse_seconds(20000) / parse_seconds(5000) < 8
+
+
+def test_streaming_json_parser_rejects_broken_arrays():
+    from fastapi import HTTPException
+
+    from app.routers.io_support import _iter_json_items
+
+    with pytest.raises(HTTPException) as exc:
+        list(_iter_json_items(_chars('[{"a": 1} {"b": 2}]')))
+    assert exc.value.status_code == 400
+
+
+def test_flows_import_file_streams_ndjson(monkeypatch):
+    monkeypatch.setattr("app.routers.io_support.UPLOAD_CHUNK_BYTES", 256)
+    monkeypatch.setattr("app.routers.flows_io.import_batch_size", lambda: 20)
+    lines = "\n".join(json.dumps({"name": f"Streamed {i}", "graph_json": {"nodes": []}}) for i in range(120))
+    resp = client.post(
+        "/flows/import",
+        files={"file": ("flows.ndjson", lines.encode("utf-8"), "application/x-ndjson")},
+    )
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["count"] == 120
+    assert body["created"][0]["name"] == "Streamed 0"
+
+
+def test_flows_import_file_rolls_back_on_invalid_item(monkeypatch):
+    monkeypatch.setattr("app.routers.flows_io.import_batch_size", lambda: 2)
+    marker = f"Rollback {uuid.uuid4().hex[:8]}"
+    items = [{"name": marker, "graph_json": {"nodes": []}} for _ in range(4)] + [{"name": "", "graph_json": {}}]
+    resp = client.post(
+        "/flows/import",
+        files={"file": ("flows.json", json.dumps(items).encode("utf-8"), "application/json")},
+    )
+    assert resp.status_code == 422
+    assert resp.json()["detail"]["index"] == 4
+    assert client.get("/flows", params={"name_prefix": marker}).json() == []
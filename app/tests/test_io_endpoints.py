@@ -1,5 +1,11 @@
+import json
+
+import yaml
 from fastapi.testclient import TestClient
+from app.db import get_pool
 from app.main import app
+from app.models import AgentCreate
+from app.services import agents_service
 
 client = TestClient(app)
 
@@ -11,3 +17,44 @@ def test_export_flows_yaml():
     r = client.get("/flows/export?format=yaml")
     assert r.status_code == 200
     assert "Content-Type" in r.headers
+
+def test_export_flows_ndjson_streams_one_record_per_line():
+    created = client.post("/flows", json={"name": "NDJSON Flow", "graph_json": {"nodes": []}}).json()
+    r = client.get("/flows/export?format=ndjson")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    records = [json.loads(line) for line in r.text.splitlines()]
+    assert created["id"] in {rec["id"] for rec in records}
+
+
+def test_export_agents_yaml_stream_is_multi_document():
+    agent = agents_service.create_agent(AgentCreate(name="YAML Agent", role="r", goal="g", backstory="b"))
+    r = client.get("/agents/export?format=yaml-stream")
+    assert r.status_code == 200
+    docs = list(yaml.safe_load_all(r.text))
+    assert agent.id in {doc["id"] for doc in docs}
+
+
+def test_export_iterator_holds_no_connection_between_pages(monkeypatch):
+    monkeypatch.setattr(agents_service, "export_batch_size", lambda: 2)
+    for i in range(5):
+        agents_service.create_agent(AgentCreate(name=f"Iter Agent {i}", role="r", goal="g", backstory="b"))
+    pool = get_pool()
+    rows = agents_service.iter_agents()
+    exported = []
+    for agent in rows:
+        # A slow reader sits here; every pooled connection must be back in the pool.
+        assert pool._idle.qsize() == pool._created
+        exported.append(agent)
+    keys = [(a.created_at, a.id) for a in exported]
+    assert len(set(keys)) == len(keys) == len(agents_service.list_agents())
+    assert keys == sorted(keys, reverse=True)
+
+
+def test_import_flows_inserts_every_item():
+    items = [{"name": f"Imported {i}", "graph_json": {"nodes": []}} for i in range(30)]
+    r = client.post("/flows/import", json=items)
+    assert r.status_code == 200
+    data = r.json()
+    assert data["count"] == 30
+    assert {f["name"] for f in data["created"]} == {f"Imported {i}" for i in range(30)}
@@ -0,0 +1,58 @@
+from app.orchestration.engines.langchain_engine import _build_prompt, _select_context
+from app.orchestration.scheduler import build_graph
+
+
+def _chain(n):
+    return build_graph({
+        "nodes": [{"id": f"n{i}"} for i in range(n)],
+        "edges": [{"from": f"n{i}", "to": f"n{i + 1}"} for i in range(n - 1)],
+    })
+
+
+def test_context_defaults_to_direct_predecessors():
+    graph = _chain(5)
+    outputs = {nid: f"saida {nid}" for nid in graph.order}
+    assert _select_context(graph, "n4", outputs, 1, 0) == ({"n3": "saida n3"}, [])
+    assert _select_context(graph, "n4", outputs, 2, 0) == ({"n2": "saida n2", "n3": "saida n3"}, [])
+    assert _select_context(graph, "n0", outputs, 1, 0) == ({}, [])
+
+
+def test_budget_keeps_nearest_outputs_and_cuts_the_rest():
+    graph = _chain(4)
+    outputs = {nid: "é" * 50 for nid in graph.order}  # 100 bytes each
+    previous, omitted = _select_context(graph, "n3", outputs, None, 150)
+    assert list(previous) == ["n1", "n2"]
+    assert previous["n2"] == outputs["n2"]
+    assert previous["n1"].startswith("é" * 25) and "50 bytes omitidos" in previous["n1"]
+    assert omitted == ["n0"]
+
+    prompt = _build_prompt("Instrucao", {}, previous, omitted)
+    assert "[n2]\n" + outputs["n2"] in prompt
+    assert "limite de contexto: n0" in prompt
+
+
+def test_edgeless_flow_passes_previous_output(monkeypatch):
+    from types import SimpleNamespace
+
+    from app.orchestration.engines import langchain_engine
+    from app.orchestration.engines.langchain_engine import LangChainEngine
+
+    monkeypatch.setenv("LLM_CACHE_ENABLED", "0")
+    monkeypatch.setattr(
+        langchain_engine.agents_service,
+        "get_agents_by_ids",
+        lambda ids: {i: SimpleNamespace(name=i, role="Tester", prompt=f"Agente {i}.") for i in ids},
+    )
+    engine = LangChainEngine()
+    prompts = []
+
+    def invoke(messages, **kwargs):
+        prompts.append(messages[-1].content)
+        return SimpleNamespace(content=f"saida {len(prompts)}")
+
+    monkeypatch.setattr(engine._llm, "invoke", invoke)
+    # The UI saves flows with "edges": []; nodes run in list order and see the previous output.
+    flow = {"nodes": [{"id": "a", "agentId": "x"}, {"id": "b", "agentId": "y"}], "edges": []}
+    result = engine.run(flow, {"subject": "sem arestas"})
+    assert result.plan.executed_nodes == ["a", "b"]
+    assert "[a]\nsaida 1" in prompts[1]
@@ -0,0 +1,49 @@
+import threading
+
+import pytest
+
+from app.integrations import langchain_client
+from app.integrations.langchain_client import get_langchain_chat_model, reset_langchain_models
+from app.orchestration.engines.langchain_engine import LangChainEngine
+
+
+@pytest.fixture(autouse=True)
+def _fresh_registry():
+    reset_langchain_models()
+    yield
+    reset_langchain_models()
+
+
+def test_one_model_per_distinct_settings():
+    base = {"provider": "stub", "model": "", "temperature": 0}
+    first = get_langchain_chat_model(base)
+    assert get_langchain_chat_model(dict(base)) is first
+    assert get_langchain_chat_model({**base, "temperature": 0.5}) is not first
+
+    reset_langchain_models()
+    assert get_langchain_chat_model(base) is not first
+
+
+def test_engines_share_the_model_and_builds_happen_once(monkeypatch):
+    builds = {"count": 0}
+    real_factory = langchain_client.PROVIDER_FACTORIES["stub"]
+
+    def counting_factory(settings):
+        builds["count"] += 1
+        return real_factory(settings)
+
+    monkeypatch.setitem(langchain_client.PROVIDER_FACTORIES, "stub", counting_factory)
+    threads = [threading.Thread(target=LangChainEngine) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert builds["count"] == 1
+    assert LangChainEngine()._llm is LangChainEngine()._llm
+
+
+def test_failed_builds_are_not_cached():
+    with pytest.raises(RuntimeError):
+        get_langchain_chat_model({"provider": "unknown"})
+    with pytest.raises(RuntimeError):
+        get_langchain_chat_model({"provider": "unknown"})
@@ -0,0 +1,82 @@
+import uuid
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models import AgentCreate, EvaluationCreate
+from app.services import agents_service, evals_service
+
+client = TestClient(app)
+
+
+def _walk(path, params):
+    seen, cursor = [], None
+    while True:
+        query = dict(params, **({"cursor": cursor} if cursor else {}))
+        resp = client.get(path, params=query)
+        assert resp.status_code == 200
+        seen.extend(resp.json())
+        cursor = resp.headers.get("X-Next-Cursor")
+        if not cursor:
+            return seen
+
+
+def test_agents_keyset_pages_cover_every_match_once():
+    prefix = f"Paged Agent {uuid.uuid4().hex[:8]} "
+    created = [
+        agents_service.create_agent(AgentCreate(name=f"{prefix}{i}", role="r", goal="g", backstory="b")).id
+        for i in range(7)
+    ]
+    rows = _walk("/agents", {"limit": 3, "name_prefix": prefix})
+    assert sorted(r["id"] for r in rows) == sorted(created)
+    keys = [(r["created_at"], r["id"]) for r in rows]
+    assert keys == sorted(keys, reverse=True)
+
+
+def test_evaluations_filter_by_agent_and_score_range():
+    agent = agents_service.create_agent(AgentCreate(name="Scored", role="r", goal="g", backstory="b"))
+    for score in (1.0, 2.5, 4.0, 5.0):
+        evals_service.create_evaluation(EvaluationCreate(agent_id=agent.id, score=score))
+
+    rows = _walk("/evaluations", {"agent_id": agent.id, "min_score": 2, "max_score": 4.5, "limit": 1})
+    assert sorted(r["score"] for r in rows) == [2.5, 4.0]
+
+
+def test_invalid_cursor_is_rejected():
+    resp = client.get("/flows", params={"cursor": "not-a-cursor"})
+    assert resp.status_code == 400
+
+
+def test_summary_view_and_sparse_fields_select_only_requested_columns():
+    prefix = f"Sparse {uuid.uuid4().hex[:8]} "
+    for i in range(3):
+        client.post("/flows", json={"name": f"{prefix}{i}", "graph_json": {"nodes": [{"id": "n"}] * 50}})
+
+    summary = client.get("/flows", params={"name_prefix": prefix, "view": "summary", "limit": 2})
+    assert summary.status_code == 200
+    assert set(summary.json()[0]) == {"id", "created_at", "name", "description"}
+    assert summary.headers.get("X-Next-Cursor")
+
+    sparse = client.get("/flows", params={"name_prefix": prefix, "fields": "graph_json"})
+    assert len(sparse.json()[0]["graph_json"]["nodes"]) == 50
+
+    agents = client.get("/agents", params={"fields": "name,tools", "limit": 1}).json()
+    assert all(set(a) <= {"id", "created_at", "name", "tools"} for a in agents)
+
+
+def test_unknown_fields_or_view_are_rejected():
+    assert client.get("/flows", params={"fields": "name,secret"}).status_code == 400
+    assert client.get("/evaluations", params={"view": "tiny"}).status_code == 400
+
+
+def test_lists_without_limit_or_cursor_return_every_row():
+    prefix = f"Unpaged {uuid.uuid4().hex[:8]} "
+    for i in range(105):
+        agents_service.create_agent(AgentCreate(name=f"{prefix}{i}", role="r", goal="g", backstory="b"))
+    resp = client.get("/agents", params={"name_prefix": prefix})
+    assert len(resp.json()) == 105 and "X-Next-Cursor" not in resp.headers
+
+    first = client.get("/agents", params={"name_prefix": prefix, "limit": 100})
+    assert len(first.json()) == 100
+    rest = client.get("/agents", params={"name_prefix": prefix, "cursor": first.headers["X-Next-Cursor"]})
+    assert len(rest.json()) == 5
@@ -0,0 +1,115 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from app.integrations import llm_cache
+from app.integrations.langchain_messages import HumanMessage, SystemMessage
+from app.integrations.llm_cache import LLMResponseCache, fingerprint, should_cache
+from app.orchestration.engines import langchain_engine
+from app.orchestration.engines.langchain_engine import LangChainEngine
+
+
+@pytest.fixture(autouse=True)
+def _fresh_cache():
+    llm_cache.reset_llm_cache()
+    yield
+    llm_cache.reset_llm_cache()
+
+
+def test_fingerprint_depends_on_model_settings_and_messages():
+    messages = [SystemMessage(content="role"), HumanMessage(content="hi")]
+    key = fingerprint("stub", "m1", 0.0, messages)
+    assert key == fingerprint("stub", "m1", 0.0, [SystemMessage(content="role"), HumanMessage(content="hi")])
+    assert key != fingerprint("stub", "m2", 0.0, messages)
+    assert key != fingerprint("stub", "m1", 0.0, [HumanMessage(content="role"), HumanMessage(content="hi")])
+
+
+def test_memory_tier_evicts_least_recently_used_and_expires(monkeypatch):
+    cache = LLMResponseCache(max_entries=2, ttl_sec=10)
+    cache.set("a", "A")
+    cache.set("b", "B")
+    assert cache.get("a") == "A"
+    cache.set("c", "C")
+    assert cache.get("b") is None
+    assert cache.get("a") == "A"
+
+    now = llm_cache.time.time()
+    monkeypatch.setattr(llm_cache.time, "time", lambda: now + 11)
+    assert cache.get("a") is None
+
+
+def test_disk_tier_survives_new_instance_and_caps_rows(tmp_path):
+    path = tmp_path / "cache.db"
+    cache = LLMResponseCache(max_entries=1, ttl_sec=0, disk_path=path, disk_max_entries=2)
+    for key in ("a", "b", "c"):
+        cache.set(key, key.upper())
+    cache.close()
+
+    reopened = LLMResponseCache(max_entries=1, disk_path=path)
+    assert reopened.get("a") is None
+    assert reopened.get("c") == "C"
+    reopened.close()
+
+
+def test_positive_temperature_bypasses_unless_forced(monkeypatch):
+    assert should_cache(0.0)
+    assert not should_cache(0.7)
+    assert should_cache(0.7, force=True)
+    monkeypatch.setenv("LLM_CACHE_ENABLED", "0")
+    assert not should_cache(0.0, force=True)
+
+
+def _cache_statuses(result):
+    statuses = []
+    for line in result.logs:
+        entry = json.loads(line)
+        if "cache" in entry:
+            statuses.append(entry["cache"])
+    return statuses
+
+
+def test_langchain_engine_reports_cache_hits(monkeypatch):
+    agent = SimpleNamespace(name="Cached", role="Tester", prompt="Resuma.")
+    monkeypatch.setattr(langchain_engine.agents_service, "get_agents_by_ids", lambda ids: {i: agent for i in ids})
+    flow = {"nodes": [{"id": "a", "agentId": "x"}], "edges": []}
+
+    engine = LangChainEngine()
+    calls = {"count": 0}
+    invoke = engine._llm.invoke
+
+    def counting_invoke(messages, **kwargs):
+        calls["count"] += 1
+        return invoke(messages, **kwargs)
+
+    monkeypatch.setattr(engine._llm, "invoke", counting_invoke)
+    first = engine.run(flow, {"subject": "cache"})
+    second = engine.run(flow, {"subject": "cache"})
+
+    assert calls["count"] == 1
+    assert _cache_statuses(first) == ["miss"]
+    assert _cache_statuses(second) == ["hit"]
+    assert second.plan.artifacts["a"].output == first.plan.artifacts["a"].output
+
+
+def test_disk_hits_do_not_write_and_async_path_uses_a_worker_thread(tmp_path, monkeypatch):
+    import asyncio
+    import threading
+
+    cache = LLMResponseCache(max_entries=1, ttl_sec=0, disk_path=tmp_path / "cache.db", disk_max_entries=100)
+    cache.set("a", "A")
+    cache.set("b", "B")  # evicts "a" from memory, so the next read goes to disk
+    statements = []
+    cache._disk._conn.set_trace_callback(statements.append)
+    threads = []
+    disk_get = cache._disk.get
+    monkeypatch.setattr(cache._disk, "get", lambda *a: threads.append(threading.current_thread()) or disk_get(*a))
+
+    assert asyncio.run(cache.aget("a")) == "A"
+    assert threads and threads[0] is not threading.main_thread()
+    assert statements and all(s.lstrip().upper().startswith("SELECT") for s in statements)
+
+    # The hit's recency is written with the next set.
+    asyncio.run(cache.aset("c", "C"))
+    assert any("UPDATE llm_cache SET accessed_at" in s for s in statements)
+    cache.close()
@@ -0,0 +1,88 @@
+import threading
+
+import httpx
+from fastapi.testclient import TestClient
+
+from app.integrations.crewai_client import CrewAIClient
+from app.main import app
+from app.metrics import LLM_CALL_RETRIES, MetricsRegistry, statement_labels
+
+client = TestClient(app)
+
+
+def test_histogram_renders_cumulative_buckets_across_threads():
+    registry = MetricsRegistry()
+    hist = registry.histogram("demo_seconds", "Demo.", ("kind",), buckets=(0.1, 1.0))
+
+    def work():
+        for value in (0.05, 0.5, 5.0):
+            hist.labels("a").observe(value)
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    text = registry.render()
+    assert "# TYPE demo_seconds histogram" in text
+    assert 'demo_seconds_bucket{kind="a",le="0.1"} 4' in text
+    assert 'demo_seconds_bucket{kind="a",le="1"} 8' in text
+    assert 'demo_seconds_bucket{kind="a",le="+Inf"} 12' in text
+    assert 'demo_seconds_count{kind="a"} 12' in text
+
+
+def test_gauge_track_and_label_escaping():
+    registry = MetricsRegistry()
+    gauge = registry.gauge("demo_in_flight", "Demo.", ("name",))
+    with gauge.labels('x"y').track():
+        assert 'demo_in_flight{name="x\\"y"} 1' in registry.render()
+    assert 'demo_in_flight{name="x\\"y"} 0' in registry.render()
+
+
+def test_statement_labels():
+    assert statement_labels("SELECT * FROM agents WHERE id=?") == ("select", "agents")
+    assert statement_labels("INSERT OR IGNORE INTO flow_nodes VALUES (?,?,?)") == ("insert", "flow_nodes")
+    assert statement_labels("UPDATE flows SET name=? WHERE id=?") == ("update", "flows")
+    assert statement_labels("PRAGMA cache_size=-1") == ("pragma", "")
+
+
+def test_metrics_endpoint_reports_orchestration_route_and_db_timings():
+    rf = client.post(
+        "/flows",
+        json={"name": "Metrics Flow", "graph_json": {"nodes": [{"id": "a"}, {"id": "b"}], "edges": []}},
+    )
+    assert rf.status_code == 201
+    rr = client.post("/orchestrate/run", json={"engine": "fake", "flow_id": rf.json()["id"]})
+    assert rr.status_code == 200
+
+    resp = client.get("/metrics")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain")
+    text = resp.text
+    assert 'http_request_duration_seconds_count{method="POST",route="/orchestrate/run",status="200"}' in text
+    assert 'orchestration_run_duration_seconds_count{engine="fake",outcome="ok"}' in text
+    assert 'orchestration_node_duration_seconds_count{engine="fake",outcome="ok"}' in text
+    assert 'orchestration_runs_in_flight{engine="fake"} 0' in text
+    assert 'db_query_duration_seconds_count{op="insert",table="flows"}' in text
+
+
+def test_crewai_retries_are_counted():
+    calls = {"n": 0}
+
+    def handler(request):
+        calls["n"] += 1
+        if calls["n"] == 1:
+            return httpx.Response(503, json={"status": "error"})
+        return httpx.Response(200, json={"status": "ok", "output": "done"})
+
+    before = LLM_CALL_RETRIES.labels("crewai").value()
+    crew = CrewAIClient(
+        api_key="k",
+        base_url="https://crew.test",
+        max_retries=2,
+        backoff_sec=0,
+        http_client=httpx.Client(transport=httpx.MockTransport(handler)),
+    )
+    assert crew.run_node(prompt="hi")["output"] == "done"
+    assert LLM_CALL_RETRIES.labels("crewai").value() == before + 1
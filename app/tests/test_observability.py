@@ -1,3 +1,7 @@
+import io
+import json
+import logging
+
 import pytest
 from fastapi.testclient import TestClient
 from app.main import app
@@ -26,3 +30,57 @@ def test_json_logs(caplog):
     # Since we don't have an endpoint that logs explicitly yet (except startup), 
     # we might need to rely on the fact that we configured the formatter.
     pass
+
+
+def _queue_logger(stream, queue_size=100, policy="drop", batch_size=50):
+    from app.utils.logging import CustomJsonFormatter, build_queue_logging
+
+    handler, listener = build_queue_logging(
+        stream, CustomJsonFormatter("%(timestamp)s %(level)s %(name)s %(message)s"), queue_size, policy, batch_size
+    )
+    logger = logging.getLogger(f"test.queue.{uuid.uuid4()}")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.addHandler(handler)
+    return logger, listener
+
+
+def test_queue_logging_carries_request_id_and_batches_writes():
+    from app.utils.logging import request_id_ctx
+
+    class Stream(io.StringIO):
+        writes = 0
+
+        def write(self, s):
+            Stream.writes += 1
+            return super().write(s)
+
+    stream = Stream()
+    logger, listener = _queue_logger(stream)
+    token = request_id_ctx.set("req-123")
+    try:
+        for n in range(20):
+            logger.info("event %s", n, extra={"job_id": "j1"})
+    finally:
+        request_id_ctx.reset(token)
+    listener.start()
+    listener.stop()
+
+    lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [line["message"] for line in lines] == [f"event {n}" for n in range(20)]
+    assert all(line["request_id"] == "req-123" and line["job_id"] == "j1" for line in lines)
+    assert Stream.writes == 1
+
+
+def test_queue_logging_drops_when_full():
+    from app.utils.logging import LOG_RECORDS_DROPPED
+
+    stream = io.StringIO()
+    logger, listener = _queue_logger(stream, queue_size=5, policy="drop")
+    before = LOG_RECORDS_DROPPED.labels().value()
+    for n in range(8):
+        logger.info("event %s", n)
+    assert LOG_RECORDS_DROPPED.labels().value() == before + 3
+    listener.start()
+    listener.stop()
+    assert len(stream.getvalue().splitlines()) == 5
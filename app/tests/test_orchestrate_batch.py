@@ -0,0 +1,99 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.integrations import llm_cache
+from app.main import app
+from app.orchestration.engine import OrchestrationResult
+from app.orchestration.engines import langchain_engine
+from app.orchestration.engines.langchain_engine import LangChainEngine
+
+client = TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def _fresh_cache():
+    llm_cache.reset_llm_cache()
+    yield
+    llm_cache.reset_llm_cache()
+
+
+def _rows(resp):
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    return sorted((json.loads(line) for line in resp.text.splitlines()), key=lambda row: row["index"])
+
+
+def test_batch_streams_one_line_per_row(make_flow):
+    flow_id = make_flow("Batch Flow")
+    resp = client.post(
+        "/orchestrate/batch", json={"engine": "fake", "flow_id": flow_id, "inputs": [{"n": n} for n in range(5)]}
+    )
+    rows = _rows(resp)
+    assert [row["index"] for row in rows] == list(range(5))
+    assert all(row["status"] == "ok" and row["result"]["plan"]["executed_nodes"] == ["a", "b"] for row in rows)
+    assert len({row["request_id"] for row in rows}) == 5
+    assert rows[0]["result"]["request_id"] == rows[0]["request_id"]
+
+
+def test_batch_accepts_ndjson_upload_and_validates(make_flow):
+    flow_id = make_flow("Batch Upload")
+    body = "\n".join(json.dumps({"n": n}) for n in range(3))
+    resp = client.post(
+        "/orchestrate/batch", data={"flow_id": flow_id, "engine": "fake"}, files={"file": ("rows.ndjson", body)}
+    )
+    assert [row["index"] for row in _rows(resp)] == [0, 1, 2]
+
+    assert client.post("/orchestrate/batch", json={"flow_id": flow_id, "inputs": []}).status_code == 422
+    assert client.post("/orchestrate/batch", json={"flow_id": "missing", "inputs": [{}]}).status_code == 404
+
+
+class _BatchingModel:
+    """Chat model double that records every abatch call."""
+
+    def __init__(self):
+        self.calls = []
+
+    async def abatch(self, inputs, config=None, return_exceptions=False):
+        self.calls.append((len(inputs), config))
+        out = []
+        for messages in inputs:
+            prompt = messages[-1].content
+            if "boom" in prompt:
+                out.append(RuntimeError("provider down"))
+            else:
+                usage = {"input_tokens": 1, "output_tokens": 1}
+                out.append(SimpleNamespace(content=f"ok {len(prompt)}", usage_metadata=usage))
+        return out
+
+
+def test_langchain_batch_uses_abatch_per_level_and_isolates_failures(monkeypatch):
+    loads = []
+
+    def get_agents(ids):
+        loads.append(ids)
+        return {i: SimpleNamespace(name=i, role="Tester", prompt="Conte.") for i in ids}
+
+    monkeypatch.setattr(langchain_engine.agents_service, "get_agents_by_ids", get_agents)
+    engine = LangChainEngine()
+    model = _BatchingModel()
+    engine._llm = model
+    flow = {
+        "nodes": [{"id": "a", "agentId": "x"}, {"id": "b", "agentId": "x"}, {"id": "c", "agentId": "y"}],
+        "edges": [{"from": "a", "to": "c"}, {"from": "b", "to": "c"}],
+    }
+    inputs = [{"subject": "um"}, {"subject": "boom"}, {"subject": "tres"}]
+
+    async def collect():
+        return {index: outcome async for index, outcome, _ in engine.arun_many(flow, inputs, 3)}
+
+    rows = asyncio.run(collect())
+    assert len(loads) == 1
+    # One call for level [a, b] across all rows, one for level [c] across the rows still alive.
+    assert model.calls == [(6, {"max_concurrency": 3}), (2, {"max_concurrency": 3})]
+    assert isinstance(rows[1], ValueError) and "provider down" in str(rows[1])
+    assert isinstance(rows[0], OrchestrationResult) and rows[0].plan.executed_nodes == ["a", "b", "c"]
+    assert rows[2].usage.total_tokens == 6
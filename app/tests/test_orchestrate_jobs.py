@@ -0,0 +1,97 @@
+import time
+import uuid
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+client = TestClient(app)
+
+
+def _wait_for(job_id: str, timeout: float = 5.0) -> dict:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        data = client.get(f"/orchestrate/jobs/{job_id}").json()
+        if data["status"] in ("succeeded", "failed"):
+            return data
+        time.sleep(0.02)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_job_submit_and_poll(make_flow):
+    flow_id = make_flow("Job Flow")
+    rs = client.post("/orchestrate/jobs", json={"engine": "fake", "flow_id": flow_id, "inputs": {}})
+    assert rs.status_code == 202
+    job = rs.json()
+    assert job["status"] in ("queued", "running", "succeeded")
+    assert rs.headers["location"].endswith(job["id"])
+
+    data = _wait_for(job["id"])
+    assert data["status"] == "succeeded"
+    assert data["result"]["plan"]["executed_nodes"] == ["a", "b"]
+    assert data["result"]["request_id"] == job["id"]
+
+
+def test_job_failure_is_recorded(make_flow):
+    flow_id = make_flow("Job Flow")
+    rs = client.post(
+        "/orchestrate/jobs",
+        json={"engine": "fake", "flow_id": flow_id, "inputs": {"simulate_error": "invalid_prompt"}},
+    )
+    data = _wait_for(rs.json()["id"])
+    assert data["status"] == "failed"
+    assert "invalid_prompt" in data["error"]
+
+
+def test_job_idempotency_key_returns_same_job(make_flow):
+    flow_id = make_flow("Job Flow")
+    headers = {"Idempotency-Key": str(uuid.uuid4())}
+    first = client.post("/orchestrate/jobs", json={"engine": "fake", "flow_id": flow_id}, headers=headers)
+    second = client.post("/orchestrate/jobs", json={"engine": "fake", "flow_id": flow_id}, headers=headers)
+    assert first.json()["id"] == second.json()["id"]
+
+
+def test_job_unknown_flow_and_job():
+    assert client.post("/orchestrate/jobs", json={"engine": "fake", "flow_id": "missing"}).status_code == 404
+    assert client.get("/orchestrate/jobs/missing").status_code == 404
+
+
+def test_running_job_left_by_a_crash_is_failed_at_startup(make_flow):
+    from app.orchestration import jobs
+    from app.services import jobs_service
+
+    job, _ = jobs_service.create_job(make_flow("Job Flow"), "fake", {}, idempotency_key=str(uuid.uuid4()))
+    assert jobs_service.claim_job(job.id) is not None
+    # The process that claimed it is gone; a new one starts.
+    assert jobs.recover_interrupted_jobs() >= 1
+    data = client.get(f"/orchestrate/jobs/{job.id}").json()
+    assert data["status"] == "failed" and "Interrupted" in data["error"]
+
+
+def test_shutdown_fails_jobs_that_outlive_the_grace_period(monkeypatch, make_flow):
+    import threading
+
+    from app.orchestration import jobs
+    from app.orchestration.engines.fake_adapter import FakeEngine
+    from app.services import jobs_service
+
+    started, release, finished = threading.Event(), threading.Event(), threading.Event()
+    late_result = FakeEngine().run({"nodes": [{"id": "a"}], "edges": []}, {})
+
+    def slow_job(job_id):
+        jobs_service.claim_job(job_id)
+        started.set()
+        release.wait(5)
+        jobs_service.complete_job(job_id, late_result)
+        finished.set()
+
+    monkeypatch.setattr(jobs, "execute_job", slow_job)
+    job, _ = jobs_service.create_job(make_flow("Job Flow"), "fake", {})
+    jobs.submit(job.id)
+    assert started.wait(5)
+    assert jobs.shutdown(grace_sec=0.05) == 1
+    release.set()
+    assert finished.wait(5)
+    # The late result does not resurrect a job already reported as failed.
+    data = client.get(f"/orchestrate/jobs/{job.id}").json()
+    assert data["status"] == "failed" and "Interrupted" in data["error"]
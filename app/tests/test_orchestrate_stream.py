@@ -0,0 +1,50 @@
+import json
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+client = TestClient(app)
+
+
+def _parse_sse(text: str) -> list[tuple[str, dict]]:
+    events = []
+    for block in text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_stream_emits_node_events_then_result(make_flow):
+    flow_id = make_flow("Stream Flow")
+    with client.stream("GET", "/orchestrate/run/stream", params={"flow_id": flow_id, "engine": "fake"}) as resp:
+        assert resp.status_code == 200
+        assert resp.headers["content-type"].startswith("text/event-stream")
+        events = _parse_sse(resp.read().decode())
+
+    names = [name for name, _ in events]
+    assert names[-1] == "result"
+    node_events = [data for name, data in events if name == "node"]
+    assert [e["node"] for e in node_events] == ["a", "b"]
+    assert node_events[0]["artifact"]["output"] == "fake-a"
+    logs = [data for name, data in events if name == "log"]
+    assert all(log["flow_id"] == flow_id and log["engine"] == "fake" for log in logs)
+    result = events[-1][1]
+    assert result["plan"]["executed_nodes"] == ["a", "b"]
+    assert result["logs"][-1].find("orchestration_summary") != -1
+
+
+def test_stream_reports_engine_errors_as_events(make_flow):
+    flow_id = make_flow("Stream Flow")
+    resp = client.post(
+        "/orchestrate/run/stream",
+        json={"engine": "fake", "flow_id": flow_id, "inputs": {"simulate_error": "invalid_prompt"}},
+    )
+    events = _parse_sse(resp.text)
+    assert events[-1][0] == "error"
+    assert "invalid_prompt" in events[-1][1]["detail"]
+
+
+def test_stream_unknown_flow_is_404():
+    resp = client.get("/orchestrate/run/stream", params={"flow_id": "missing", "engine": "fake"})
+    assert resp.status_code == 404
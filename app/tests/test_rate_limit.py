@@ -0,0 +1,188 @@
+import datetime
+import threading
+import time
+from email.utils import format_datetime
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from app.integrations import rate_limit
+from app.integrations.crewai_client import CrewAIClient
+from app.integrations.rate_limit import AdaptiveLimiter, backoff_delay, get_limiter, parse_retry_after, throttle_info
+from app.metrics import LLM_THROTTLED
+from app.orchestration.engines import langchain_engine
+from app.orchestration.engines.langchain_engine import LangChainEngine
+
+
+@pytest.fixture(autouse=True)
+def _fresh_limiters():
+    rate_limit.reset_limiters()
+    yield
+    rate_limit.reset_limiters()
+
+
+def test_retry_after_and_backoff():
+    assert parse_retry_after("3") == 3.0
+    future = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(seconds=30)
+    assert 28 < parse_retry_after(format_datetime(future, usegmt=True)) <= 30
+    assert parse_retry_after("soon") is None and parse_retry_after(None) is None
+
+    delays = [backoff_delay(3, 0.5) for _ in range(200)]
+    assert all(0 <= d <= 4.0 for d in delays) and len(set(delays)) > 1
+    assert backoff_delay(0, 0.5, retry_after=7) >= 7
+    assert backoff_delay(20, 0.5) <= 30 and backoff_delay(0, 0.5, retry_after=3600) is None
+
+
+def test_throttle_detection():
+    resp = httpx.Response(429, headers={"Retry-After": "2"}, request=httpx.Request("POST", "https://x"))
+    assert throttle_info(httpx.HTTPStatusError("x", request=resp.request, response=resp)) == (True, 2.0)
+    unavailable = httpx.Response(503, request=resp.request)
+    assert throttle_info(httpx.HTTPStatusError("x", request=resp.request, response=unavailable)) == (False, None)
+    assert throttle_info(type("RateLimitError", (Exception,), {})())[0] is True
+
+
+def test_aimd_window_shrinks_on_throttle_and_grows_back():
+    limiter = AdaptiveLimiter("test-aimd", rate=0, burst=1, max_concurrency=8)
+    with limiter.slot() as call:
+        call.throttled()
+    assert limiter.concurrency() == 4
+    # Additive increase: about one slot per window's worth of successful calls.
+    for _ in range(30):
+        with limiter.slot():
+            pass
+    assert limiter.concurrency() == 8
+
+
+def test_window_bounds_concurrent_callers():
+    limiter = AdaptiveLimiter("test-window", rate=0, burst=1, max_concurrency=2)
+    active, peak, lock = [0], [0], threading.Lock()
+
+    def work():
+        with limiter.slot():
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.02)
+            with lock:
+                active[0] -= 1
+
+    threads = [threading.Thread(target=work) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert peak[0] == 2
+
+
+def test_async_waiters_are_woken_by_release_not_polling(monkeypatch):
+    import asyncio
+
+    limiter = AdaptiveLimiter("test-async-wake", rate=0, burst=1, max_concurrency=2)
+    sleeps = []
+    real_sleep = asyncio.sleep
+
+    async def counting_sleep(delay, *args, **kwargs):
+        sleeps.append(delay)
+        return await real_sleep(delay, *args, **kwargs)
+
+    monkeypatch.setattr(rate_limit.asyncio, "sleep", counting_sleep)
+    active, peak = [0], [0]
+
+    async def work():
+        async with limiter.aslot():
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+            await real_sleep(0.005)
+            active[0] -= 1
+
+    async def main():
+        await asyncio.gather(*(work() for _ in range(200)))
+        cancelled = asyncio.ensure_future(limiter.aacquire())
+        async with limiter.aslot(), limiter.aslot():
+            await real_sleep(0)
+            cancelled.cancel()
+        await asyncio.gather(cancelled, return_exceptions=True)
+
+    asyncio.run(main())
+    assert peak[0] == 2 and sleeps == []
+    assert not limiter._async_waiters and limiter._in_flight == 0
+
+
+def test_token_bucket_paces_requests():
+    limiter = AdaptiveLimiter("test-bucket", rate=50, burst=1, max_concurrency=4)
+    start = time.perf_counter()
+    for _ in range(6):
+        with limiter.slot():
+            pass
+    assert time.perf_counter() - start >= 0.09
+
+
+def test_crewai_honors_retry_after_and_shrinks_the_shared_window(monkeypatch):
+    calls = {"n": 0}
+    sleeps = []
+
+    def handler(request):
+        calls["n"] += 1
+        if calls["n"] == 1:
+            return httpx.Response(429, headers={"Retry-After": "0.05"}, json={"status": "error"})
+        return httpx.Response(200, json={"status": "ok", "output": "done"})
+
+    monkeypatch.setattr("time.sleep", sleeps.append)
+    base_url = "https://crew-throttle.test"
+    before = LLM_THROTTLED.labels(base_url).value()
+    crew = CrewAIClient(
+        api_key="k", base_url=base_url, max_retries=2, backoff_sec=0,
+        http_client=httpx.Client(transport=httpx.MockTransport(handler)),
+    )
+    assert crew.run_node(prompt="hi")["output"] == "done"
+    assert sleeps and sleeps[0] >= 0.05
+    assert LLM_THROTTLED.labels(base_url).value() == before + 1
+    assert get_limiter(base_url).concurrency() < get_limiter(base_url).max_concurrency
+
+
+def test_crewai_fails_instead_of_sleeping_through_a_long_retry_after(monkeypatch):
+    monkeypatch.setenv("PROVIDER_BACKOFF_MAX_SEC", "5")
+    sleeps = []
+    calls = {"n": 0}
+
+    def handler(request):
+        calls["n"] += 1
+        return httpx.Response(429, headers={"Retry-After": "3600"}, json={"status": "error"})
+
+    monkeypatch.setattr("time.sleep", sleeps.append)
+    base_url = "https://crew-long-retry.test"
+    crew = CrewAIClient(
+        api_key="k", base_url=base_url, max_retries=2, backoff_sec=0,
+        http_client=httpx.Client(transport=httpx.MockTransport(handler)),
+    )
+    with pytest.raises(httpx.HTTPStatusError):
+        crew.run_node(prompt="hi")
+    assert calls["n"] == 1 and sleeps == []
+    # The endpoint pause is capped too, so other callers wait at most PROVIDER_BACKOFF_MAX_SEC.
+    assert get_limiter(base_url)._try_acquire(time.monotonic()) <= 5
+
+
+def test_langchain_retries_throttled_calls(monkeypatch):
+    monkeypatch.setattr(
+        langchain_engine.agents_service,
+        "get_agents_by_ids",
+        lambda ids: {i: SimpleNamespace(name=i, role="Tester", prompt="Conte.") for i in ids},
+    )
+    monkeypatch.setenv("LLM_CACHE_ENABLED", "0")
+    monkeypatch.setattr(langchain_engine, "_THROTTLE_BACKOFF_SEC", 0)
+    engine = LangChainEngine()
+    attempts = {"n": 0}
+
+    class RateLimitError(Exception):
+        status_code = 429
+
+    def invoke(messages, **kwargs):
+        attempts["n"] += 1
+        if attempts["n"] == 1:
+            raise RateLimitError("slow down")
+        return SimpleNamespace(content="ok")
+
+    monkeypatch.setattr(engine._llm, "invoke", invoke)
+    result = engine.run({"nodes": [{"id": "a", "agentId": "x"}], "edges": []}, {"subject": "throttle"})
+    assert result.plan.artifacts["a"].output == "ok" and attempts["n"] == 2
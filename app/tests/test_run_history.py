@@ -0,0 +1,69 @@
+import uuid
+import zlib
+
+from fastapi.testclient import TestClient
+
+from app.db import connection
+from app.main import app
+from app.orchestration.engine import OrchestrationArtifact, OrchestrationPlan, OrchestrationResult
+from app.services import runs_service
+
+client = TestClient(app)
+
+
+def test_run_is_stored_after_the_response(make_flow):
+    flow_id = make_flow("History Flow")
+    result = client.post("/orchestrate/run", json={"engine": "fake", "flow_id": flow_id}).json()
+
+    stored = client.get(f"/runs/{result['request_id']}")
+    assert stored.status_code == 200
+    run = stored.json()
+    assert run["flow_id"] == flow_id and run["engine"] == "fake" and run["node_count"] == 2
+    assert run["plan"] == result["plan"]
+    assert run["logs"] == result["logs"]
+
+    listed = client.get("/runs", params={"flow_id": flow_id}).json()
+    assert [r["id"] for r in listed] == [result["request_id"]]
+    assert "logs" not in listed[0]
+
+
+def test_large_outputs_are_compressed(monkeypatch):
+    monkeypatch.setenv("RUN_COMPRESS_MIN_BYTES", "100")
+    run_id = str(uuid.uuid4())
+    output = "resultado " * 500
+    runs_service.save_run(OrchestrationResult(
+        engine="fake", flow_id="f", request_id=run_id, logs=["{}"],
+        plan=OrchestrationPlan(
+            executed_nodes=["big", "small"],
+            artifacts={
+                "big": OrchestrationArtifact(status="ok", output=output),
+                "small": OrchestrationArtifact(status="ok", output="x"),
+            },
+        ),
+    ))
+
+    with connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT node_id, output, output_encoding FROM run_artifacts WHERE run_id=?", (run_id,))
+        rows = {r["node_id"]: r for r in cur.fetchall()}
+    assert rows["big"]["output_encoding"] == "zlib" and len(rows["big"]["output"]) < len(output) // 10
+    assert zlib.decompress(rows["big"]["output"]).decode() == output
+    assert rows["small"]["output_encoding"] == "identity"
+
+    run = runs_service.get_run(run_id)
+    assert run.plan.artifacts["big"].output == output and list(run.plan.artifacts) == ["big", "small"]
+
+
+def test_runs_pagination_and_missing_run(make_flow):
+    flow_id = make_flow("History Pages")
+    body = {"engine": "fake", "flow_id": flow_id}
+    ids = {client.post("/orchestrate/run", json=body).json()["request_id"] for _ in range(3)}
+
+    first = client.get("/runs", params={"flow_id": flow_id, "limit": 2})
+    assert len(first.json()) == 2
+    second = client.get("/runs", params={"flow_id": flow_id, "limit": 2, "cursor": first.headers["X-Next-Cursor"]})
+    assert "X-Next-Cursor" not in second.headers
+    assert {r["id"] for r in first.json() + second.json()} == ids
+
+    assert client.get("/runs", params={"cursor": "nope"}).status_code == 400
+    assert client.get("/runs/does-not-exist").status_code == 404
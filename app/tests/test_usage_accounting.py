@@ -0,0 +1,83 @@
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.integrations import llm_cache
+from app.main import app
+from app.models import FlowCreate
+from app.orchestration.engine import OrchestrationUsage, sum_usage
+from app.orchestration.engines import langchain_engine
+from app.orchestration.engines.langchain_engine import LangChainEngine
+from app.services import flows_service, usage_service
+
+client = TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def _fresh_cache():
+    llm_cache.reset_llm_cache()
+    yield
+    llm_cache.reset_llm_cache()
+
+
+def test_usage_normalizes_provider_shapes_and_sums():
+    openai = OrchestrationUsage.from_provider({"prompt_tokens": 10, "completion_tokens": 5}, 120, "m1")
+    langchain = OrchestrationUsage.from_provider({"input_tokens": 3, "output_tokens": 4, "total_tokens": 7}, 30, "m1")
+    assert (openai.prompt_tokens, openai.completion_tokens, openai.total_tokens) == (10, 5, 15)
+    assert (langchain.prompt_tokens, langchain.completion_tokens, langchain.total_tokens) == (3, 4, 7)
+
+    total = sum_usage([openai, langchain])
+    assert (total.prompt_tokens, total.completion_tokens, total.total_tokens, total.latency_ms) == (13, 9, 22, 150)
+    assert total.model == "m1"
+    assert sum_usage([openai, OrchestrationUsage(model="m2")]).model is None
+    assert sum_usage([]) is None
+
+
+def _engine_with_usage(monkeypatch):
+    monkeypatch.setattr(
+        langchain_engine.agents_service,
+        "get_agents_by_ids",
+        lambda ids: {i: SimpleNamespace(name=i, role=f"Tester {i}", prompt="Conte.") for i in ids},
+    )
+    engine = LangChainEngine()
+    usage = {"input_tokens": 12, "output_tokens": 8, "total_tokens": 20}
+    response = SimpleNamespace(content="ok", usage_metadata=usage)
+    monkeypatch.setattr(engine._llm, "invoke", lambda messages, **kwargs: response)
+    return engine
+
+
+def test_langchain_artifacts_carry_usage_and_result_sums_it(monkeypatch):
+    engine = _engine_with_usage(monkeypatch)
+    flow = {"nodes": [{"id": "a", "agentId": "x"}, {"id": "b", "agentId": "y"}], "edges": []}
+    result = engine.run(flow, {"subject": str(uuid.uuid4())})
+
+    assert result.plan.artifacts["a"].usage.total_tokens == 20
+    assert result.usage.prompt_tokens == 24 and result.usage.completion_tokens == 16
+
+    engine.run(flow, {"subject": "repeat"})
+    cached = engine.run(flow, {"subject": "repeat"})
+    assert cached.plan.artifacts["a"].usage is None and cached.usage is None
+
+
+def test_run_usage_is_aggregated_by_flow_agent_and_day(monkeypatch):
+    monkeypatch.setenv("LLM_CACHE_ENABLED", "0")
+    nodes = [{"id": "a", "agentId": "agent-1"}, {"id": "b", "agentId": "agent-1"}, {"id": "c", "agentId": "agent-2"}]
+    graph = {"nodes": nodes, "edges": []}
+    flow = flows_service.create_flow(FlowCreate(name="Usage Flow", graph_json=graph))
+    engine = _engine_with_usage(monkeypatch)
+
+    for n in range(2):
+        result = engine.run(flow.graph_json, {"subject": f"{uuid.uuid4()}-{n}"})
+        usage_service.record_run_usage(flow, result, day="2026-01-02")
+
+    resp = client.get(f"/flows/{flow.id}/usage", params={"since": "2026-01-01", "until": "2026-01-31"})
+    assert resp.status_code == 200
+    rows = {row["agent_id"]: row for row in resp.json()}
+    assert rows["agent-1"]["calls"] == 4 and rows["agent-1"]["total_tokens"] == 80
+    assert rows["agent-2"]["calls"] == 2 and rows["agent-2"]["prompt_tokens"] == 24
+    assert all(row["day"] == "2026-01-02" for row in rows.values())
+
+    assert client.get(f"/flows/{flow.id}/usage", params={"since": "2026-02-01"}).json() == []
+    assert client.get(f"/flows/{flow.id}/usage", params={"since": "yesterday"}).status_code == 422
@@ -1,9 +1,23 @@
+import atexit
+import copy
 import logging
+import logging.handlers
+import queue
 import sys
+import threading
 from pythonjsonlogger import jsonlogger
 from contextvars import ContextVar
+from typing import IO, List, Optional, Tuple
 import datetime
 
+from ..config import log_async_enabled, log_batch_size, log_queue_policy, log_queue_size
+from ..metrics import REGISTRY
+
+LOG_RECORDS_DROPPED = REGISTRY.counter(
+    "log_records_dropped_total", "Log records discarded because the async log queue was full."
+)
+_dropped = LOG_RECORDS_DROPPED.labels()
+
 # Context variable to store request_id
 request_id_ctx = ContextVar("request_id", default=None)
 
@@ -22,18 +36,129 @@ class CustomJsonFormatter(jsonlogger.JsonFormatter):
         else:
             log_record["level"] = record.levelname
 
-        # Add request_id if available
-        req_id = request_id_ctx.get()
+        # Add request_id if available (captured on the logging thread when the record went through a queue)
+        req_id = getattr(record, "request_id", None) or request_id_ctx.get()
         if req_id:
             log_record["request_id"] = req_id
 
+
+class ContextQueueHandler(logging.handlers.QueueHandler):
+    """Enqueue records for a background writer instead of formatting them on the calling thread.
+
+    ``policy="drop"`` discards records while the bounded queue is full (counted in
+    ``log_records_dropped_total``); ``policy="block"`` makes the caller wait for room.
+    """
+
+    def __init__(self, log_queue: "queue.Queue", policy: str = "drop") -> None:
+        super().__init__(log_queue)
+        self.block = policy == "block"
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The listener thread has no request context, so capture request_id now; arguments and
+        # tracebacks are rendered here as well because they may not survive until the write.
+        record = copy.copy(record)
+        if not isinstance(record.msg, dict):
+            record.msg = record.getMessage()
+            record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        if getattr(record, "request_id", None) is None:
+            record.request_id = request_id_ctx.get()
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if self.block:
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _dropped.inc()
+
+
+class BatchingQueueListener(logging.handlers.QueueListener):
+    """Drain up to ``batch_size`` queued records at a time and write them with one write/flush.
+
+    Batches form naturally under load: the writer never waits to fill one, so a
+    lone record is written as soon as it arrives.
+    """
+
+    def __init__(self, log_queue: "queue.Queue", handler: logging.StreamHandler, batch_size: int = 256) -> None:
+        super().__init__(log_queue, handler, respect_handler_level=True)
+        self.batch_size = max(1, batch_size)
+
+    def enqueue_sentinel(self) -> None:
+        # Blocking put: a full queue must not make stop() fail; the records ahead of it are flushed first.
+        self.queue.put(self._sentinel)
+
+    def _write(self, batch: List[logging.LogRecord]) -> None:
+        handler = self.handlers[0]
+        lines = []
+        for record in batch:
+            if record.levelno < handler.level:
+                continue
+            try:
+                lines.append(handler.format(record) + handler.terminator)
+            except Exception:
+                handler.handleError(record)
+        if not lines:
+            return
+        with handler.lock:
+            try:
+                handler.stream.write("".join(lines))
+                handler.flush()
+            except Exception:
+                handler.handleError(batch[-1])
+
+    def _monitor(self) -> None:
+        q = self.queue
+        while True:
+            batch = [q.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(q.get_nowait())
+                except queue.Empty:
+                    break
+            stop = any(record is self._sentinel for record in batch)
+            self._write([record for record in batch if record is not self._sentinel])
+            if stop:
+                return
+
+
+_listener: Optional[BatchingQueueListener] = None
+_listener_lock = threading.Lock()
+
+
+def build_queue_logging(
+    stream: IO[str], formatter: logging.Formatter, queue_size: int, policy: str, batch_size: int
+) -> Tuple[ContextQueueHandler, BatchingQueueListener]:
+    """Return a queue handler for the root logger plus the (not yet started) listener writing to ``stream``."""
+    log_queue: "queue.Queue" = queue.Queue(maxsize=max(0, queue_size))
+    writer = logging.StreamHandler(stream)
+    writer.setFormatter(formatter)
+    return ContextQueueHandler(log_queue, policy), BatchingQueueListener(log_queue, writer, batch_size)
+
+
 def setup_logging():
-    """Configure root logger to use JSON formatter."""
+    """Configure root logger to use JSON formatter, written by a background thread unless LOG_ASYNC=0."""
+    global _listener
     logger = logging.getLogger()
-    handler = logging.StreamHandler(sys.stdout)
     formatter = CustomJsonFormatter("%(timestamp)s %(level)s %(name)s %(message)s")
-    handler.setFormatter(formatter)
-    logger.addHandler(handler)
+    with _listener_lock:
+        if _listener is not None:
+            return logger
+        if log_async_enabled():
+            handler, _listener = build_queue_logging(
+                sys.stdout, formatter, log_queue_size(), log_queue_policy(), log_batch_size()
+            )
+            _listener.start()
+            atexit.register(shutdown_logging)
+        else:
+            handler = logging.StreamHandler(sys.stdout)
+            handler.setFormatter(formatter)
+        logger.addHandler(handler)
     logger.setLevel(logging.INFO)
     
     # Mute noisy libraries
@@ -41,5 +166,18 @@ def setup_logging():
     
     return logger
 
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the background writer (safe to call more than once)."""
+    global _listener
+    with _listener_lock:
+        listener, _listener = _listener, None
+    if listener is not None:
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            if isinstance(handler, ContextQueueHandler) and handler.queue is listener.queue:
+                root.removeHandler(handler)
+        listener.stop()
+
 # Initialize on import? Or let main call it?
 # Better to let main call it.
@@ -0,0 +1,77 @@
+"""Per-node CrewAI call latency: new httpx.Client per call vs the shared keep-alive pool.
+
+Starts a local stub server that answers like the CrewAI run endpoint, then times
+CrewAIClient.run_node() with both transports.
+
+Usage: python benchmarks/bench_crewai_pool.py [calls]
+"""
+import json
+import pathlib
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from app.integrations.crewai_client import CrewAIClient, get_shared_client  # noqa: E402
+
+BODY = json.dumps({"status": "ok", "output": "stub-output", "usage": {"prompt_tokens": 3}}).encode()
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_POST(self):  # noqa: N802
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, *args):
+        pass
+
+
+class _PerCallClient:
+    """Reproduces the previous behaviour: one httpx.Client (and TCP handshake) per call."""
+
+    def post(self, url, json=None, headers=None, timeout=None):
+        with httpx.Client(timeout=timeout) as client:
+            return client.post(url, json=json, headers=headers)
+
+
+def _measure(label: str, client: CrewAIClient, calls: int) -> None:
+    samples = []
+    for n in range(calls):
+        t0 = time.perf_counter()
+        client.run_node(prompt=f"node {n}", context={"node": f"n{n}"})
+        samples.append((time.perf_counter() - t0) * 1000)
+    samples.sort()
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    mean, p50 = statistics.fmean(samples), statistics.median(samples)
+    print(f"{label:<14} mean={mean:7.3f}ms  p50={p50:7.3f}ms  p95={p95:7.3f}ms")
+
+
+def main() -> None:
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        print(f"{calls} run_node calls against {base_url}")
+        per_call = CrewAIClient("k", base_url=base_url, max_retries=0, http_client=_PerCallClient())
+        _measure("client/call", per_call, calls)
+        _measure("shared pool", CrewAIClient("k", base_url=base_url, max_retries=0), calls)
+    finally:
+        get_shared_client().close()
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Compare per-call SQLite open/close against the pooled connection layer.
+
+Usage: python benchmarks/bench_db_pool.py [iterations]
+"""
+import pathlib
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from app.db import ConnectionPool  # noqa: E402
+
+ROWS = 500
+
+
+def _seed(path: pathlib.Path) -> list[str]:
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE agents (id TEXT PRIMARY KEY, name TEXT NOT NULL, role TEXT NOT NULL, goal TEXT NOT NULL,"
+        " backstory TEXT NOT NULL, tools TEXT, input_artifacts TEXT, output_artifacts TEXT, created_at TEXT)"
+    )
+    ids = [str(uuid.uuid4()) for _ in range(ROWS)]
+    conn.executemany(
+        "INSERT INTO agents VALUES (?,?,?,?,?,?,?,?,?)",
+        [
+            (i, f"agent-{n}", "role", "goal" * 20, "backstory" * 40, "[]", "{}", "{}", "2025-01-01")
+            for n, i in enumerate(ids)
+        ],
+    )
+    conn.commit()
+    conn.close()
+    return ids
+
+
+def _open_close(path: pathlib.Path, agent_id: str) -> None:
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("SELECT * FROM agents WHERE id=?", (agent_id,)).fetchone()
+    conn.close()
+
+
+def _pooled(pool: ConnectionPool, agent_id: str) -> None:
+    conn = pool.acquire()
+    conn.execute("SELECT * FROM agents WHERE id=?", (agent_id,)).fetchone()
+    conn.close()
+
+
+def _measure(label: str, fn, ids: list[str], iterations: int) -> None:
+    samples = []
+    for n in range(iterations):
+        t0 = time.perf_counter()
+        fn(ids[n % len(ids)])
+        samples.append((time.perf_counter() - t0) * 1_000_000)
+    samples.sort()
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    mean, p50 = statistics.fmean(samples), statistics.median(samples)
+    print(f"{label:<12} mean={mean:8.1f}us  p50={p50:8.1f}us  p95={p95:8.1f}us")
+
+
+def main() -> None:
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    with tempfile.TemporaryDirectory() as tmp:
+        path = pathlib.Path(tmp) / "bench.db"
+        ids = _seed(path)
+        pool = ConnectionPool(path, size=4)
+        print(f"{iterations} point lookups on a {ROWS}-row agents table")
+        _measure("open/close", lambda agent_id: _open_close(path, agent_id), ids, iterations)
+        _measure("pooled", lambda agent_id: _pooled(pool, agent_id), ids, iterations)
+        pool.close()
+
+
+if __name__ == "__main__":
+    main()
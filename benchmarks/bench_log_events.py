@@ -0,0 +1,69 @@
+"""Compare the legacy serialize/re-parse/enrich log pipeline against LogEmitter.
+
+The legacy path dumped every engine log line to JSON, then the router parsed
+each line back, added request_id/engine/flow_id and dumped it again. The
+emitter binds that context up front and serializes each event once.
+
+Usage: python benchmarks/bench_log_events.py [nodes]
+"""
+import datetime
+import json
+import pathlib
+import statistics
+import sys
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from app.orchestration.engine import LOG_CONTEXT_KEY, LogEmitter, orjson  # noqa: E402
+from app.orchestration.engines.fake_adapter import FakeEngine  # noqa: E402
+
+REPEATS = 20
+CONTEXT = {"request_id": "5f0c6f53-5d1e-4d0e-9a57-0f4f3b8c1d2e", "flow_id": "bench-flow"}
+
+
+def _legacy(nodes: int) -> list[str]:
+    lines = []
+    for n in range(nodes):
+        entry = {"ts": datetime.datetime.now(datetime.UTC).isoformat(), "level": "info", "msg": "node executado"}
+        entry["node"] = f"n{n}"
+        lines.append(json.dumps(entry, ensure_ascii=False))
+    enriched = []
+    for line in lines:
+        obj = json.loads(line)
+        obj["request_id"] = CONTEXT["request_id"]
+        obj["engine"] = "fake"
+        obj["flow_id"] = CONTEXT["flow_id"]
+        enriched.append(json.dumps(obj, ensure_ascii=False))
+    return enriched
+
+
+def _emitter(nodes: int) -> list[str]:
+    emitter = LogEmitter(engine="fake", **CONTEXT)
+    return [emitter.emit("node executado", node=f"n{n}").line for n in range(nodes)]
+
+
+def _engine_run(nodes: int) -> list[str]:
+    flow = {"nodes": [{"id": f"n{n}"} for n in range(nodes)], "edges": []}
+    return FakeEngine().run(flow, {LOG_CONTEXT_KEY: CONTEXT}).logs
+
+
+def _measure(label: str, fn, nodes: int) -> None:
+    samples = []
+    for _ in range(REPEATS):
+        t0 = time.perf_counter()
+        fn(nodes)
+        samples.append((time.perf_counter() - t0) * 1000)
+    print(f"{label:<18} mean={statistics.fmean(samples):7.2f}ms  p50={statistics.median(samples):7.2f}ms")
+
+
+def main() -> None:
+    nodes = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    print(f"{nodes} log lines per run, {REPEATS} runs, orjson={'yes' if orjson is not None else 'no'}")
+    _measure("legacy (x3 json)", _legacy, nodes)
+    _measure("LogEmitter", _emitter, nodes)
+    _measure("FakeEngine.run", _engine_run, nodes)
+
+
+if __name__ == "__main__":
+    main()
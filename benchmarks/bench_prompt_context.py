@@ -0,0 +1,68 @@
+"""Prompt bytes per node on a linear chain: every ancestor (legacy) vs edge-scoped context.
+
+The legacy prompt embedded the outputs of every transitive ancestor as an
+indented JSON object, so prompt size grew linearly per node (quadratically
+per flow). Edge-scoped context sends direct predecessors only
+(LANGCHAIN_CONTEXT_DEPTH=1) under a byte budget (LANGCHAIN_CONTEXT_MAX_BYTES).
+
+Usage: python benchmarks/bench_prompt_context.py [nodes] [output_bytes]
+"""
+import json
+import pathlib
+import statistics
+import sys
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from app.orchestration.engines.langchain_engine import _build_prompt, _select_context  # noqa: E402
+from app.orchestration.scheduler import build_graph  # noqa: E402
+
+PROMPT = "Resuma e continue o trabalho do passo anterior."
+INPUTS = {"subject": "relatorio trimestral"}
+
+
+def _legacy_prompt(previous_outputs: dict) -> str:
+    sections = [PROMPT, f"Contexto do fluxo:\n{json.dumps(INPUTS, ensure_ascii=False, indent=2)}"]
+    if previous_outputs:
+        sections.append(f"Saídas anteriores:\n{json.dumps(previous_outputs, ensure_ascii=False, indent=2)}")
+    sections.append("Produza a melhor continuação baseada nas instruções e contexto acima.")
+    return "\n\n".join(sections)
+
+
+def _measure(label: str, graph, outputs, build) -> None:
+    t0 = time.perf_counter()
+    sizes = [len(build(node_id).encode("utf-8")) for node_id in graph.order]
+    elapsed = (time.perf_counter() - t0) * 1000
+    print(
+        f"{label:<28} mean={statistics.fmean(sizes):>10,.0f}B  max={max(sizes):>10,}B  "
+        f"total={sum(sizes):>13,}B  build={elapsed:7.1f}ms"
+    )
+
+
+def main() -> None:
+    nodes = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    output_bytes = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    flow = {
+        "nodes": [{"id": f"n{i}"} for i in range(nodes)],
+        "edges": [{"from": f"n{i}", "to": f"n{i + 1}"} for i in range(nodes - 1)],
+    }
+    graph = build_graph(flow)
+    line = "linha de saida do agente com \"aspas\" e acentuação\n"
+    outputs = {nid: (line * (output_bytes // len(line) + 1))[:output_bytes] for nid in graph.order}
+    print(f"{nodes}-node chain, {output_bytes} bytes per node output")
+
+    def legacy(nid):
+        return _legacy_prompt({a: outputs[a] for a in graph.ancestors(nid)})
+
+    _measure("legacy (all ancestors)", graph, outputs, legacy)
+    for depth, budget in ((1, 16384), (3, 16384), (0, 16384)):
+        def build(nid, depth=depth, budget=budget):
+            previous, omitted = _select_context(graph, nid, outputs, depth or None, budget)
+            return _build_prompt(PROMPT, INPUTS, previous, omitted)
+
+        _measure(f"depth={depth or 'all'} budget={budget}", graph, outputs, build)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,3 +8,15 @@ def setup_database():
     This fixture runs once per test session and ensures tables are created.
     """
     init_db()
+
+
+@pytest.fixture(autouse=True)
+def reset_circuit_breakers():
+    """
+    Start every test with closed breakers; tests share provider base URLs,
+    so failures from one test would otherwise open the breaker for the next.
+    """
+    from app.integrations.circuit_breaker import reset_breakers
+    reset_breakers()
+    yield
+    reset_breakers()